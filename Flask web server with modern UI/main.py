@@ -13,11 +13,20 @@ import platform
 import requests
 import random
 import time
-import ast
-import operator
 import math
+import sys
 from pathlib import Path
 
+# The calculator, intent rules, system facts and Wikipedia client are shared with the server, one directory up
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from calculator import (
+    ExpressionCompiler, ExpressionTooComplex, ResultTooLarge, TooManyDigits, UnsafeExpression, format_integer,
+)
+from intent_matcher import IntentMatcher
+from system_info import SystemInfo, platform_facts
+from wiki_client import WIKI_API_URL, WIKI_CACHE_PERSIST, WIKI_LANG_PREFIX, WikiCache, WikipediaClientPool
+
 # Try to import optional dependencies with graceful fallbacks
 try:
     import speech_recognition as sr
@@ -33,12 +42,79 @@ except ImportError:
     TTS_AVAILABLE = False
     print("⚠️  Text-to-Speech not available. Install with: pip install pyttsx3")
 
-try:
-    import wikipedia
-    WIKIPEDIA_AVAILABLE = True
-except ImportError:
-    WIKIPEDIA_AVAILABLE = False
-    print("⚠️  Wikipedia not available. Install with: pip install wikipedia")
+def edit_distance(a, b):
+    """Damerau-Levenshtein distance (adjacent swaps count as one edit)"""
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+    return current[len(b)]
+
+class CommandResolver:
+    """Resolves abbreviated or mistyped command names, reporting ambiguity instead of guessing"""
+    MIN_FUZZY_LENGTH = 3  # Shorter words are too easy to mistake for a command
+
+    def __init__(self, names):
+        self.names = set(names)
+        # Every prefix of every name maps to the names that start with it (a flattened prefix trie)
+        self.prefixes = {}
+        for name in sorted(self.names):
+            for end in range(1, len(name) + 1):
+                self.prefixes.setdefault(name[:end], []).append(name)
+        # SymSpell-style index: every string a name turns into after a couple of deletions
+        self.deletes = {}
+        for name in self.names:
+            for variant in self._deletes(name, self.max_distance(name)):
+                self.deletes.setdefault(variant, set()).add(name)
+
+    @staticmethod
+    def max_distance(word):
+        return 1 if len(word) <= 4 else 2
+
+    @staticmethod
+    def _deletes(word, distance):
+        variants, frontier = {word}, {word}
+        for _ in range(distance):
+            frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+            variants |= frontier
+        return variants
+
+    def resolve(self, word, fuzzy=True):
+        """Return (name, candidates): the command to run, or None plus the names it could mean.
+
+        With fuzzy=False only exact names and prefixes count, not typos.
+        """
+        if word in self.names:
+            return word, [word]
+
+        candidates = self.prefixes.get(word, [])
+        if len(candidates) == 1:
+            return candidates[0], candidates
+        if candidates:
+            return None, candidates
+
+        if not fuzzy or len(word) < self.MIN_FUZZY_LENGTH:
+            return None, []
+        limit = self.max_distance(word)
+        found = set()
+        for variant in self._deletes(word, limit):
+            found |= self.deletes.get(variant, set())
+        distances = {name: edit_distance(word, name) for name in found}
+        distances = {name: d for name, d in distances.items() if d <= limit}
+        if not distances:
+            return None, []
+        best = min(distances.values())
+        candidates = sorted(name for name, d in distances.items() if d == best)
+        return (candidates[0] if len(candidates) == 1 else None), candidates
+
+# Commands that act on their arguments: the only ones an abbreviation runs mid-sentence ('calc 2+2')
+ARGUMENT_COMMANDS = {'weather', 'search', 'wiki', 'open', 'save', 'calculate'}
+# Commands with side effects, never run on a corrected spelling
+CONFIRM_COMMANDS = {'save', 'clear', 'open'}
 
 class JarvisAI:
     def __init__(self):
@@ -46,6 +122,9 @@ class JarvisAI:
         self.conversation_history = []
         self.data_dir = Path("jarvis_data")
         self.data_dir.mkdir(exist_ok=True)
+        cache_path = self.data_dir / 'wiki_cache.sqlite3' if WIKI_CACHE_PERSIST else None
+        self.wiki_cache = WikiCache(path=cache_path)
+        self.wiki_clients = WikipediaClientPool(WIKI_API_URL)
         self.voice_enabled = False
         self.setup_voice()
         
@@ -86,18 +165,16 @@ class JarvisAI:
             'voice': self.toggle_voice,
             'calculate': self.calculate,
             'system': self.system_info,
+            'stats': self.show_stats,
         }
+        self.command_resolver = CommandResolver(self.commands)
+        self.intents = IntentMatcher()
 
-        # Safe operators for math evaluation
-        self.operators = {
-            ast.Add: operator.add,
-            ast.Sub: operator.sub,
-            ast.Mult: operator.mul,
-            ast.Div: operator.truediv,
-            ast.Pow: operator.pow,
-            ast.BitXor: operator.xor,
-            ast.USub: operator.neg,
-        }
+        # Parsed and validated calculator expressions, reused across calls
+        self.calculator = ExpressionCompiler()
+
+        # Platform facts are probed on the first 'system'; live ones expire after SYSTEM_INFO_REFRESH
+        self.system_facts = SystemInfo()
 
     def setup_voice(self):
         """Setup text-to-speech engine"""
@@ -180,25 +257,34 @@ class JarvisAI:
             return f"Could not open browser: {e}"
 
     def wikipedia_search(self, query):
-        """Search Wikipedia"""
-        if not WIKIPEDIA_AVAILABLE:
-            return "Wikipedia search unavailable. Install with: pip install wikipedia"
-        
+        """Search Wikipedia ('wiki fr:paris' searches the French Wikipedia)"""
         if not query:
             return "Please provide a search query"
         
-        try:
-            wikipedia.set_lang("en")
-            query_str = ' '.join(query)
-            summary = wikipedia.summary(query_str, sentences=2)
-            return f"Wikipedia says: {summary}"
-        except wikipedia.exceptions.DisambiguationError as e:
-            options = ', '.join(e.options[:5])
+        query_str = ' '.join(query)
+        match = WIKI_LANG_PREFIX.match(query_str)
+        lang, query_str = (match.group(1), match.group(2)) if match else ('en', query_str)
+
+        key = WikiCache.make_key(query_str, lang)
+        result = self.wiki_cache.get(key)
+        if result is None:
+            try:
+                result = self.wiki_clients.get(lang).summary(query_str, sentences=2)
+            except Exception as e:
+                # Offline or erroring: an expired answer beats none
+                result = self.wiki_cache.get_stale(key)
+                if result is None:
+                    return f"Wikipedia search error: {e}"
+            else:
+                self.wiki_cache.put(key, *result)
+
+        kind, payload = result
+        if kind == 'summary':
+            return f"Wikipedia says: {payload}"
+        if kind == 'disambiguation':
+            options = ', '.join(payload[:5])
             return f"Multiple results found. Try being more specific. Options: {options}"
-        except wikipedia.exceptions.PageError:
-            return f"No Wikipedia page found for '{query_str}'"
-        except Exception as e:
-            return f"Wikipedia search error: {e}"
+        return f"No Wikipedia page found for '{query_str}'"
 
     def get_news(self, *args):
         """Get news headlines"""
@@ -279,22 +365,6 @@ class JarvisAI:
         except Exception as e:
             return f"Could not open {app}: {e}"
 
-    def safe_eval(self, node):
-        """Safely evaluate mathematical expressions"""
-        if isinstance(node, ast.Num):  # Python < 3.8
-            return node.n
-        elif isinstance(node, ast.Constant):  # Python >= 3.8
-            return node.value
-        elif isinstance(node, ast.BinOp):
-            left = self.safe_eval(node.left)
-            right = self.safe_eval(node.right)
-            return self.operators[type(node.op)](left, right)
-        elif isinstance(node, ast.UnaryOp):
-            operand = self.safe_eval(node.operand)
-            return self.operators[type(node.op)](operand)
-        else:
-            raise TypeError(f"Unsupported operation: {type(node)}")
-
     def calculate(self, expression):
         """Perform safe calculations"""
         if not expression:
@@ -304,17 +374,19 @@ class JarvisAI:
             expr = ' '.join(expression) if isinstance(expression, list) else expression
             expr = expr.strip()
             
+            exact = expr.startswith('exact ')
+            if exact:
+                expr = expr[len('exact '):].strip()
+            
             # Replace common patterns
             expr = expr.replace('^', '**')  # Power operator
             
-            # Check for dangerous patterns
-            dangerous_patterns = ['import', 'exec', 'eval', '__', 'open', 'file']
-            if any(pattern in expr.lower() for pattern in dangerous_patterns):
-                return "Invalid expression: potentially dangerous operation"
-            
-            # Parse and evaluate safely
-            tree = ast.parse(expr, mode='eval')
-            result = self.safe_eval(tree.body)
+            # Parse, validate and compile once per expression shape, then evaluate.
+            # The compiler's bit bound rejects runaways like 9**9**9 before computing
+            # them, so with one user and no worker pool everything else runs inline
+            result = self.calculator.evaluate(expr)
+            if type(result) is int:
+                result = format_integer(result, exact)
             
             # Handle edge cases
             if isinstance(result, float):
@@ -326,6 +398,14 @@ class JarvisAI:
                     result = round(result, 10)
             
             return f"{expr} = {result}"
+        except UnsafeExpression:
+            return "Invalid expression: potentially dangerous operation"
+        except (ExpressionTooComplex, TooManyDigits) as e:
+            return f"Calculation error: {e}"
+        except ResultTooLarge as e:
+            return f"Calculation error: Result is too large (about 10^{int(e.bits * math.log10(2))})"
+        except OverflowError:
+            return "Calculation error: Result is too large"
         except ZeroDivisionError:
             return "Calculation error: Division by zero"
         except (ValueError, TypeError, SyntaxError):
@@ -336,20 +416,10 @@ class JarvisAI:
     def system_info(self, *args):
         """Get system information"""
         try:
-            info = {
-                "System": platform.system(),
-                "Release": platform.release(), 
-                "Machine": platform.machine(),
-                "Processor": platform.processor() or "Unknown",
-                "Python Version": platform.python_version(),
-                "Architecture": platform.architecture()[0],
-            }
-            
-            result = "💻 System Information:\n" + "="*30 + "\n"
-            for key, value in info.items():
-                result += f"{key}: {value}\n"
-            
-            return result
+            # processor() and architecture() fork uname and file, and none of this changes while we run
+            if self.system_facts.static is None:
+                self.system_facts.set_platform(platform_facts())
+            return self.system_facts.report("💻 System Information:\n" + "="*30 + "\n")
         except Exception as e:
             return f"System info error: {e}"
 
@@ -403,6 +473,14 @@ class JarvisAI:
         self.conversation_history.clear()
         return "🗑️  Conversation history cleared"
 
+    def show_stats(self, *args):
+        """Show Wikipedia cache statistics"""
+        stats = self.wiki_cache.stats()
+        result = "📊 Wikipedia Cache:\n" + "="*30 + "\n"
+        for key, value in stats.items():
+            result += f"{key.replace('_', ' ').title()}: {value}\n"
+        return result
+
     def toggle_voice(self, *args):
         """Toggle voice input/output"""
         if not TTS_AVAILABLE and not SPEECH_RECOGNITION_AVAILABLE:
@@ -421,13 +499,14 @@ time              - Get current time
 date              - Get current date  
 weather [city]    - Get weather info
 search [query]    - Open web search
-wiki [query]      - Wikipedia search
+wiki [query]      - Wikipedia search (wiki fr:paris for French)
 news              - Get news sources
 joke              - Tell a random joke
 quote             - Get inspirational quote
 open [app]        - Open application
-calculate [expr]  - Perform calculation
+calculate [expr]  - Perform calculation ("exact" first for every digit)
 system            - Show system info
+stats             - Show Wikipedia cache stats
 save [filename]   - Save conversation
 history           - Show chat history
 clear             - Clear history
@@ -467,44 +546,50 @@ Speak naturally after enabling voice mode
         if command in ['hello', 'hi', 'hey', 'greetings', 'howdy']:
             return random.choice(self.responses["greeting"])
         
-        # Execute specific commands
-        if command in self.commands:
-            return self.commands[command](args)
-        
-        # Try partial matches
-        for cmd, func in self.commands.items():
-            if cmd.startswith(command) or command in cmd:
-                return func(args)
+        # Execute specific commands. A word on its own may be abbreviated ('calc') or
+        # mistyped ('wkii'); one that starts a sentence is taken as a command only when
+        # it names one, so 'have a good day' and 'new york' are chat, not save and news
+        name, candidates = self.command_resolver.resolve(command, fuzzy=not args)
+        if name == command:
+            return self.commands[name](args)
+        if args:
+            if name in ARGUMENT_COMMANDS:
+                return self.commands[name](args)
+            return self.generate_response(user_input)
+        if name and (name.startswith(command) or name not in CONFIRM_COMMANDS):
+            return self.commands[name](args)
+        if candidates:
+            return f"Did you mean: {', '.join(candidates)}?"
         
         # Generate contextual response
         return self.generate_response(user_input)
 
     def generate_response(self, user_input):
         """Generate AI-like responses using pattern matching"""
-        input_lower = user_input.lower()
+        intents = self.intents.match(user_input)
         
         # Math detection
-        if any(char in user_input for char in '+-*/=()') and any(char.isdigit() for char in user_input):
+        if 'operator' in intents and 'digit' in intents:
             return self.calculate(user_input)
         
         # Question patterns
-        if any(word in input_lower for word in ['what', 'how', 'why', 'when', 'where', 'who']):
-            if 'time' in input_lower:
+        if 'question' in intents:
+            if 'time' in intents:
                 return self.get_time()
-            elif 'date' in input_lower:
+            elif 'date' in intents:
                 return self.get_date()
-            elif 'weather' in input_lower:
+            elif 'weather' in intents:
                 return self.get_weather()
-            elif any(word in input_lower for word in ['you', 'your', 'jarvis']):
+            elif 'about_jarvis' in intents:
                 return "I'm Jarvis, your AI assistant. I'm here to help you with various tasks and questions! Type 'help' to see what I can do."
             else:
                 return "That's a great question! Try using specific commands like 'wiki [topic]' or 'search [query]' for detailed information."
         
         # Emotional responses
-        if any(word in input_lower for word in ['thank', 'thanks', 'appreciate']):
+        if 'thanks' in intents:
             return "You're welcome! I'm glad I could help. Is there anything else you need?"
         
-        if any(word in input_lower for word in ['good', 'great', 'awesome', 'amazing']):
+        if 'positive' in intents:
             return "I'm glad to hear that! How else can I assist you today?"
         
         # Default response
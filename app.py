@@ -4,33 +4,759 @@ JarvisAI Flask Server - Free Alternative to Vercel
 Run locally with: python app.py
 """
 
-from flask import Flask, request, jsonify, render_template_string
+from flask import Blueprint, Flask, Response, request, jsonify, g, stream_with_context
 from flask_cors import CORS
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from pathlib import Path
 import datetime
+import hashlib
 import random
-import json
 import os
-import platform
 import webbrowser
 import re
-import ast
-import operator
 import math
+import asyncio
+import secrets
+import sqlite3
+import sys
+import threading
+import time
+
+from calculator import (
+    CALC_INLINE_BITS, CALC_INLINE_RANGE_POINTS, NUMPY_AVAILABLE, ExpressionCompiler, ExpressionTooComplex,
+    HeavyExpression, RangeTooLarge, ResultTooLarge, TooManyDigits, UnsafeExpression, evaluate_isolated,
+    evaluate_range_isolated, format_integer, parse_range, range_size, summarize_range,
+)
+from http_cache import BROTLI_AVAILABLE, StaticAsset, encoded_etag, etag_matches, gzip_if_worthwhile
+from intent_matcher import IntentMatcher
+from json_codec import ORJSON_AVAILABLE, FastJSONProvider, dumps, dumps_with_encoded, loads
+from system_info import SystemInfo, platform_facts
+from wiki_client import (
+    WIKI_API_URL, WIKI_CACHE_PERSIST, WIKI_LANG_PREFIX, WIKI_TIMEOUT, WIKI_WORKERS, WIKIPEDIA_AVAILABLE,
+    WikiCache, WikipediaClientPool,
+)
+from wiki_offline import OfflineWikipedia
+from worker_pool import DeadlineExceeded, WorkerLost, WorkerPool
 
 # Try to import optional dependencies
+if not WIKIPEDIA_AVAILABLE:
+    print("⚠️  Wikipedia not available. Install with: pip install requests")
+
 try:
-    import wikipedia
-    WIKIPEDIA_AVAILABLE = True
+    from flask_sock import Sock
+    WEBSOCKETS_AVAILABLE = True
 except ImportError:
-    WIKIPEDIA_AVAILABLE = False
-    print("⚠️  Wikipedia not available. Install with: pip install wikipedia")
+    WEBSOCKETS_AVAILABLE = False
+    print("⚠️  WebSocket chat not available. Install with: pip install flask-sock")
 
-app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+try:
+    from intent_classifier import IntentClassifier
+    INTENT_CLASSIFIER_AVAILABLE = True
+except ImportError:
+    INTENT_CLASSIFIER_AVAILABLE = False
+    print("⚠️  Intent classifier not available. Install with: pip install numpy")
+
+routes = Blueprint('jarvis', __name__)
+
+DATA_DIR = Path(os.environ.get('JARVIS_DATA_DIR', 'jarvis_data'))
+
+# Server settings (python app.py --production runs gunicorn with these)
+SERVER_HOST = os.environ.get('JARVIS_HOST', '0.0.0.0')
+SERVER_PORT = int(os.environ.get('JARVIS_PORT', 5000))
+SERVER_DEBUG = os.environ.get('JARVIS_DEBUG', 'false').lower() == 'true'
+SERVER_WORKERS = int(os.environ.get('JARVIS_WORKERS', (os.cpu_count() or 1) * 2 + 1))
+SERVER_THREADS = int(os.environ.get('JARVIS_THREADS', 4))
+PRODUCTION = os.environ.get('JARVIS_ENV', 'development').lower() == 'production' or '--production' in sys.argv
+
+# History limits (override with environment variables)
+# Worker processes can't see each other's memory, so production shares history through SQLite
+HISTORY_BACKEND = os.environ.get('JARVIS_HISTORY_BACKEND', 'sqlite' if PRODUCTION else 'memory').lower()
+HISTORY_PER_SESSION = int(os.environ.get('JARVIS_HISTORY_PER_SESSION', 200))
+HISTORY_MAX_SESSIONS = int(os.environ.get('JARVIS_HISTORY_MAX_SESSIONS', 1000))
+HISTORY_SESSION_TTL = int(os.environ.get('JARVIS_HISTORY_SESSION_TTL', 3600))
+HISTORY_MAX_BYTES = int(os.environ.get('JARVIS_HISTORY_MAX_BYTES', 32 * 1024 * 1024))
+
+# Batch chat limits
+BATCH_MAX_MESSAGES = int(os.environ.get('JARVIS_BATCH_MAX_MESSAGES', 100))
+BATCH_WORKERS = int(os.environ.get('JARVIS_BATCH_WORKERS', 8))
+
+# WebSocket chat: replies still being worked on per connection before the server stops reading
+WS_MAX_IN_FLIGHT = int(os.environ.get('JARVIS_WS_MAX_IN_FLIGHT', 16))
+WS_MAX_MESSAGE_BYTES = 64 * 1024
+
+# Streamed replies are sent a sentence or a line at a time
+STREAM_CHUNK_PATTERN = re.compile(r'.+?(?:[.!?](?=\s)|\n|$)\s*', re.S)
+
+# CPU-heavy work (big calculations, system probes) runs in worker processes killed at the deadline
+CPU_WORKERS = max(1, int(os.environ.get('JARVIS_CPU_WORKERS', 2)))
+CALC_TIMEOUT = float(os.environ.get('JARVIS_CALC_TIMEOUT', 3))
+SYSTEM_INFO_TIMEOUT = float(os.environ.get('JARVIS_SYSTEM_INFO_TIMEOUT', 2))
+
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_PAGE_SIZE = 500
+
+SESSION_COOKIE = 'jarvis_session'
+SESSION_HEADER = 'X-Jarvis-Session'
+DEFAULT_SESSION = 'default'
+
+# JSON ETags start with a token drawn at startup, so a restart or deploy never revalidates an old body
+ETAG_PREFIX = secrets.token_hex(4)
+
+# Upstream Wikipedia protection (cache and client settings live in wiki_client)
+WIKI_BREAKER_THRESHOLD = int(os.environ.get('JARVIS_WIKI_BREAKER_THRESHOLD', 5))
+WIKI_BREAKER_RESET = float(os.environ.get('JARVIS_WIKI_BREAKER_RESET', 30))
+
+# Offline Wikipedia: 'auto' uses the local index when built, 'offline' never goes online
+WIKI_MODE = os.environ.get('JARVIS_WIKI_MODE', 'auto').lower()
+WIKI_OFFLINE_DIR = Path(os.environ.get('JARVIS_WIKI_OFFLINE_DIR', DATA_DIR / 'wiki_offline'))
+
+class HistoryRing:
+    """Fixed-capacity ring buffer holding one session's conversation, each entry kept as JSON bytes"""
+    ENTRY_OVERHEAD = 64  # Rough per-entry cost of the bytes object and its slot
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.slots = [None] * capacity
+        self.start = 0  # Sequence number of the oldest retained entry
+        self.end = 0    # Sequence number the next entry will get
+        self.size_bytes = 0
+        self.newest_timestamp = None
+        self.last_access = time.monotonic()
+
+    def __len__(self):
+        return self.end - self.start
+
+    @classmethod
+    def entry_size(cls, encoded):
+        return cls.ENTRY_OVERHEAD + len(encoded)
+
+    def append(self, entry):
+        """Store an entry, overwriting the oldest one when full. Returns the byte delta"""
+        freed = 0
+        if len(self) == self.capacity:
+            freed = self.pop_oldest()
+        entry['id'] = self.end  # Doubles as the pagination cursor
+        # Encoded once here, so serving a page is a join rather than a copy and an encode per entry
+        encoded = dumps(entry)
+        size = self.entry_size(encoded)
+        self.slots[self.end % self.capacity] = encoded
+        self.newest_timestamp = entry['timestamp']
+        self.end += 1
+        self.size_bytes += size
+        return size - freed
+
+    def pop_oldest(self):
+        """Drop the oldest entry and return the bytes it used"""
+        if not len(self):
+            return 0
+        index = self.start % self.capacity
+        size = self.entry_size(self.slots[index])
+        self.slots[index] = None
+        self.start += 1
+        self.size_bytes -= size
+        return size
+
+    def clear(self):
+        """Drop every entry but keep the sequence so client cursors stay valid"""
+        freed = self.size_bytes
+        self.slots = [None] * self.capacity
+        self.start = self.end
+        self.size_bytes = 0
+        return freed
+
+    def encoded(self, first=None, last=None):
+        """Return retained entries with first <= id < last as JSON bytes, oldest first"""
+        first = self.start if first is None else max(first, self.start)
+        last = self.end if last is None else min(last, self.end)
+        return [self.slots[seq % self.capacity] for seq in range(first, last)]
+
+    def entries(self, first=None, last=None):
+        """Return retained entries with first <= id < last as dicts, oldest first"""
+        return [loads(encoded) for encoded in self.encoded(first, last)]
+
+def history_page(start, end, fetch, before, limit):
+    """Page backwards through a session whose retained ids are [start, end)"""
+    last = end if before is None else min(before, end)
+    first = max(last - limit, start)
+    return {
+        'history': fetch(first, last),
+        'next_cursor': first if first > start else None,
+        'latest_cursor': end,
+    }
+
+def history_since(start, end, fetch, after, limit):
+    """Return what a session appended after a cursor, for delta polling"""
+    # A cursor from the future means the session was evicted and restarted
+    reset = after > end
+    first = start if reset else max(after, start)
+    entries = fetch(first, first + limit)
+    cursor = first + len(entries)  # Retained ids are contiguous, and fetch saw the same [start, end)
+    return {
+        'history': entries,
+        'has_more': cursor < end,
+        'latest_cursor': cursor,
+        'truncated': not reset and after < start,  # Some entries were evicted unseen
+        'reset': reset,
+    }
+
+class SessionHistoryStore:
+    """Per-session conversation history with LRU/TTL eviction and a global memory ceiling"""
+
+    def __init__(self, per_session=HISTORY_PER_SESSION, max_sessions=HISTORY_MAX_SESSIONS,
+                 session_ttl=HISTORY_SESSION_TTL, max_bytes=HISTORY_MAX_BYTES):
+        self.per_session = per_session
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.evicted_sessions = 0
+        self._sessions = OrderedDict()  # Least recently used first
+        self._lock = threading.Lock()
+
+    def _touch(self, session_id, create=False):
+        ring = self._sessions.get(session_id)
+        if ring is None:
+            if not create:
+                return None
+            ring = self._sessions[session_id] = HistoryRing(self.per_session)
+        else:
+            self._sessions.move_to_end(session_id)
+        ring.last_access = time.monotonic()
+        return ring
+
+    def _drop_session(self, session_id):
+        ring = self._sessions.pop(session_id)
+        self.total_bytes -= ring.size_bytes
+        self.evicted_sessions += 1
+
+    def _evict(self, keep):
+        """Expire idle sessions, then enforce the session and memory limits"""
+        cutoff = time.monotonic() - self.session_ttl
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if oldest_id == keep or oldest.last_access >= cutoff:
+                break
+            self._drop_session(oldest_id)
+
+        while len(self._sessions) > self.max_sessions:
+            self._drop_session(next(iter(self._sessions)))
+
+        while self.total_bytes > self.max_bytes and len(self._sessions) > 1:
+            oldest_id = next(iter(self._sessions))
+            if oldest_id == keep:
+                break
+            self._drop_session(oldest_id)
+
+        ring = self._sessions.get(keep)
+        while ring is not None and self.total_bytes > self.max_bytes and len(ring) > 1:
+            self.total_bytes -= ring.pop_oldest()
+
+    def append(self, session_id, entry):
+        """Add an entry to a session's history"""
+        with self._lock:
+            ring = self._touch(session_id, create=True)
+            self.total_bytes += ring.append(entry)
+            self._evict(keep=session_id)
+            return entry
+
+    def page(self, session_id, before=None, limit=HISTORY_PAGE_SIZE, encoded=False):
+        """Return up to `limit` entries older than the `before` cursor (newest page by default).
+
+        With encoded=True the entries are JSON bytes, for dumps_with_encoded().
+        """
+        with self._lock:
+            ring = self._touch(session_id) or HistoryRing(1)
+            return history_page(ring.start, ring.end, ring.encoded if encoded else ring.entries, before, limit)
+
+    def since(self, session_id, after, limit=HISTORY_PAGE_SIZE, encoded=False):
+        """Return up to `limit` entries appended after the `after` cursor"""
+        with self._lock:
+            ring = self._touch(session_id) or HistoryRing(1)
+            return history_since(ring.start, ring.end, ring.encoded if encoded else ring.entries, after, limit)
+
+    def version(self, session_id):
+        """(start, end, newest timestamp): changes whenever the session's retained history does"""
+        with self._lock:
+            ring = self._touch(session_id)
+            if ring is None:
+                return 0, 0, None
+            return ring.start, ring.end, ring.newest_timestamp if len(ring) else None
+
+    def clear(self, session_id):
+        """Forget a session's history"""
+        with self._lock:
+            ring = self._sessions.get(session_id)
+            if ring:
+                self.total_bytes -= ring.clear()
+
+    def stats(self):
+        """Return store-wide usage figures"""
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'entries': sum(len(ring) for ring in self._sessions.values()),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'evicted_sessions': self.evicted_sessions,
+                'backend': 'memory',
+            }
+
+class SqliteHistoryStore:
+    """SessionHistoryStore with the same limits, kept in SQLite (WAL) so worker processes share it"""
+    SWEEP_EVERY = 100  # Appends between TTL/size sweeps
+    TOUCH_EVERY = 60   # Seconds between last-access writes for a session that is only being read
+
+    def __init__(self, path, per_session=HISTORY_PER_SESSION, max_sessions=HISTORY_MAX_SESSIONS,
+                 session_ttl=HISTORY_SESSION_TTL, max_bytes=HISTORY_MAX_BYTES):
+        self.path = str(path)
+        self.per_session = per_session
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.max_bytes = max_bytes
+        self._appends = 0
+        self._touched = {}  # session_id -> when this process last wrote its last_access
+        self._local = threading.local()
+        db = self._connection()
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY, start INTEGER, end INTEGER,
+                size_bytes INTEGER, last_access REAL);
+            CREATE INDEX IF NOT EXISTS sessions_by_access ON sessions (last_access);
+            CREATE TABLE IF NOT EXISTS history (
+                session_id TEXT, id INTEGER, timestamp TEXT, user TEXT, response TEXT, size INTEGER,
+                PRIMARY KEY (session_id, id)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER);
+            INSERT OR IGNORE INTO counters VALUES ('evicted_sessions', 0);
+        """)
+
+    def _connection(self):
+        """One connection per thread and process"""
+        if getattr(self._local, 'pid', None) != os.getpid():
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return self._local.db
+
+    def _touch(self, db, session_id):
+        """Keep a session that is only being read from expiring, without a write on every read"""
+        now = time.time()
+        if now - self._touched.get(session_id, 0) < self.TOUCH_EVERY:
+            return
+        if len(self._touched) > self.max_sessions:
+            self._touched.clear()
+        self._touched[session_id] = now
+        db.execute("UPDATE sessions SET last_access = ? WHERE session_id = ?", (now, session_id))
+
+    def _fetcher(self, db, session_id, encoded=False):
+        def fetch(first, last):
+            if encoded:
+                # SQLite builds each entry's JSON itself, in the same key order as the memory store
+                rows = db.execute(
+                    "SELECT json_object('timestamp', timestamp, 'user', user, 'response', response, 'id', id) "
+                    "FROM history WHERE session_id = ? AND id >= ? AND id < ? ORDER BY id",
+                    (session_id, first, last),
+                )
+                return [row[0].encode('utf-8') for row in rows]
+            rows = db.execute(
+                "SELECT timestamp, user, response, id FROM history "
+                "WHERE session_id = ? AND id >= ? AND id < ? ORDER BY id",
+                (session_id, first, last),
+            )
+            return [dict(zip(('timestamp', 'user', 'response', 'id'), row)) for row in rows]
+        return fetch
+
+    def _read(self, session_id, read, encoded=False):
+        """Run read(start, end, fetch) against one snapshot, so an append can't land between the two"""
+        db = self._connection()
+        self._touch(db, session_id)
+        db.execute("BEGIN")
+        try:
+            row = db.execute("SELECT start, end FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            start, end = row or (0, 0)
+            return read(start, end, self._fetcher(db, session_id, encoded))
+        finally:
+            db.execute("COMMIT")
+
+    def _drop_sessions(self, db, session_ids):
+        for session_id in session_ids:
+            db.execute("DELETE FROM history WHERE session_id = ?", (session_id,))
+            db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        if session_ids:
+            # Counted in the database so every worker process reports the same figure
+            db.execute("UPDATE counters SET value = value + ? WHERE name = 'evicted_sessions'",
+                       (len(session_ids),))
+
+    def _sweep(self, db, keep):
+        """Expire idle sessions, then enforce the session and memory limits"""
+        cutoff = time.time() - self.session_ttl
+        expired = db.execute("SELECT session_id FROM sessions WHERE last_access < ? AND session_id != ?",
+                             (cutoff, keep)).fetchall()
+        self._drop_sessions(db, [row[0] for row in expired])
+
+        extra = db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] - self.max_sessions
+        if extra > 0:
+            oldest = db.execute("SELECT session_id FROM sessions WHERE session_id != ? "
+                                "ORDER BY last_access LIMIT ?", (keep, extra)).fetchall()
+            self._drop_sessions(db, [row[0] for row in oldest])
+
+        total = db.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM sessions").fetchone()[0]
+        for session_id, size in db.execute("SELECT session_id, size_bytes FROM sessions "
+                                           "WHERE session_id != ? ORDER BY last_access", (keep,)).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._drop_sessions(db, [session_id])
+            total -= size
+
+    def append(self, session_id, entry):
+        """Add an entry to a session's history"""
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT start, end, size_bytes FROM sessions WHERE session_id = ?",
+                             (session_id,)).fetchone()
+            start, end, size_bytes = row or (0, 0, 0)
+            entry['id'] = end
+            size = HistoryRing.entry_size(dumps(entry))
+            db.execute("INSERT INTO history VALUES (?, ?, ?, ?, ?, ?)",
+                       (session_id, end, entry['timestamp'], entry['user'], entry['response'], size))
+            end += 1
+            size_bytes += size
+            if end - start > self.per_session:
+                start = end - self.per_session
+                freed = db.execute("SELECT COALESCE(SUM(size), 0) FROM history WHERE session_id = ? AND id < ?",
+                                   (session_id, start)).fetchone()[0]
+                db.execute("DELETE FROM history WHERE session_id = ? AND id < ?", (session_id, start))
+                size_bytes -= freed
+            db.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?)",
+                       (session_id, start, end, size_bytes, time.time()))
+            self._appends += 1
+            if self._appends % self.SWEEP_EVERY == 0:
+                self._sweep(db, keep=session_id)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return entry
+
+    def page(self, session_id, before=None, limit=HISTORY_PAGE_SIZE, encoded=False):
+        """Return up to `limit` entries older than the `before` cursor (newest page by default)"""
+        return self._read(session_id, lambda start, end, fetch: history_page(start, end, fetch, before, limit),
+                          encoded)
+
+    def since(self, session_id, after, limit=HISTORY_PAGE_SIZE, encoded=False):
+        """Return up to `limit` entries appended after the `after` cursor"""
+        return self._read(session_id, lambda start, end, fetch: history_since(start, end, fetch, after, limit),
+                          encoded)
+
+    def version(self, session_id):
+        """(start, end, newest timestamp): changes whenever the session's retained history does"""
+        db = self._connection()
+        self._touch(db, session_id)
+        row = db.execute(
+            "SELECT start, end, timestamp FROM sessions LEFT JOIN history "
+            "ON history.session_id = sessions.session_id AND id = end - 1 WHERE sessions.session_id = ?",
+            (session_id,)).fetchone()
+        return row or (0, 0, None)
+
+    def clear(self, session_id):
+        """Forget a session's history, keeping its sequence so cursors stay valid"""
+        db = self._connection()
+        with db:  # Commits, or rolls both statements back if either fails
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("DELETE FROM history WHERE session_id = ?", (session_id,))
+            db.execute("UPDATE sessions SET start = end, size_bytes = 0 WHERE session_id = ?", (session_id,))
+
+    def stats(self):
+        """Return store-wide usage figures"""
+        db = self._connection()
+        sessions, entries, size = db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(end - start), 0), COALESCE(SUM(size_bytes), 0) FROM sessions"
+        ).fetchone()
+        evicted = db.execute("SELECT value FROM counters WHERE name = 'evicted_sessions'").fetchone()[0]
+        return {
+            'sessions': sessions,
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'evicted_sessions': evicted,
+            'backend': 'sqlite',
+        }
+
+def create_history_store(backend=HISTORY_BACKEND):
+    """Build the configured history store ('memory' or 'sqlite')"""
+    if backend == 'sqlite':
+        DATA_DIR.mkdir(exist_ok=True)
+        return SqliteHistoryStore(DATA_DIR / 'history.sqlite3')
+    return SessionHistoryStore()
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one in-flight call"""
+
+    class _Call:
+        __slots__ = ('done', 'result', 'error')
+
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
 
-class JarvisAPI:
     def __init__(self):
-        self.conversation_history = []
+        self.executed = 0
+        self.collapsed = 0
+        self._calls = {}
+        self._tasks = {}  # In-flight coroutines for do_async
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args):
+        """Run fn(*args) unless a call for key is already running, then share its outcome"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+                self.executed += 1
+            else:
+                self.collapsed += 1
+
+        if leader:
+            try:
+                call.result = fn(*args)
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    async def do_async(self, key, fn, *args):
+        """Coroutine version of do(): await fn(*args) once per key, shared by every caller"""
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is None:
+                task = self._tasks[key] = asyncio.ensure_future(fn(*args))
+                task.add_done_callback(lambda _: self._tasks.pop(key, None))
+                self.executed += 1
+            else:
+                self.collapsed += 1
+        # Shielded so one caller going away doesn't cancel the lookup for the rest
+        return await asyncio.shield(task)
+
+    def stats(self):
+        """Return how many calls ran and how many piggybacked on another"""
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'collapsed': self.collapsed,
+                'in_flight': len(self._calls) + len(self._tasks),
+            }
+
+class CircuitBreaker:
+    """Fail fast after repeated upstream failures, probing again after a cool-down"""
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold=WIKI_BREAKER_THRESHOLD, reset_timeout=WIKI_BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0  # Consecutive failures
+        self.opened_at = 0.0
+        self.rejected = 0
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return True if a call may go upstream; lets one probe through once the cool-down ends"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'trips': self.trips,
+                'rejected': self.rejected,
+            }
+
+# Command cost classes: quick ones run inline, io ones wait on the network,
+# cpu ones may hand their heavy part to the worker pool as a CpuJob
+COST_QUICK = 'quick'
+COST_IO = 'io'
+COST_CPU = 'cpu'
+
+class CpuJob:
+    """Work a cpu command hands back for the worker pool: fn(*args) there, then finish(result) or fail(error) here"""
+
+    def __init__(self, timeout, fn, args, finish, fail):
+        self.timeout = timeout
+        self.fn = fn
+        self.args = args
+        self.finish = finish
+        self.fail = fail
+
+class UpstreamFailure(str):
+    """A reply saying an upstream service failed: chat shows the text, a batch reports the item as an error"""
+
+class Command:
+    """A chat command: its handler plus the metadata help and /api/commands show"""
+
+    def __init__(self, name, handler, description, usage=None, aliases=(), args=None,
+                 missing=None, cost=COST_QUICK, session=False, listed=True):
+        self.name = name
+        self.handler = handler
+        self.description = description
+        self.usage = usage or name
+        self.aliases = tuple(aliases)
+        self.args = args          # None, 'optional' or 'required': whether the rest of the message is passed on
+        self.missing = missing    # Reply when a required argument is absent
+        self.cost = cost
+        self.session = session    # Handler takes the caller's session_id
+        self.listed = listed
+        self.async_handler = None
+
+    def arguments(self, args, session_id):
+        """Positional and keyword arguments for the handler, after self"""
+        positional = (args,) if self.args else ()
+        keywords = {'session_id': session_id} if self.session else {}
+        return positional, keywords
+
+    def describe(self):
+        return {
+            'name': self.name,
+            'description': self.description,
+            'usage': self.usage,
+            'aliases': list(self.aliases),
+            'cost': self.cost,
+        }
+
+class CommandRegistry:
+    """Name and alias lookup table for chat commands, filled in by decorators"""
+
+    def __init__(self):
+        self.commands = {}  # Canonical name -> Command, in registration order
+        self.index = {}     # Name or alias -> Command
+
+    def command(self, name, description, **options):
+        """Register the decorated JarvisAPI method as a command"""
+        def decorator(handler):
+            command = Command(name, handler, description, **options)
+            for key in (name, *command.aliases):
+                if key in self.index:
+                    raise ValueError(f"Command name '{key}' registered twice")
+                self.index[key] = command
+            self.commands[name] = command
+            return handler
+        return decorator
+
+    def async_handler(self, name):
+        """Register the decorated coroutine method as the ASGI version of a command"""
+        def decorator(handler):
+            self.commands[name].async_handler = handler
+            return handler
+        return decorator
+
+    def resolve(self, user_input):
+        """Split a message into (Command or None, argument string)"""
+        words = (user_input or '').lower().split()
+        if not words:
+            return None, ''
+        return self.index.get(words[0]), ' '.join(words[1:])
+
+    def listed(self):
+        return [command for command in self.commands.values() if command.listed]
+
+    def descriptions(self):
+        """{name: description} for /api/commands"""
+        return {command.name: command.description for command in self.listed()}
+
+class CommandTimings:
+    """Per-command call counts and latency, fed by JarvisAPI's timing hooks"""
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            stats = self._stats.setdefault(name, {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stats['calls'] += 1
+            stats['total_ms'] += seconds * 1000
+            stats['max_ms'] = max(stats['max_ms'], seconds * 1000)
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {
+                    'calls': stats['calls'],
+                    'avg_ms': round(stats['total_ms'] / stats['calls'], 3),
+                    'max_ms': round(stats['max_ms'], 3),
+                }
+                for name, stats in self._stats.items()
+            }
+
+COMMANDS = CommandRegistry()
+
+class JarvisAPI:
+    def __init__(self, history=None):
+        self.history = history if history is not None else create_history_store()
+
+        cache_path = None
+        if WIKI_CACHE_PERSIST:
+            DATA_DIR.mkdir(exist_ok=True)
+            cache_path = DATA_DIR / 'wiki_cache.sqlite3'
+        self.wiki_cache = WikiCache(path=cache_path)
+        self.wiki_clients = WikipediaClientPool(WIKI_API_URL)
+        self.wiki_flight = SingleFlight()
+        self.wiki_breaker = CircuitBreaker()
+        # Upstream calls run here so a hung request can't outlive its deadline on a Flask thread
+        self.wiki_executor = ThreadPoolExecutor(max_workers=WIKI_WORKERS, thread_name_prefix='wiki')
+        # Slow messages (network or worker-pool waits) from batches and WebSockets wait here, side by side
+        self.batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='batch')
+
+        self.offline_wiki = None
+        if WIKI_MODE != 'online' and OfflineWikipedia.available(WIKI_OFFLINE_DIR):
+            try:
+                self.offline_wiki = OfflineWikipedia(WIKI_OFFLINE_DIR)
+                print(f"📚 Offline Wikipedia index loaded ({self.offline_wiki.count} articles)")
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Offline Wikipedia index unusable: {e}")
+
+        # Maps free-form messages the keyword rules miss onto commands
+        self.intent_classifier = None
+        if INTENT_CLASSIFIER_AVAILABLE:
+            try:
+                self.intent_classifier = IntentClassifier.load_or_build(DATA_DIR / 'intent_model.npz')
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Intent classifier unusable: {e}")
         
         # Knowledge base for responses
         self.responses = {
@@ -71,239 +797,626 @@ class JarvisAPI:
             "Success is not final, failure is not fatal: it is the courage to continue that counts. - Winston Churchill",
         ]
 
-        # Safe operators for math evaluation
-        self.operators = {
-            ast.Add: operator.add,
-            ast.Sub: operator.sub,
-            ast.Mult: operator.mul,
-            ast.Div: operator.truediv,
-            ast.Pow: operator.pow,
-            ast.BitXor: operator.xor,
-            ast.USub: operator.neg,
-        }
+        # Called with (command name, seconds) after every command
+        self.command_timings = CommandTimings()
+        self.intents = IntentMatcher()
+        self.timing_hooks = [self.command_timings.record]
 
+        # Parsed and validated calculator expressions, reused across calls
+        self.calculator = ExpressionCompiler()
+        self.cpu_pool = WorkerPool(CPU_WORKERS)
+        self.system_info = SystemInfo()
+
+    @COMMANDS.command('hello', 'Say hello', aliases=('hi', 'hey', 'greetings', 'howdy'), listed=False)
+    def greet(self):
+        return random.choice(self.responses["greeting"])
+
+    @COMMANDS.command('bye', 'Say goodbye', aliases=('goodbye', 'exit', 'quit', 'farewell'), listed=False)
+    def farewell(self):
+        return random.choice(self.responses["farewell"])
+
+    @COMMANDS.command('time', 'Get current time')
     def get_time(self):
         """Get current time"""
         current_time = datetime.datetime.now().strftime("%I:%M %p")
         return f"The current time is {current_time}"
 
+    @COMMANDS.command('date', 'Get current date')
     def get_date(self):
         """Get current date"""
         current_date = datetime.datetime.now().strftime("%A, %B %d, %Y")
         return f"Today's date is {current_date}"
 
+    @COMMANDS.command('joke', 'Tell a random joke')
     def get_joke(self):
         """Get a random joke"""
         return random.choice(self.jokes)
 
+    @COMMANDS.command('quote', 'Get an inspirational quote')
     def get_quote(self):
         """Get a random quote"""
         return random.choice(self.quotes)
 
-    def safe_eval(self, node):
-        """Safely evaluate mathematical expressions"""
-        if isinstance(node, ast.Num):  # Python < 3.8
-            return node.n
-        elif isinstance(node, ast.Constant):  # Python >= 3.8
-            return node.value
-        elif isinstance(node, ast.BinOp):
-            left = self.safe_eval(node.left)
-            right = self.safe_eval(node.right)
-            return self.operators[type(node.op)](left, right)
-        elif isinstance(node, ast.UnaryOp):
-            operand = self.safe_eval(node.operand)
-            return self.operators[type(node.op)](operand)
-        else:
-            raise TypeError(f"Unsupported operation: {type(node)}")
-
+    @COMMANDS.command('calculate', "Perform calculation (e.g., 2+2, 10*5, x^2 for x in 1..100; "
+                      "'exact' prints every digit)",
+                      usage='calculate [exact] [expression]',
+                      aliases=('calc', 'math'), args='required',
+                      missing="Please provide a mathematical expression (e.g., 2+2, 10*5, 100/4)",
+                      cost=COST_CPU)
     def calculate(self, expression):
-        """Perform safe calculations"""
+        """Perform safe calculations; big ones come back as a CpuJob for the worker pool"""
         try:
             # Clean the expression
             expression = expression.strip()
+            exact = expression.startswith('exact ')
+            if exact:
+                expression = expression[len('exact '):].strip()
             
             # Replace common math functions
             expression = expression.replace('^', '**')  # Power operator
+
+            # "x**2 for x in 1..100" evaluates over the whole range in one vectorized pass
+            query = parse_range(expression)
+            if query is not None:
+                if not NUMPY_AVAILABLE:
+                    return "Calculation error: Ranges need NumPy. Install with: pip install numpy"
+                if range_size(query) > CALC_INLINE_RANGE_POINTS:
+                    return CpuJob(CALC_TIMEOUT, evaluate_range_isolated, (query,), str, self.calculation_error)
+                return summarize_range(query, *self.calculator.evaluate_range(query))
             
-            # Check for dangerous patterns
-            dangerous_patterns = ['import', 'exec', 'eval', '__', 'open', 'file']
-            if any(pattern in expression.lower() for pattern in dangerous_patterns):
-                return "Invalid expression: potentially dangerous operation"
-            
-            # Parse and evaluate safely
-            tree = ast.parse(expression, mode='eval')
-            result = self.safe_eval(tree.body)
-            
-            # Handle division by zero and other edge cases
-            if isinstance(result, float):
-                if math.isnan(result):
-                    return "Calculation error: Result is not a number"
-                elif math.isinf(result):
-                    return "Calculation error: Result is infinity"
-                else:
-                    result = round(result, 10)  # Limit decimal places
-            
-            return f"{expression} = {result}"
-        except ZeroDivisionError:
-            return "Calculation error: Division by zero"
-        except (ValueError, TypeError, SyntaxError) as e:
-            return f"Calculation error: Invalid expression"
+            # Parse, validate and compile once per expression shape, then evaluate
+            try:
+                result = self.calculator.evaluate(expression, inline_bits=CALC_INLINE_BITS)
+            except HeavyExpression:
+                # Big exact integers: compute and format them where a runaway can be killed
+                return CpuJob(CALC_TIMEOUT, evaluate_isolated, (expression, exact),
+                              lambda result: self.calculation_reply(expression, result), self.calculation_error)
+            if type(result) is int:
+                result = format_integer(result, exact)
+            return self.calculation_reply(expression, result)
         except Exception as e:
-            return f"Calculation error: {str(e)}"
+            return self.calculation_error(e)
+
+    def calculation_reply(self, expression, result):
+        """Show a calculation's result, formatted or a plain number"""
+        # Handle division by zero and other edge cases
+        if isinstance(result, float):
+            if math.isnan(result):
+                return "Calculation error: Result is not a number"
+            elif math.isinf(result):
+                return "Calculation error: Result is infinity"
+            else:
+                result = round(result, 10)  # Limit decimal places
+        
+        return f"{expression} = {result}"
+
+    def calculation_error(self, error):
+        """The reply for a calculation that raised, inline or in a worker"""
+        if isinstance(error, UnsafeExpression):
+            return "Invalid expression: potentially dangerous operation"
+        if isinstance(error, (ExpressionTooComplex, TooManyDigits, RangeTooLarge)):
+            return f"Calculation error: {error}"
+        if isinstance(error, ResultTooLarge):
+            return f"Calculation error: Result is too large (about 10^{int(error.bits * math.log10(2))})"
+        if isinstance(error, OverflowError):
+            return "Calculation error: Result is too large"
+        if isinstance(error, DeadlineExceeded):
+            return f"Calculation error: Gave up after {CALC_TIMEOUT:g} seconds"
+        if isinstance(error, WorkerLost):
+            return "Calculation error: The calculator is busy, please try again"
+        if isinstance(error, ZeroDivisionError):
+            return "Calculation error: Division by zero"
+        if isinstance(error, (ValueError, TypeError, SyntaxError)):
+            return "Calculation error: Invalid expression"
+        return f"Calculation error: {str(error)}"
 
+    @COMMANDS.command('system', 'Show system info', cost=COST_CPU)
     def get_system_info(self):
-        """Get system information"""
+        """Get system information; the platform is probed once, in the worker pool"""
+        if self.system_info.static is not None:
+            return self.system_info.report()
+        return CpuJob(SYSTEM_INFO_TIMEOUT, platform_facts, (), self.first_system_info,
+                      lambda error: f"System info error: {error}")
+
+    def first_system_info(self, facts):
+        self.system_info.set_platform(facts)
+        return self.system_info.report()
+
+    def warm(self):
+        """Start the worker pool and probe the platform now, so the first requests don't wait for either"""
+        self.cpu_pool.warm()
+        threading.Thread(target=self.complete, args=(self.get_system_info(),), name='system-info', daemon=True).start()
+
+    def fetch_wikipedia(self, query, lang="en", deadline=None):
+        """Look a query up on Wikipedia, returning a (kind, payload) pair"""
+        return self.wiki_clients.get(lang).summary(query, sentences=2, deadline=deadline)
+
+    def fetch_and_cache_wikipedia(self, key, query, lang):
+        """Fetch a lookup within the deadline and store it; run once per key by the single-flight group"""
+        # A running future can't be cancelled, so the worker gets the deadline
+        # too and its HTTP requests time out on their own instead of piling up
+        deadline = time.monotonic() + WIKI_TIMEOUT
+        future = self.wiki_executor.submit(self.fetch_wikipedia, query, lang, deadline)
         try:
-            info = {
-                "System": platform.system(),
-                "Release": platform.release(),
-                "Machine": platform.machine(),
-                "Processor": platform.processor() or "Unknown",
-                "Python Version": platform.python_version(),
-                "Architecture": platform.architecture()[0],
-            }
-            
-            result = "System Information:\n"
-            for key, value in info.items():
-                result += f"{key}: {value}\n"
-            
-            return result
-        except Exception as e:
-            return f"System info error: {e}"
+            result = future.result(timeout=WIKI_TIMEOUT)
+        except FuturesTimeoutError:
+            self.wiki_breaker.record_failure()
+            raise TimeoutError(f"no answer within {WIKI_TIMEOUT:g}s")
+        except Exception:
+            self.wiki_breaker.record_failure()
+            raise
+        self.wiki_breaker.record_success()
+        self.wiki_cache.put(key, *result)
+        return result
 
-    def wikipedia_search(self, query):
-        """Search Wikipedia"""
-        if not WIKIPEDIA_AVAILABLE:
-            return "Wikipedia search unavailable. Please install: pip install wikipedia"
-        
+    async def fetch_and_cache_wikipedia_async(self, key, query, lang):
+        """Coroutine version of fetch_and_cache_wikipedia for the ASGI server"""
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + WIKI_TIMEOUT
+        try:
+            result = await asyncio.wait_for(
+                loop.run_in_executor(self.wiki_executor, self.fetch_wikipedia, query, lang, deadline), WIKI_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.wiki_breaker.record_failure()
+            raise TimeoutError(f"no answer within {WIKI_TIMEOUT:g}s")
+        except Exception:
+            self.wiki_breaker.record_failure()
+            raise
+        self.wiki_breaker.record_success()
+        await asyncio.to_thread(self.wiki_cache.put, key, *result)  # A SQLite write and commit
+        return result
+
+    def format_wiki_result(self, query, kind, payload):
+        """Turn a cached or fresh lookup outcome into a reply"""
+        if kind == 'summary':
+            return f"Wikipedia says: {payload}"
+        if kind == 'disambiguation':
+            options = ', '.join(payload[:5])
+            return f"Multiple results found. Try being more specific. Options: {options}"
+        return f"No Wikipedia page found for '{query}'"
+
+    def resolve_wiki_query(self, query):
+        """Answer a wiki query locally if possible.
+
+        Returns either a reply string, or a (key, query, lang) tuple when the
+        lookup has to go upstream.
+        """
+        match = WIKI_LANG_PREFIX.match(query or '')
+        lang, query = (match.group(1), match.group(2)) if match else ('en', query)
         if not query:
             return "Please provide a search query for Wikipedia"
+
+        if self.offline_wiki is not None and lang == 'en':
+            result = self.offline_wiki.lookup(query)
+            if result[0] != 'missing' or WIKI_MODE == 'offline' or not WIKIPEDIA_AVAILABLE:
+                return self.format_wiki_result(query, *result)
+        elif WIKI_MODE == 'offline':
+            if lang != 'en':
+                return "The offline Wikipedia index only covers English"
+            return "Offline Wikipedia index not found. Build one with: python wiki_offline.py build <dump>"
+
+        if not WIKIPEDIA_AVAILABLE:
+            return "Wikipedia search unavailable. Please install: pip install requests"
         
+        key = WikiCache.make_key(query, lang)
+        result = self.wiki_cache.get(key)
+        if result is None and not self.wiki_breaker.allow():
+            result = self.wiki_cache.get_stale(key)
+            if result is None:
+                return UpstreamFailure("Wikipedia is temporarily unavailable. Please try again in a little while.")
+        if result is not None:
+            return self.format_wiki_result(query, *result)
+        return key, query, lang
+
+    def wiki_error_reply(self, key, query, error):
+        """Fall back to a stale answer when an upstream lookup fails"""
+        result = self.wiki_cache.get_stale(key)
+        if result is None:
+            return UpstreamFailure(f"Wikipedia search error: {str(error)}")
+        return self.format_wiki_result(query, *result)
+
+    @COMMANDS.command('wiki', 'Wikipedia search (wiki fr:paris for other languages)', usage='wiki [query]',
+                      args='optional', cost=COST_IO)
+    def wikipedia_search(self, query):
+        """Search Wikipedia ('fr:paris' searches the French Wikipedia)"""
+        resolved = self.resolve_wiki_query(query)
+        if isinstance(resolved, str):
+            return resolved
+        key, query, lang = resolved
         try:
-            wikipedia.set_lang("en")
-            summary = wikipedia.summary(query, sentences=2)
-            return f"Wikipedia says: {summary}"
-        except wikipedia.exceptions.DisambiguationError as e:
-            options = ', '.join(e.options[:5])
-            return f"Multiple results found. Try being more specific. Options: {options}"
-        except wikipedia.exceptions.PageError:
-            return f"No Wikipedia page found for '{query}'"
+            result = self.wiki_flight.do(key, self.fetch_and_cache_wikipedia, key, query, lang)
         except Exception as e:
-            return f"Wikipedia search error: {str(e)}"
+            return self.wiki_error_reply(key, query, e)
+        return self.format_wiki_result(query, *result)
 
+    @COMMANDS.async_handler('wiki')
+    async def wikipedia_search_async(self, query):
+        """Coroutine version of wikipedia_search; cache reads and writes run off the event loop"""
+        # The cache may read SQLite, and the offline index may page in from disk
+        resolved = await asyncio.to_thread(self.resolve_wiki_query, query)
+        if isinstance(resolved, str):
+            return resolved
+        key, query, lang = resolved
+        try:
+            result = await self.wiki_flight.do_async(key, self.fetch_and_cache_wikipedia_async, key, query, lang)
+        except Exception as e:
+            return await asyncio.to_thread(self.wiki_error_reply, key, query, e)
+        return self.format_wiki_result(query, *result)
+
+    @COMMANDS.command('weather', 'Weather info', usage='weather [city]', args='optional')
+    def get_weather(self, city):
+        return f"Weather feature: Please check weather.com or your local weather service for {city or 'your location'}!"
+
+    @COMMANDS.command('search', 'Web search suggestion', usage='search [query]', args='required',
+                      missing="Please provide a search query")
+    def web_search(self, query):
+        return f"To search for '{query}', visit: https://www.google.com/search?q={'+'.join(query.split())}"
+
+    @COMMANDS.command('clear', 'Clear conversation history', aliases=('reset',), session=True)
+    def clear_conversation(self, session_id=DEFAULT_SESSION):
+        self.history.clear(session_id)
+        return "Conversation history cleared!"
+
+    @COMMANDS.async_handler('clear')
+    async def clear_conversation_async(self, session_id=DEFAULT_SESSION):
+        await asyncio.to_thread(self.history.clear, session_id)  # May be a SQLite write
+        return "Conversation history cleared!"
+
+    @COMMANDS.command('help', 'Show this help')
     def show_help(self):
         """Show available commands"""
-        help_text = """🤖 JarvisAI API Commands:
+        commands = '\n'.join(f"{command.usage} - {command.description}" for command in COMMANDS.listed())
+        return f"""🤖 JarvisAI API Commands:
 ==================
-time - Get current time
-date - Get current date
-joke - Tell a joke
-quote - Get inspirational quote
-calculate [expression] - Perform calculation (e.g., 2+2, 10*5)
-system - Show system info
-wiki [query] - Wikipedia search
-weather - Weather info
-search [query] - Web search suggestion
-help - Show this help
+{commands}
 
 📡 API Usage:
 ============
 POST /api/chat
-Body: {"message": "your command here"}
-Response: {"response": "Jarvis response"}
+Body: {{"message": "your command here"}}
+Response: {{"response": "Jarvis response"}}
+
+POST /api/chat/stream - Same body, reply streamed as Server-Sent Events
+
+POST /api/chat/batch
+Body: {{"messages": ["time", "wiki python", ...]}}
+Response: {{"results": [{{"index": 0, "status": "success", "response": "..."}}, ...]}}
 
 GET /api/commands - List available commands
-GET /api/history - Get conversation history
+GET /api/stats - Cache and history statistics
+GET /api/history - Get conversation history (?limit=&cursor= or ?since=)
 POST /api/clear - Clear history
 """
-        return help_text
 
-    def process_message(self, user_input):
+    def record_timing(self, name, started):
+        """Report how long a command took to every timing hook"""
+        elapsed = time.perf_counter() - started
+        for hook in self.timing_hooks:
+            hook(name, elapsed)
+
+    def process_message(self, user_input, session_id=DEFAULT_SESSION):
         """Process user messages"""
+        return self.finish_message(*self.begin_message(user_input, session_id))
+
+    def begin_message(self, user_input, session_id=DEFAULT_SESSION, intent=None):
+        """Run a message's handler, returning (reply, command name or None, start time).
+
+        The reply may still be a CpuJob; finish_message() runs it and records the timing.
+        intent is the classifier's guess when the caller already has it (see classify_messages).
+        """
+        started = time.perf_counter()
         if not user_input:
-            return random.choice(self.responses["unknown"])
-        
+            return random.choice(self.responses["unknown"]), None, started
+
+        command, args = COMMANDS.resolve(user_input)
+        if command is None:
+            return self.generate_response(user_input, intent), None, started
+        if command.args == 'required' and not args:
+            return command.missing, None, started
+
+        positional, keywords = command.arguments(args, session_id)
+        try:
+            return command.handler(self, *positional, **keywords), command.name, started
+        except BaseException:
+            self.record_timing(command.name, started)
+            raise
+
+    def finish_message(self, reply, name, started):
+        try:
+            return self.complete(reply)
+        finally:
+            if name is not None:
+                self.record_timing(name, started)
+
+    def complete(self, reply):
+        """Run a handler's CpuJob in the worker pool, blocking this thread; other replies pass through"""
+        if not isinstance(reply, CpuJob):
+            return reply
+        for attempt in range(2):
+            try:
+                result = self.cpu_pool.run(reply.timeout, reply.fn, *reply.args)
+                break
+            except WorkerLost as e:
+                if attempt:  # Retried once on a fresh worker already
+                    return reply.fail(e)
+            except Exception as e:
+                return reply.fail(e)
+        return reply.finish(result)
+
+    async def complete_async(self, reply):
+        """complete() for the ASGI server: the job is awaited, so the event loop keeps serving"""
+        if not isinstance(reply, CpuJob):
+            return reply
+        for attempt in range(2):
+            try:
+                result = await self.cpu_pool.run_async(reply.timeout, reply.fn, *reply.args)
+                break
+            except WorkerLost as e:
+                if attempt:
+                    return reply.fail(e)
+            except Exception as e:
+                return reply.fail(e)
+        return reply.finish(result)
+
+    def stream_message(self, user_input, session_id=DEFAULT_SESSION):
+        """Process a message as a series of (event, data) pairs for Server-Sent Events.
+
+        'ack' goes out before any work is done, 'stage' announces slow steps,
+        'chunk' carries the reply a sentence or line at a time and 'done' ends it.
+        """
+        command, args = COMMANDS.resolve(user_input)
         words = user_input.lower().split()
-        command = words[0] if words else ""
-        args = ' '.join(words[1:]) if len(words) > 1 else ''
-        
-        # Check for greetings
-        if command in ['hello', 'hi', 'hey', 'greetings', 'howdy']:
-            return random.choice(self.responses["greeting"])
-        
-        # Check for farewells
-        if command in ['bye', 'goodbye', 'exit', 'quit', 'farewell']:
-            return random.choice(self.responses["farewell"])
-        
-        # Execute specific commands
-        if command == 'time':
-            return self.get_time()
-        elif command == 'date':
-            return self.get_date()
-        elif command == 'joke':
-            return self.get_joke()
-        elif command == 'quote':
-            return self.get_quote()
-        elif command in ['calculate', 'calc', 'math']:
-            if args:
-                return self.calculate(args)
-            else:
-                return "Please provide a mathematical expression (e.g., 2+2, 10*5, 100/4)"
-        elif command == 'system':
-            return self.get_system_info()
-        elif command == 'wiki':
-            return self.wikipedia_search(args)
-        elif command == 'weather':
-            city = args if args else "your location"
-            return f"Weather feature: Please check weather.com or your local weather service for {city}!"
-        elif command == 'help':
-            return self.show_help()
-        elif command == 'search':
-            if args:
-                return f"To search for '{args}', visit: https://www.google.com/search?q={'+'.join(args.split())}"
-            else:
-                return "Please provide a search query"
-        elif command in ['clear', 'reset']:
-            self.conversation_history.clear()
-            return "Conversation history cleared!"
+        yield 'ack', {'command': command.name if command else (words[0] if words else ''),
+                      'timestamp': datetime.datetime.now().isoformat()}
+
+        if command is not None and command.name == 'wiki':
+            started = time.perf_counter()
+            try:
+                resolved = self.resolve_wiki_query(args)
+                if isinstance(resolved, str):
+                    response = resolved
+                else:
+                    key, query, lang = resolved
+                    yield 'stage', {'stage': 'upstream', 'message': f"Searching Wikipedia for '{query}'"}
+                    try:
+                        result = self.wiki_flight.do(key, self.fetch_and_cache_wikipedia, key, query, lang)
+                        response = self.format_wiki_result(query, *result)
+                    except Exception as e:
+                        response = self.wiki_error_reply(key, query, e)
+            finally:
+                self.record_timing(command.name, started)  # As process_message does for every other command
         else:
-            return self.generate_response(user_input)
+            response = self.process_message(user_input, session_id)
+
+        for chunk in STREAM_CHUNK_PATTERN.findall(response):
+            yield 'chunk', {'text': chunk}
+        self.add_to_history(user_input, response, session_id)
+        yield 'done', {'response': response, 'timestamp': datetime.datetime.now().isoformat()}
+
+    def is_slow(self, user_input):
+        """True for messages whose command may wait on the network or on a worker process"""
+        command, _ = COMMANDS.resolve(user_input)
+        return command is not None and command.cost != COST_QUICK
+
+    def validate_batch(self, messages):
+        """Check a batch's shape, raising ValueError for the whole-request problems"""
+        if not isinstance(messages, list) or not messages:
+            raise ValueError('messages must be a non-empty list')
+        if len(messages) > BATCH_MAX_MESSAGES:
+            raise ValueError(f'A batch can hold at most {BATCH_MAX_MESSAGES} messages')
 
-    def generate_response(self, user_input):
+    @staticmethod
+    def batch_item_error(message):
+        """Return why a single batch message can't be processed, or None"""
+        if not isinstance(message, str):
+            return 'Message must be a string'
+        if not message.strip():
+            return 'Message cannot be empty'
+        return None
+
+    @staticmethod
+    def batch_item(index, response):
+        """A batch result for one reply; upstream failures count as errors so the batch is 'partial'"""
+        if isinstance(response, UpstreamFailure):
+            return {'index': index, 'status': 'error', 'error': str(response)}
+        return {'index': index, 'status': 'success', 'response': response}
+
+    def process_batch(self, messages, session_id=DEFAULT_SESSION):
+        """Process many messages: quick ones inline, slow ones concurrently, results in order"""
+        self.validate_batch(messages)
+        results = [None] * len(messages)
+        pending = {}
+        intents = self.classify_messages(messages)
+
+        for index, message in enumerate(messages):
+            error = self.batch_item_error(message)
+            if error:
+                results[index] = {'index': index, 'status': 'error', 'error': error}
+                continue
+            command, _ = COMMANDS.resolve(message)
+            if command is not None and command.cost == COST_IO:
+                pending[index] = self.batch_executor.submit(self.process_message, message, session_id)
+
+        # Everything else starts inline while the lookups are in flight. A cpu command hands back
+        # a CpuJob only past the calculator's inline bounds, so `calculate 2+2` never leaves this thread
+        for index, message in enumerate(messages):
+            if results[index] is None and index not in pending:
+                try:
+                    reply, name, started = self.begin_message(message, session_id, intents.get(index))
+                    if isinstance(reply, CpuJob):
+                        pending[index] = self.batch_executor.submit(self.finish_message, reply, name, started)
+                    else:
+                        results[index] = self.batch_item(index, self.finish_message(reply, name, started))
+                except Exception as e:
+                    results[index] = {'index': index, 'status': 'error', 'error': str(e)}
+
+        for index, future in pending.items():
+            try:
+                results[index] = self.batch_item(index, future.result())
+            except Exception as e:
+                results[index] = {'index': index, 'status': 'error', 'error': str(e)}
+
+        return self.finish_batch(messages, results, session_id)
+
+    async def process_batch_async(self, messages, session_id=DEFAULT_SESSION):
+        """Coroutine version of process_batch for the ASGI server"""
+        self.validate_batch(messages)
+        intents = self.classify_messages(messages)
+
+        async def run(index, message):
+            error = self.batch_item_error(message)
+            if error:
+                return {'index': index, 'status': 'error', 'error': error}
+            try:
+                response = await self.process_message_async(message, session_id, intents.get(index))
+            except Exception as e:
+                return {'index': index, 'status': 'error', 'error': str(e)}
+            return self.batch_item(index, response)
+
+        results = await asyncio.gather(*(run(index, message) for index, message in enumerate(messages)))
+        return await asyncio.to_thread(self.finish_batch, messages, results, session_id)  # History writes
+
+    def finish_batch(self, messages, results, session_id):
+        """Record successful batch items in history and summarize the outcome"""
+        for message, result in zip(messages, results):
+            if result['status'] == 'success':
+                self.add_to_history(message, result['response'], session_id)
+        failed = sum(result['status'] == 'error' for result in results)
+        return {
+            'results': results,
+            'count': len(results),
+            'failed': failed,
+            'status': 'partial' if failed else 'success',
+        }
+
+    async def process_message_async(self, user_input, session_id=DEFAULT_SESSION, intent=None):
+        """Process user messages, awaiting I/O-bound commands and worker jobs instead of blocking"""
+        command, args = COMMANDS.resolve(user_input)
+        if command is None and user_input:
+            # generate_response may calculate; a heavy calculation is awaited like a cpu command
+            return await self.complete_async(self.generate_response(user_input, intent))
+        if command is None or (command.args == 'required' and not args) \
+                or (command.async_handler is None and command.cost != COST_CPU):
+            # Everything else is quick: run it inline
+            return self.process_message(user_input, session_id)
+
+        positional, keywords = command.arguments(args, session_id)
+        started = time.perf_counter()
+        try:
+            if command.async_handler is not None:
+                return await command.async_handler(self, *positional, **keywords)
+            return await self.complete_async(command.handler(self, *positional, **keywords))
+        finally:
+            self.record_timing(command.name, started)
+
+    def generate_response(self, user_input, intent=None):
         """Generate AI-like responses using pattern matching"""
-        input_lower = user_input.lower()
+        intents = self.intents.match(user_input)
         
-        # Math detection - check if input contains mathematical expressions
-        if re.search(r'[\d+\-*/()=]', user_input) and any(char.isdigit() for char in user_input):
+        # Math detection - any digit makes it worth a try
+        if 'digit' in intents:
             return self.calculate(user_input)
         
         # Question patterns
-        if any(word in input_lower for word in ['what', 'how', 'why', 'when', 'where', 'who']):
-            if 'time' in input_lower:
+        if 'question' in intents:
+            if 'time' in intents:
                 return self.get_time()
-            elif 'date' in input_lower:
+            elif 'date' in intents:
                 return self.get_date()
-            elif any(word in input_lower for word in ['you', 'your', 'jarvis']):
+            elif 'about_jarvis' in intents:
                 return "I'm Jarvis, your AI assistant. I'm here to help you with various tasks and questions! Type 'help' to see what I can do."
             else:
                 return "That's a great question! Try using specific commands like 'wiki [topic]' for detailed information or 'help' to see all commands."
         
         # Emotional responses
-        if any(word in input_lower for word in ['thank', 'thanks', 'appreciate']):
+        if 'thanks' in intents:
             return "You're welcome! I'm glad I could help. Is there anything else you need?"
         
-        if any(word in input_lower for word in ['good', 'great', 'awesome', 'amazing', 'excellent']):
+        if 'positive' in intents:
             return "I'm glad to hear that! How else can I assist you today?"
         
-        if any(word in input_lower for word in ['bad', 'terrible', 'awful', 'horrible']):
+        if 'negative' in intents:
             return "I'm sorry to hear that. Is there anything I can help you with to make things better?"
         
+        # Nothing matched: let the classifier guess which command was meant before giving up
+        reply = self.classified_response(user_input, intent)
+        if reply:
+            return reply
+        
         # Default response
         return random.choice(self.responses["unknown"])
 
-    def add_to_history(self, user_input, response):
+    def classify_messages(self, messages):
+        """Classifier guesses for the messages no command claims, scored in one pass: {index: (intent, score)}"""
+        if self.intent_classifier is None:
+            return {}
+        indexes = [index for index, message in enumerate(messages)
+                   if isinstance(message, str) and message.strip() and COMMANDS.resolve(message)[0] is None]
+        if not indexes:
+            return {}
+        return dict(zip(indexes, self.intent_classifier.classify_batch([messages[i] for i in indexes])))
+
+    def classified_response(self, user_input, intent=None):
+        """Answer with the command the intent classifier picks, or None if it isn't sure.
+
+        intent is a (label, score) pair from classify_messages, saving a second pass over the message.
+        """
+        if self.intent_classifier is None:
+            return None
+        label, _ = intent or self.intent_classifier.classify(user_input)
+        command = COMMANDS.commands.get(label)
+        if command is None:
+            return None
+        # Only quick commands that need no argument and leave history alone run on a guess
+        if command.args == 'required' or command.session or command.cost != COST_QUICK:
+            return f"It sounds like you want '{command.name}'. Try: {command.usage}"
+        positional, _ = command.arguments('', DEFAULT_SESSION)
+        started = time.perf_counter()
+        try:
+            return command.handler(self, *positional)
+        finally:
+            self.record_timing(command.name, started)
+
+    def get_history_page(self, session_id, limit=HISTORY_PAGE_SIZE, cursor=None, since=None, encoded=False):
+        """Return a page of history (or the delta since a cursor) ready to serialize.
+
+        encoded=True leaves the entries as JSON bytes; serialize with dumps_with_encoded(page, 'history').
+        """
+        if limit < 1 or (cursor is not None and cursor < 0) or (since is not None and since < 0):
+            raise ValueError('limit, cursor and since must be non-negative integers')
+        limit = min(limit, HISTORY_MAX_PAGE_SIZE)
+
+        if since is not None:
+            result = self.history.since(session_id, since, limit, encoded)
+        else:
+            result = self.history.page(session_id, cursor, limit, encoded)
+        result['count'] = len(result['history'])
+        result['status'] = 'success'
+        return result
+
+    def history_etag(self, session_id):
+        """An ETag for a session's history pages, from its version rather than the page itself"""
+        # The timestamp tells a session apart from one evicted and restarted at the same ids
+        version = repr((session_id, self.history.version(session_id))).encode('utf-8')
+        return f'"{ETAG_PREFIX}-history-{hashlib.blake2s(version, digest_size=8).hexdigest()}"'
+
+    def get_stats(self):
+        """Return cache, coalescing, breaker and history statistics"""
+        return {
+            'wiki_cache': self.wiki_cache.stats(),
+            'wiki_coalescing': self.wiki_flight.stats(),
+            'wiki_breaker': self.wiki_breaker.stats(),
+            'wiki_languages': self.wiki_clients.languages(),
+            'history': self.history.stats(),
+            'commands': self.command_timings.stats(),
+            'calculator_cache': self.calculator.stats(),
+            'cpu_pool': self.cpu_pool.stats(),
+            'status': 'success'
+        }
+
+    def add_to_history(self, user_input, response, session_id=DEFAULT_SESSION):
         """Add conversation to history"""
-        self.conversation_history.append({
+        return self.history.append(session_id, {
             'timestamp': datetime.datetime.now().isoformat(),
             'user': user_input,
             'response': response
@@ -528,7 +1641,7 @@ WEB_INTERFACE = '''
         </div>
 
         <div class="typing-indicator" id="typingIndicator">
-            <span class="typing-dots">🤖 Jarvis is thinking</span>
+            <span class="typing-dots" id="typingStatus">🤖 Jarvis is thinking</span>
         </div>
 
         <div class="input-area">
@@ -553,22 +1666,13 @@ WEB_INTERFACE = '''
             showTyping();
 
             try {
-                const response = await fetch('/api/chat', {
-                    method: 'POST',
-                    headers: { 
-                        'Content-Type': 'application/json',
-                        'Accept': 'application/json'
-                    },
-                    body: JSON.stringify({ message: message })
-                });
-
-                if (!response.ok) {
-                    throw new Error(`HTTP error! status: ${response.status}`);
+                if (channel.socket) {
+                    const render = replyRenderer();
+                    render.done(await sendOverChannel(message, render));
+                } else if (!await streamMessage(message)) {
+                    // Stream the reply when the server supports it, otherwise wait for the whole answer
+                    await postMessage(message);
                 }
-
-                const data = await response.json();
-                hideTyping();
-                addMessage(data.response, false);
             } catch (error) {
                 console.error('Error:', error);
                 hideTyping();
@@ -576,6 +1680,150 @@ WEB_INTERFACE = '''
             }
         }
 
+        // One WebSocket carries every message while it is open; HTTP is the fallback
+        const channel = { socket: null, pending: new Map(), nextId: 1, retryDelay: 1000, connected: false };
+
+        function connectChannel() {
+            if (!('WebSocket' in window)) return;
+            const scheme = location.protocol === 'https:' ? 'wss' : 'ws';
+            const socket = new WebSocket(`${scheme}://${location.host}/api/ws`);
+
+            socket.onopen = () => {
+                channel.connected = true;
+                channel.socket = socket;
+                channel.retryDelay = 1000;
+            };
+            socket.onmessage = (event) => {
+                const frame = JSON.parse(event.data);
+                const request = channel.pending.get(frame.id);
+                if (!request) return;
+                if (frame.type === 'stage') return request.render.stage(frame);
+                if (frame.type === 'chunk') return request.render.chunk(frame);
+                if (frame.type === 'ack') return;
+                channel.pending.delete(frame.id);
+                if (frame.status === 'success') request.resolve(frame.response);
+                else request.reject(new Error(frame.error));
+            };
+            socket.onclose = () => {
+                channel.socket = null;
+                for (const request of channel.pending.values()) {
+                    request.reject(new Error('Connection closed'));
+                }
+                channel.pending.clear();
+                if (!channel.connected) return;  // No WebSocket support on this server: stay on HTTP
+                setTimeout(connectChannel, channel.retryDelay);
+                channel.retryDelay = Math.min(channel.retryDelay * 2, 30000);
+            };
+        }
+
+        function sendOverChannel(message, render) {
+            return new Promise((resolve, reject) => {
+                const id = String(channel.nextId++);
+                channel.pending.set(id, { resolve, reject, render });
+                // stream: the reply arrives as the same stage and chunk events /api/chat/stream sends
+                channel.socket.send(JSON.stringify({ id: id, message: message, stream: true }));
+            });
+        }
+
+        async function postMessage(message) {
+            const response = await fetch('/api/chat', {
+                method: 'POST',
+                headers: { 
+                    'Content-Type': 'application/json',
+                    'Accept': 'application/json'
+                },
+                body: JSON.stringify({ message: message })
+            });
+
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+
+            const data = await response.json();
+            hideTyping();
+            addMessage(data.response, false);
+        }
+
+        async function streamMessage(message) {
+            const response = await fetch('/api/chat/stream', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'Accept': 'text/event-stream'
+                },
+                body: JSON.stringify({ message: message })
+            });
+            if (response.status === 404 || response.status === 405 || !response.body) {
+                return false;  // No streaming endpoint: fall back to /api/chat
+            }
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            const render = replyRenderer();
+            let buffer = '';
+
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                let boundary;
+                while ((boundary = buffer.indexOf('\\n\\n')) !== -1) {
+                    const event = parseEvent(buffer.slice(0, boundary));
+                    buffer = buffer.slice(boundary + 2);
+
+                    if (event.type === 'stage') {
+                        render.stage(event.data);
+                    } else if (event.type === 'chunk') {
+                        render.chunk(event.data);
+                    } else if (event.type === 'done') {
+                        render.done(event.data.response);
+                        return true;
+                    } else if (event.type === 'error') {
+                        throw new Error(event.data.error);
+                    }
+                }
+            }
+            hideTyping();
+            return true;
+        }
+
+        // Shows one reply as its stage and chunk events arrive, from the stream endpoint or the WebSocket
+        function replyRenderer() {
+            let messageDiv = null;
+            let text = '';
+            return {
+                stage(data) {
+                    showTyping(`🤖 ${data.message}`);
+                },
+                chunk(data) {
+                    if (!messageDiv) {
+                        hideTyping();
+                        messageDiv = addMessage('', false);
+                    }
+                    text += data.text;
+                    messageDiv.textContent = `🤖 ${text}`;
+                    scrollChat();
+                },
+                done(response) {
+                    hideTyping();
+                    if (!messageDiv) addMessage(response, false);
+                },
+            };
+        }
+
+        function parseEvent(block) {
+            const event = { type: 'message', data: null };
+            for (const line of block.split('\\n')) {
+                if (line.startsWith('event: ')) event.type = line.slice(7);
+                else if (line.startsWith('data: ')) event.data = JSON.parse(line.slice(6));
+            }
+            return event;
+        }
+
         function sendCommand(command) {
             document.getElementById('messageInput').value = command;
             sendMessage();
@@ -587,10 +1835,17 @@ WEB_INTERFACE = '''
             messageDiv.className = `message ${isUser ? 'user-msg' : 'jarvis-msg'}`;
             messageDiv.textContent = isUser ? text : `🤖 ${text}`;
             chatArea.appendChild(messageDiv);
+            scrollChat();
+            return messageDiv;
+        }
+
+        function scrollChat() {
+            const chatArea = document.getElementById('chatArea');
             chatArea.scrollTop = chatArea.scrollHeight;
         }
 
-        function showTyping() {
+        function showTyping(status = '🤖 Jarvis is thinking') {
+            document.getElementById('typingStatus').textContent = status;
             document.getElementById('typingIndicator').style.display = 'block';
         }
 
@@ -608,19 +1863,167 @@ WEB_INTERFACE = '''
         window.onload = () => {
             document.getElementById('messageInput').focus();
             hideTyping();
+            connectChannel();
         };
     </script>
 </body>
 </html>
 '''
 
+# The page has no template logic, so it is encoded and compressed once instead of rendered per request
+WEB_ASSET = StaticAsset(WEB_INTERFACE.encode('utf-8'), 'text/html; charset=utf-8')
+
+# Sessions
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+def get_session_id():
+    """Resolve the caller's session from the header or cookie, minting one if needed"""
+    if 'session_id' not in g:
+        session_id = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+        if not session_id or not SESSION_ID_PATTERN.match(session_id):
+            session_id = secrets.token_urlsafe(16)
+            g.new_session = True
+        g.session_id = session_id
+    return g.session_id
+
+@routes.after_request
+def set_session_cookie(response):
+    """Hand newly minted session ids back to the client"""
+    if g.get('new_session'):
+        response.set_cookie(SESSION_COOKIE, g.session_id, max_age=HISTORY_SESSION_TTL,
+                            httponly=True, samesite='Lax')
+    return response
+
+@routes.after_request
+def compress_api_response(response):
+    """Gzip /api/* JSON bodies big enough to be worth it, for clients that accept gzip"""
+    if not request.path.startswith('/api/') or response.status_code not in (200, 304) \
+            or 'Content-Encoding' in response.headers:
+        return response
+    if response.status_code == 304 or response.mimetype == 'application/json':
+        response.vary.add('Accept-Encoding')  # A 304 repeats the Vary of the response it stands for
+    if response.status_code != 200 or response.mimetype != 'application/json':
+        return response
+    body, encoding = gzip_if_worthwhile(response.get_data(), request.headers.get('Accept-Encoding'))
+    if encoding:
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        if 'ETag' in response.headers:
+            response.headers['ETag'] = encoded_etag(response.headers['ETag'], encoding)
+    return response
+
+def tagged_json(etag, build):
+    """jsonify(build()) tagged with etag, or a bodiless 304 if the client already has that version.
+
+    build() may also return a ready Response.
+    """
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        response = Response(status=304)
+    else:
+        response = build()
+        if not isinstance(response, Response):
+            response = jsonify(response)
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = 'no-cache'  # Keep it, but ask each time
+    return response
+
+class ChatChannel:
+    """One WebSocket connection carrying many chat messages, matched to replies by id.
+
+    A message frame with "stream": true is answered like /api/chat/stream:
+    'ack', 'stage' and 'chunk' frames, then a 'done' frame holding the reply.
+    Without it, the reply is one frame.
+    """
+
+    def __init__(self, ws, session_id):
+        self.ws = ws
+        self.session_id = session_id
+        self.send_lock = threading.Lock()  # Replies finish on worker threads
+        self.slots = threading.BoundedSemaphore(WS_MAX_IN_FLIGHT)
+
+    def send(self, frame):
+        try:
+            with self.send_lock:
+                self.ws.send(dumps(frame).decode('utf-8'))
+        except Exception:
+            pass  # The client went away; the reader loop notices on its next receive
+
+    def serve(self):
+        self.send({'type': 'ready', 'max_in_flight': WS_MAX_IN_FLIGHT})
+        while True:
+            raw = self.ws.receive()
+            if raw is None:
+                continue
+            if len(raw) > WS_MAX_MESSAGE_BYTES:
+                self.send({'id': None, 'error': 'Message too large', 'status': 'error'})
+                continue
+            try:
+                frame = loads(raw)
+            except (TypeError, ValueError):
+                self.send({'id': None, 'error': 'Frames must be JSON', 'status': 'error'})
+                continue
+            if not isinstance(frame, dict):
+                self.send({'id': None, 'error': 'Frames must be JSON objects', 'status': 'error'})
+                continue
+            if frame.get('type') == 'ping':
+                self.send({'type': 'pong', 'id': frame.get('id')})
+                continue
+
+            message_id = frame.get('id')
+            user_message = frame.get('message')
+            if not isinstance(user_message, str) or not user_message.strip():
+                self.send({'id': message_id, 'error': 'Message cannot be empty', 'status': 'error'})
+                continue
+
+            # Backpressure: with every slot busy, stop reading until a reply goes out
+            self.slots.acquire()
+            stream = frame.get('stream') is True
+            if jarvis_api.is_slow(user_message):
+                jarvis_api.batch_executor.submit(self.reply, message_id, user_message, stream)
+            else:
+                self.reply(message_id, user_message, stream)
+
+    def reply(self, message_id, user_message, stream=False):
+        try:
+            if stream:
+                for event, payload in jarvis_api.stream_message(user_message, self.session_id):
+                    frame = {'id': message_id, 'type': event, **payload}
+                    if event == 'done':
+                        frame['status'] = 'success'
+                    self.send(frame)
+                return
+            response = jarvis_api.process_message(user_message, self.session_id)
+            jarvis_api.add_to_history(user_message, response, self.session_id)
+            self.send({
+                'id': message_id,
+                'response': response,
+                'timestamp': datetime.datetime.now().isoformat(),
+                'status': 'success'
+            })
+        except Exception as e:
+            print(f"Error in WebSocket channel: {e}")
+            self.send({'id': message_id, 'error': 'Internal server error', 'message': str(e), 'status': 'error'})
+        finally:
+            self.slots.release()
+
 # Routes
-@app.route('/')
+@routes.route('/')
 def index():
-    """Serve the web interface"""
-    return render_template_string(WEB_INTERFACE)
+    """Serve the web interface: precompressed, and a 304 when the browser's copy is current"""
+    get_session_id()  # Set the session cookie before the page opens its WebSocket
+    status, body, headers = WEB_ASSET.respond(request.headers.get('Accept-Encoding'),
+                                              request.headers.get('If-None-Match'))
+    return Response(body, status=status, headers=headers, content_type=WEB_ASSET.content_type)
+
+if WEBSOCKETS_AVAILABLE:
+    sock = Sock()
 
-@app.route('/api/chat', methods=['POST'])
+    @sock.route('/api/ws', bp=routes)
+    def chat_socket(ws):
+        """Chat over one persistent WebSocket; /api/chat stays as the fallback"""
+        ChatChannel(ws, get_session_id()).serve()
+
+@routes.route('/api/chat', methods=['POST'])
 def chat():
     """Chat API endpoint"""
     try:
@@ -632,8 +2035,9 @@ def chat():
         if not user_message.strip():
             return jsonify({'error': 'Message cannot be empty'}), 400
             
-        response = jarvis_api.process_message(user_message)
-        jarvis_api.add_to_history(user_message, response)
+        session_id = get_session_id()
+        response = jarvis_api.process_message(user_message, session_id)
+        jarvis_api.add_to_history(user_message, response, session_id)
         
         return jsonify({
             'response': response,
@@ -645,83 +2049,171 @@ def chat():
         print(f"Error in chat endpoint: {e}")
         return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
 
-@app.route('/api/history', methods=['GET'])
+@routes.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Chat API endpoint streaming the reply as Server-Sent Events"""
+    # POST only: a chat is recorded in history, so a prefetched or retried GET must not send one
+    data = request.get_json(silent=True) or {}
+    user_message = data.get('message')
+    if not isinstance(user_message, str) or not user_message.strip():
+        return jsonify({'error': 'Message is required'}), 400
+
+    session_id = get_session_id()
+
+    def events():
+        try:
+            for event, payload in jarvis_api.stream_message(user_message, session_id):
+                yield f"event: {event}\ndata: {dumps(payload).decode('utf-8')}\n\n"
+        except Exception as e:
+            print(f"Error in stream endpoint: {e}")
+            yield f"event: error\ndata: {dumps({'error': str(e)}).decode('utf-8')}\n\n"
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@routes.route('/api/chat/batch', methods=['POST'])
+def chat_batch():
+    """Process many messages in one request"""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or 'messages' not in data:
+            return jsonify({'error': 'messages is required'}), 400
+        result = jarvis_api.process_batch(data['messages'], get_session_id())
+        result['timestamp'] = datetime.datetime.now().isoformat()
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error in batch endpoint: {e}")
+        return jsonify({'error': 'Internal server error', 'message': str(e)}), 500
+
+@routes.route('/api/history', methods=['GET'])
 def get_history():
-    """Get conversation history"""
+    """Get conversation history, a page at a time or as a delta since a cursor"""
     try:
-        return jsonify({
-            'history': jarvis_api.conversation_history,
-            'count': len(jarvis_api.conversation_history),
-            'status': 'success'
-        })
+        session_id = get_session_id()
+        response = tagged_json(jarvis_api.history_etag(session_id), lambda: Response(dumps_with_encoded(
+            jarvis_api.get_history_page(
+                session_id,
+                limit=request.args.get('limit', HISTORY_PAGE_SIZE, type=int),
+                cursor=request.args.get('cursor', type=int),
+                since=request.args.get('since', type=int),
+                encoded=True,
+            ), 'history'), mimetype='application/json'))
+        response.vary.update((SESSION_HEADER, 'Cookie'))
+        return response
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/clear', methods=['POST'])
+@routes.route('/api/clear', methods=['POST'])
 def clear_history():
     """Clear conversation history"""
     try:
-        jarvis_api.conversation_history.clear()
+        jarvis_api.history.clear(get_session_id())
         return jsonify({'message': 'History cleared', 'status': 'success'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/commands', methods=['GET'])
+@routes.route('/api/commands', methods=['GET'])
 def get_commands():
     """Get available commands"""
     try:
-        commands = {
-            'time': 'Get current time',
-            'date': 'Get current date',
-            'joke': 'Tell a random joke',
-            'quote': 'Get an inspirational quote',
-            'calculate': 'Perform mathematical calculations',
-            'system': 'Show system information',
-            'wiki': 'Search Wikipedia',
-            'weather': 'Get weather information',
-            'search': 'Web search suggestions',
-            'help': 'Show available commands'
-        }
-        return jsonify({
-            'commands': commands,
+        # Commands are all registered at import, so one tag per server start covers them
+        return tagged_json(f'"{ETAG_PREFIX}-commands"', lambda: {
+            'commands': COMMANDS.descriptions(),
+            'details': [command.describe() for command in COMMANDS.listed()],
             'status': 'success'
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/health', methods=['GET'])
+@routes.route('/api/stats', methods=['GET'])
+def get_stats():
+    """Cache and history statistics"""
+    try:
+        return jsonify(jarvis_api.get_stats())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@routes.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
+    # Weak: a cached copy differs in its timestamp, but still says the same server is healthy
+    return tagged_json(f'W/"{ETAG_PREFIX}-health"', lambda: {
         'status': 'healthy',
         'timestamp': datetime.datetime.now().isoformat(),
         'service': 'JarvisAI Flask Server'
     })
 
 # Error handlers
-@app.errorhandler(404)
+@routes.app_errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Endpoint not found'}), 404
 
-@app.errorhandler(500)
+@routes.app_errorhandler(500)
 def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
+def create_app():
+    """Application factory: a Flask app serving the shared jarvis_api"""
+    flask_app = Flask(__name__)
+    flask_app.json = FastJSONProvider(flask_app)  # orjson when installed; see json_codec
+    CORS(flask_app)  # Enable CORS for all routes
+    flask_app.register_blueprint(routes)
+    return flask_app
+
+app = create_app()
+
+def run_production():
+    """Serve with gunicorn: several worker processes, each with a few threads"""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("❌ Production mode needs gunicorn. Install with: pip install gunicorn")
+        sys.exit(1)
+
+    class JarvisServer(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f"{SERVER_HOST}:{SERVER_PORT}")
+            self.cfg.set('workers', SERVER_WORKERS)
+            self.cfg.set('threads', SERVER_THREADS)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('preload_app', True)  # Build jarvis_api once and fork it into every worker
+            # Process pools don't survive a fork, so each worker starts its own after forking
+            self.cfg.set('post_fork', lambda server, worker: jarvis_api.warm())
+
+        def load(self):
+            return app
+
+    JarvisServer().run()
+
 if __name__ == '__main__':
     print("🤖 " + "="*60)
-    print("🤖 Starting JarvisAI Flask Server...")
+    print(f"🤖 Starting JarvisAI {'Production' if PRODUCTION else 'Flask'} Server...")
     print("🤖 " + "="*60)
-    print("🌐 Web Interface: http://localhost:5000")
-    print("📡 API Endpoint: http://localhost:5000/api/chat")
-    print("📚 Commands List: http://localhost:5000/api/commands")
-    print("❤️  Health Check: http://localhost:5000/api/health")
+    print(f"🌐 Web Interface: http://localhost:{SERVER_PORT}")
+    print(f"📡 API Endpoint: http://localhost:{SERVER_PORT}/api/chat")
+    print(f"📚 Commands List: http://localhost:{SERVER_PORT}/api/commands")
+    print(f"❤️  Health Check: http://localhost:{SERVER_PORT}/api/health")
+    if PRODUCTION:
+        print(f"⚙️  {SERVER_WORKERS} workers x {SERVER_THREADS} threads, history backend: {HISTORY_BACKEND}")
     print("🛑 Press Ctrl+C to stop the server")
     print("🤖 " + "="*60)
+    if not BROTLI_AVAILABLE:
+        print("⚠️  Brotli compression not available. Install with: pip install brotli")
+    if not ORJSON_AVAILABLE:
+        print("⚠️  Fast JSON encoding not available. Install with: pip install orjson")
     
-    # Run the Flask app
-    app.run(
-        host='0.0.0.0',  # Listen on all interfaces
-        port=5000,       # Port 5000
-        debug=True,      # Enable debug mode
-        threaded=True    # Handle multiple requests
-    )
\ No newline at end of file
+    if PRODUCTION:
+        run_production()
+    else:
+        jarvis_api.warm()
+        # Run the Flask development server
+        app.run(
+            host=SERVER_HOST,
+            port=SERVER_PORT,
+            debug=SERVER_DEBUG,  # JARVIS_DEBUG=true enables the reloader and debugger
+            threaded=True        # Handle multiple requests
+        )
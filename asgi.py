@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+JarvisAI ASGI Server - async serving mode for many concurrent chats
+Run with: uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+Serves the same routes as app.py, but each request is a coroutine instead of
+a thread: Wikipedia lookups are awaited (and coalesced), worker-pool jobs for
+big calculations and system probes are awaited too, and quick commands like
+time and joke are answered inline on the event loop.
+"""
+
+import asyncio
+import datetime
+import json
+import secrets
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+from app import (
+    COMMANDS, ETAG_PREFIX, HISTORY_PAGE_SIZE, HISTORY_SESSION_TTL, SESSION_COOKIE,
+    SESSION_HEADER, SESSION_ID_PATTERN, WEB_ASSET, jarvis_api,
+)
+from http_cache import BROTLI_AVAILABLE, encoded_etag, etag_matches, gzip_if_worthwhile
+from json_codec import ORJSON_AVAILABLE, dumps, dumps_with_encoded, loads
+
+MAX_BODY_BYTES = 1024 * 1024
+
+class PayloadTooLarge(Exception):
+    """Raised when a request body exceeds MAX_BODY_BYTES"""
+
+class Request:
+    """The parts of an ASGI HTTP scope the handlers need"""
+
+    def __init__(self, scope, receive):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.query = {key: values[-1] for key, values in parse_qs(scope['query_string'].decode('latin-1')).items()}
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        self._receive = receive
+        self.new_session = False
+        self._session_id = None
+
+    async def body(self):
+        chunks, size = [], 0
+        while True:
+            message = await self._receive()
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                raise PayloadTooLarge('Request body too large')
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    async def json(self):
+        try:
+            return loads(await self.body() or b'null')
+        except json.JSONDecodeError:  # orjson's error subclasses it
+            return None
+
+    def query_int(self, name, default=None):
+        try:
+            return int(self.query[name])
+        except (KeyError, ValueError):
+            return default
+
+    @property
+    def session_id(self):
+        """Resolve the caller's session like app.get_session_id() does"""
+        if self._session_id is None:
+            cookies = SimpleCookie(self.headers.get('cookie', ''))
+            session_id = self.headers.get(SESSION_HEADER.lower())
+            if not session_id and SESSION_COOKIE in cookies:
+                session_id = cookies[SESSION_COOKIE].value
+            if not session_id or not SESSION_ID_PATTERN.match(session_id):
+                session_id = secrets.token_urlsafe(16)
+                self.new_session = True
+            self._session_id = session_id
+        return self._session_id
+
+async def send_response(send, request, status, body, content_type='application/json', extra_headers=None):
+    extra_headers = dict(extra_headers or {})
+    api_json = request is not None and request.path.startswith('/api/') and content_type == 'application/json'
+    if api_json and status in (200, 304):
+        # Same policy as app.compress_api_response
+        extra_headers['Vary'] = ', '.join(filter(None, (extra_headers.get('Vary'), 'Accept-Encoding')))
+    if status == 304:
+        body = b''
+    elif content_type == 'application/json':
+        if not isinstance(body, bytes):  # Bytes are already encoded, like history pages
+            body = dumps(body)
+        if api_json and status == 200:
+            body, encoding = gzip_if_worthwhile(body, request.headers.get('accept-encoding'))
+            if encoding:
+                extra_headers['Content-Encoding'] = encoding
+                if 'ETag' in extra_headers:
+                    extra_headers['ETag'] = encoded_etag(extra_headers['ETag'], encoding)
+    elif isinstance(body, str):
+        body = body.encode('utf-8')
+    headers = [
+        (b'content-type', content_type.encode('latin-1')),
+        (b'content-length', str(len(body)).encode('latin-1')),
+        (b'access-control-allow-origin', b'*'),
+    ] if status != 304 else [(b'access-control-allow-origin', b'*')]
+    for name, value in extra_headers.items():
+        headers.append((name.lower().encode('latin-1'), value.encode('latin-1')))
+    if request is not None and request.new_session:
+        cookie = f"{SESSION_COOKIE}={request.session_id}; Max-Age={HISTORY_SESSION_TTL}; Path=/; HttpOnly; SameSite=Lax"
+        headers.append((b'set-cookie', cookie.encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+def tagged_json(request, etag, build, vary=None):
+    """A route result for build() tagged with etag, or a 304 if the client already has that version"""
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if vary:
+        headers['Vary'] = vary
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return 304, None, 'application/json', headers
+    return 200, build(), 'application/json', headers
+
+# Routes
+async def index(request):
+    request.session_id  # Set the session cookie before the page makes its first API call, as app.index does
+    status, body, headers = WEB_ASSET.respond(request.headers.get('accept-encoding'),
+                                              request.headers.get('if-none-match'))
+    return status, body, WEB_ASSET.content_type, headers
+
+async def chat(request):
+    data = await request.json()
+    if not isinstance(data, dict) or 'message' not in data:
+        return 400, {'error': 'Message is required'}
+    user_message = data['message']
+    if not isinstance(user_message, str) or not user_message.strip():
+        return 400, {'error': 'Message cannot be empty'}
+
+    session_id = request.session_id
+    response = await jarvis_api.process_message_async(user_message, session_id)
+    # With the SQLite store this is a write and an fsync: keep it off the event loop
+    await asyncio.to_thread(jarvis_api.add_to_history, user_message, response, session_id)
+    return 200, {
+        'response': response,
+        'timestamp': datetime.datetime.now().isoformat(),
+        'status': 'success'
+    }
+
+async def chat_batch(request):
+    data = await request.json()
+    if not isinstance(data, dict) or 'messages' not in data:
+        return 400, {'error': 'messages is required'}
+    try:
+        result = await jarvis_api.process_batch_async(data['messages'], request.session_id)
+    except ValueError as e:
+        return 400, {'error': str(e)}
+    result['timestamp'] = datetime.datetime.now().isoformat()
+    return 200, result
+
+async def get_history(request):
+    session_id = request.session_id
+
+    def respond():
+        return tagged_json(request, jarvis_api.history_etag(session_id), lambda: dumps_with_encoded(
+            jarvis_api.get_history_page(
+                session_id,
+                limit=request.query_int('limit', HISTORY_PAGE_SIZE),
+                cursor=request.query_int('cursor'),
+                since=request.query_int('since'),
+                encoded=True,
+            ), 'history'), vary=f'{SESSION_HEADER}, Cookie')
+
+    try:
+        # The version check and the page both read the history store, which may be SQLite
+        return await asyncio.to_thread(respond)
+    except ValueError as e:
+        return 400, {'error': str(e)}
+
+async def clear_history(request):
+    await asyncio.to_thread(jarvis_api.history.clear, request.session_id)
+    return 200, {'message': 'History cleared', 'status': 'success'}
+
+async def get_commands(request):
+    return tagged_json(request, f'"{ETAG_PREFIX}-commands"', lambda: {
+        'commands': COMMANDS.descriptions(),
+        'details': [command.describe() for command in COMMANDS.listed()],
+        'status': 'success'
+    })
+
+async def get_stats(request):
+    return 200, await asyncio.to_thread(jarvis_api.get_stats)  # History stats may query SQLite
+
+async def health_check(request):
+    return tagged_json(request, f'W/"{ETAG_PREFIX}-health"', lambda: {
+        'status': 'healthy',
+        'timestamp': datetime.datetime.now().isoformat(),
+        'service': 'JarvisAI ASGI Server'
+    })
+
+ROUTES = {
+    ('GET', '/'): index,
+    ('POST', '/api/chat'): chat,
+    ('POST', '/api/chat/batch'): chat_batch,
+    ('GET', '/api/history'): get_history,
+    ('POST', '/api/clear'): clear_history,
+    ('GET', '/api/commands'): get_commands,
+    ('GET', '/api/stats'): get_stats,
+    ('GET', '/api/health'): health_check,
+}
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if not BROTLI_AVAILABLE:
+                    print("⚠️  Brotli compression not available. Install with: pip install brotli")
+                if not ORJSON_AVAILABLE:
+                    print("⚠️  Fast JSON encoding not available. Install with: pip install orjson")
+                jarvis_api.warm()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                jarvis_api.wiki_executor.shutdown(wait=False)
+                jarvis_api.batch_executor.shutdown(wait=False)
+                jarvis_api.cpu_pool.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+
+    request = Request(scope, receive)
+    if request.method == 'OPTIONS':
+        # CORS preflight, matching flask_cors's allow-all defaults
+        await send({'type': 'http.response.start', 'status': 204, 'headers': [
+            (b'access-control-allow-origin', b'*'),
+            (b'access-control-allow-methods', b'GET, POST, OPTIONS'),
+            (b'access-control-allow-headers', request.headers.get('access-control-request-headers', '*').encode('latin-1')),
+        ]})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    handler = ROUTES.get((request.method, request.path))
+    if handler is None:
+        await send_response(send, None, 404, {'error': 'Endpoint not found'})
+        return
+    try:
+        status, body, *extra = await handler(request)
+    except PayloadTooLarge as e:
+        status, body, extra = 413, {'error': str(e)}, []
+    except Exception as e:
+        print(f"Error in {request.path}: {e}")
+        status, body, extra = 500, {'error': 'Internal server error', 'message': str(e)}, []
+    await send_response(send, request, status, body, *extra)
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ The async server needs uvicorn. Install with: pip install uvicorn")
+        raise SystemExit(1)
+    uvicorn.run('asgi:app', host='0.0.0.0', port=5000)
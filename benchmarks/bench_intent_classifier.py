@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark the intent classifier's load time and per-message latency
+Run with:
+    python benchmarks/bench_intent_classifier.py
+
+Exits with status 1 if single-message p99 latency is 1 ms or more.
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from intent_classifier import IntentClassifier, load_examples
+
+P99_BUDGET_MS = 1.0
+
+FILLERS = ['', 'please ', 'hey jarvis, ', 'could you ', 'um ', 'quickly ']
+UNSEEN = [
+    "who invented the telephone",
+    "my cat knocked over a plant",
+    "I wonder whether penguins have knees",
+    "reorganize my bookshelf by colour",
+    "the quick brown fox jumps over the lazy dog",
+]
+
+def sample_messages(examples, count, seed=0):
+    """Training examples with filler prefixes, plus off-topic chatter"""
+    rng = random.Random(seed)
+    pool = [text for texts in examples.values() for text in texts] + UNSEEN
+    return [rng.choice(FILLERS) + rng.choice(pool) for _ in range(count)]
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Intent classifier latency benchmark")
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=64)
+    args = parser.parse_args()
+
+    examples = load_examples()
+    messages = sample_messages(examples, args.messages)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = Path(tmp) / 'intent_model.npz'
+        started = time.perf_counter()
+        IntentClassifier.train(examples).save(model_path)
+        train_ms = (time.perf_counter() - started) * 1000
+
+        loads = []
+        for _ in range(20):
+            started = time.perf_counter()
+            model = IntentClassifier.load(model_path)
+            loads.append((time.perf_counter() - started) * 1000)
+
+    for message in messages[:200]:  # Warm up
+        model.classify(message)
+
+    latencies = []
+    for message in messages:
+        started = time.perf_counter()
+        model.classify(message)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    for i in range(0, len(messages), args.batch_size):
+        model.classify_batch(messages[i:i + args.batch_size])
+    batch_us = (time.perf_counter() - started) * 1e6 / len(messages)
+
+    p99 = percentile(latencies, 0.99)
+    print(f"🧠 {len(model.labels)} intents, {sum(map(len, examples.values()))} examples")
+    print(f"🏗️  train + save: {train_ms:.1f} ms")
+    print(f"📂 load: median {statistics.median(loads):.2f} ms")
+    print(f"⏱️  classify x{len(messages)}: p50 {percentile(latencies, 0.5) * 1000:.1f} us, "
+          f"p95 {percentile(latencies, 0.95) * 1000:.1f} us, p99 {p99 * 1000:.1f} us, "
+          f"max {max(latencies) * 1000:.1f} us")
+    print(f"📦 classify_batch (size {args.batch_size}): {batch_us:.1f} us per message")
+
+    if p99 >= P99_BUDGET_MS:
+        print(f"❌ p99 {p99:.3f} ms exceeds the {P99_BUDGET_MS:g} ms budget")
+        return 1
+    print(f"✅ p99 within the {P99_BUDGET_MS:g} ms budget")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON encoding of history pages: the standard library against
+orjson, and per-request dict encoding against splicing pre-encoded entries
+Run with:
+    python benchmarks/bench_json.py
+"""
+
+import argparse
+import datetime
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import json_codec
+from json_codec import ORJSON_AVAILABLE, dumps_with_encoded, stdlib_dumps
+
+WORDS = ['jarvis', 'weather', 'calculate', 'wikipedia', 'système', 'naïve', 'über', 'joke',
+         'quote', 'history', '"quoted"', 'line\nbreak', 'tab\there', '🚀', 'emoji ✅']
+
+def sample_entries(count, seed=0):
+    """History entries shaped like JarvisAPI.add_to_history's, with some non-ASCII and escapes"""
+    rng = random.Random(seed)
+    now = datetime.datetime(2025, 1, 1)
+    return [{
+        'timestamp': (now + datetime.timedelta(seconds=i)).isoformat(),
+        'user': ' '.join(rng.choices(WORDS, k=rng.randint(2, 12))),
+        'response': ' '.join(rng.choices(WORDS, k=rng.randint(10, 120))),
+        'id': i,
+    } for i in range(count)]
+
+def page(history):
+    return {'history': history, 'next_cursor': None, 'latest_cursor': len(history), 'count': len(history),
+            'status': 'success'}
+
+def time_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="History page JSON encoding benchmark")
+    parser.add_argument('--entries', type=int, nargs='+', default=[500, 5000, 50000])
+    parser.add_argument('--repeat', type=int, default=15)
+    args = parser.parse_args()
+
+    encoders = [('stdlib', stdlib_dumps)]
+    if ORJSON_AVAILABLE:
+        encoders.append(('orjson', json_codec.orjson.dumps))
+    else:
+        print("⚠️  orjson not installed: only the standard library is measured")
+
+    for count in args.entries:
+        entries = sample_entries(count)
+        print(f"📜 {count} entries")
+        for name, encode in encoders:
+            encoded = [encode(entry) for entry in entries]
+            body = dumps_with_encoded(page(encoded), 'history')
+            assert json.loads(body) == json.loads(stdlib_dumps(page(entries)))
+
+            # What the routes did before: copy each stored entry, then encode the page
+            copied = time_ms(lambda: encode(page([dict(entry) for entry in entries])), args.repeat)
+            spliced = time_ms(lambda: dumps_with_encoded(page(encoded[:]), 'history'), args.repeat)
+            print(f"   {name:>6}: copy + encode {copied:8.2f} ms   pre-encoded splice {spliced:8.2f} ms   "
+                  f"({len(body) / 1024:.0f} KiB)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
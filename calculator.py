@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+JarvisAI Calculator - safe arithmetic for the `calculate` command
+
+Expressions are parsed once, checked against a whitelist of operators and
+compiled into closure chains that are cached by expression shape. Before
+anything is evaluated, a static cost estimate bounds the size of every
+integer the expression can produce: expressions like 9**9**9 are evaluated
+in floating point instead, and merely large ones are flagged so the server
+can run them in a worker process under a deadline.
+
+Range mode ("x^2 + 3*x for x in 1..100000") compiles the same whitelisted
+operators over a NumPy array, so every value is computed in one vectorized
+pass. It needs NumPy; the rest of the calculator does not.
+"""
+
+import ast
+import decimal
+import math
+import operator
+import os
+import re
+import threading
+from collections import OrderedDict, namedtuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+CALC_CACHE_SIZE = int(os.environ.get('JARVIS_CALC_CACHE_SIZE', 512))
+CALC_MAX_LENGTH = int(os.environ.get('JARVIS_CALC_MAX_LENGTH', 500))
+CALC_MAX_NODES = int(os.environ.get('JARVIS_CALC_MAX_NODES', 200))
+CALC_MAX_DEPTH = int(os.environ.get('JARVIS_CALC_MAX_DEPTH', 32))
+# Integers past this many bits are not computed exactly; the expression is redone in floats
+CALC_MAX_INT_BITS = int(os.environ.get('JARVIS_CALC_MAX_INT_BITS', 1_000_000))
+# Integers past this many bits are big enough to be worth a worker process
+CALC_INLINE_BITS = int(os.environ.get('JARVIS_CALC_INLINE_BITS', 20_000))
+# Integer results longer than this are shown in scientific notation with CALC_SIG_DIGITS digits
+CALC_MAX_DIGITS = int(os.environ.get('JARVIS_CALC_MAX_DIGITS', 100))
+CALC_SIG_DIGITS = int(os.environ.get('JARVIS_CALC_SIG_DIGITS', 15))
+# 'calculate exact ...' prints every digit, up to this many
+CALC_EXACT_MAX_DIGITS = int(os.environ.get('JARVIS_CALC_EXACT_MAX_DIGITS', 100_000))
+# Range mode: most values per request, and how many rows a result table shows before it is summarized
+CALC_RANGE_MAX_POINTS = int(os.environ.get('JARVIS_CALC_RANGE_MAX_POINTS', 1_000_000))
+CALC_RANGE_ROWS = int(os.environ.get('JARVIS_CALC_RANGE_ROWS', 10))
+# Ranges with more values than this are evaluated in a worker process
+CALC_INLINE_RANGE_POINTS = int(os.environ.get('JARVIS_CALC_INLINE_RANGE_POINTS', 200_000))
+
+LOG10_2 = math.log10(2)
+
+class UnsafeExpression(ValueError):
+    """Raised for calculator input that looks like an attempt to run code"""
+
+class ExpressionTooComplex(ValueError):
+    """Raised for expressions over the length, node or nesting limits"""
+
+class ExpressionTooExpensive(ValueError):
+    """Raised when an exact integer result would exceed CALC_MAX_INT_BITS"""
+
+    def __init__(self, bits):
+        super().__init__(bits)  # Plain args, so it survives the trip back from a worker
+        self.bits = bits
+
+    def __str__(self):
+        return f"result needs about {self.bits:.0f} bits"
+
+class ResultTooLarge(OverflowError):
+    """Raised when even the floating-point fallback overflows"""
+
+    def __init__(self, bits):
+        super().__init__(bits)
+        self.bits = bits
+
+    def __str__(self):
+        return f"result needs about {self.bits:.0f} bits"
+
+class TooManyDigits(ValueError):
+    """Raised when exact digits are requested for a result over CALC_EXACT_MAX_DIGITS"""
+
+    def __init__(self, digits):
+        super().__init__(digits)  # Plain args, so it survives the trip back from a worker
+        self.digits = digits
+
+    def __str__(self):
+        return f"the exact result has about {self.digits} digits; the limit is {CALC_EXACT_MAX_DIGITS}"
+
+class RangeTooLarge(ValueError):
+    """Raised for a range with more than CALC_RANGE_MAX_POINTS values"""
+
+class HeavyExpression(Exception):
+    """Raised by evaluate(inline_bits=...) for expressions that should run in a worker"""
+
+    def __init__(self, bits):
+        super().__init__(f"result needs about {bits:.0f} bits")
+        self.bits = bits
+
+def magnitude_bits(value):
+    """log2(|value|), or 0 for values no bigger than 1"""
+    size = abs(value)
+    return math.log2(size) if size > 1 else 0.0
+
+def add_bits(left, right):
+    return max(left, right) + 1
+
+def mul_bits(left, right):
+    return left + right
+
+def div_bits(left, right):
+    return left
+
+def pow_bits(left, right):
+    # |a ** b| <= 2 ** (log2|a| * |b|); the exponent is capped so the estimate stays a float
+    return left * 2.0 ** min(right, 1100) if left else 0.0
+
+def estimate_digits(value):
+    """Upper bound on the decimal digits of an int, from its bit length alone"""
+    return int(value.bit_length() * LOG10_2) + 1
+
+def scientific(value, digits=CALC_SIG_DIGITS):
+    """Render an int as 'd.ddd...e+N' without converting it to decimal in full.
+
+    Only the top 128 bits are kept; log10 of the rest is shift * log10(2), so
+    the cost doesn't grow with the size of the number.
+    """
+    sign = '-' if value < 0 else ''
+    value = abs(value)
+    shift = max(value.bit_length() - 128, 0)
+    with decimal.localcontext() as context:
+        context.prec = digits + len(str(shift)) + 10
+        log = (decimal.Decimal(value >> shift).ln() + shift * decimal.Decimal(2).ln()) / decimal.Decimal(10).ln()
+        exponent = int(log)
+        mantissa = (decimal.Decimal(10) ** (log - exponent)).quantize(decimal.Decimal(1).scaleb(1 - digits))
+        if mantissa >= 10:  # 9.999... rounded up
+            mantissa, exponent = mantissa / 10, exponent + 1
+    return f"{sign}{mantissa}e+{exponent}"
+
+def format_integer(value, exact=False, digits=CALC_SIG_DIGITS):
+    """Render an int result: in full if short or exact is asked for, otherwise in scientific notation"""
+    estimate = estimate_digits(value)
+    if exact:
+        if estimate > CALC_EXACT_MAX_DIGITS:
+            raise TooManyDigits(estimate)
+        # Decimal isn't bound by the int-to-str digit limit
+        return str(decimal.Decimal(value))
+    if estimate <= CALC_MAX_DIGITS:
+        return str(value)
+    text = scientific(value, digits)
+    return f"{text} ({int(text.rsplit('e+', 1)[1]) + 1} digits)"
+
+_NUMBER = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+RANGE_SYNTAX = re.compile(
+    rf'^(?P<expression>.+?)\s+for\s+(?P<variable>[A-Za-z_]\w*)\s+in\s+(?P<start>{_NUMBER})\s*\.\.\s*'
+    rf'(?P<stop>{_NUMBER})(?:\s+step\s+(?P<step>{_NUMBER}))?\s*$')
+
+RangeQuery = namedtuple('RangeQuery', 'expression variable start stop step')
+
+def parse_range(text):
+    """Return a RangeQuery for '<expression> for <name> in <start>..<stop> [step <n>]', else None"""
+    match = RANGE_SYNTAX.match(text.strip())
+    if match is None:
+        return None
+    start, stop = float(match['start']), float(match['stop'])
+    step = float(match['step']) if match['step'] else (1.0 if stop >= start else -1.0)
+    return RangeQuery(match['expression'], match['variable'], start, stop, step)
+
+def range_size(query):
+    """How many values a query's inclusive range holds, checked against CALC_RANGE_MAX_POINTS"""
+    if query.step == 0 or (query.stop - query.start) * query.step < 0:
+        raise RangeTooLarge("the step doesn't lead from start to stop")
+    count = math.floor((query.stop - query.start) / query.step + 1e-9) + 1
+    if count > CALC_RANGE_MAX_POINTS:
+        raise RangeTooLarge(f"ranges are limited to {CALC_RANGE_MAX_POINTS} values, this one has {count}")
+    return count
+
+def range_points(query):
+    """The inclusive range a query covers, as a float64 array"""
+    return query.start + query.step * np.arange(range_size(query), dtype=np.float64)
+
+def format_float(value):
+    """A float as calculate() shows it: whole numbers without '.0', others rounded to 10 places"""
+    value = float(value)
+    if value.is_integer() and abs(value) < 2 ** 53:
+        return str(int(value))
+    return str(round(value, 10))
+
+def summarize_range(query, points, values, rows=CALC_RANGE_ROWS):
+    """Render a range result: the full table when it is short, otherwise statistics and its ends"""
+    variable = query.variable
+    step = f" step {format_float(query.step)}" if abs(query.step) != 1 else ""
+    lines = [f"{query.expression} for {variable} in {format_float(query.start)}..{format_float(query.stop)}"
+             f"{step} ({len(points)} values)"]
+    finite = np.isfinite(values)
+    if len(points) > rows:
+        if finite.any():
+            kept = values[finite]
+            with np.errstate(over='ignore'):
+                lines.append(f"min {format_float(kept.min())}, max {format_float(kept.max())}, "
+                             f"mean {format_float(kept.mean())}, sum {format_float(kept.sum())}")
+        if not finite.all():
+            lines.append(f"{int((~finite).sum())} values are not finite (nan or inf)")
+        head = rows // 2
+        shown = list(range(head)) + [None] + list(range(len(points) - (rows - head), len(points)))
+    else:
+        shown = range(len(points))
+    for index in shown:
+        lines.append("  ..." if index is None else
+                     f"  {variable} = {format_float(points[index])} → {format_float(values[index])}")
+    return '\n'.join(lines)
+
+_VARIABLE = object()  # Stands in for the range variable among a range program's constants
+
+class ExpressionCompiler:
+    """Compiles validated arithmetic ASTs into closure chains, cached by expression shape.
+
+    Numbers are lifted out of the text, so "2+3" and "40+2" share the compiled
+    form of "#+#" and only the first of them is ever parsed.
+    """
+    OPERATORS = {
+        ast.Add: (operator.add, add_bits),
+        ast.Sub: (operator.sub, add_bits),
+        ast.Mult: (operator.mul, mul_bits),
+        ast.Div: (operator.truediv, div_bits),
+        ast.Pow: (operator.pow, pow_bits),
+        ast.BitXor: (operator.xor, add_bits),
+        ast.USub: (operator.neg, None),
+    }
+    DANGEROUS_PATTERNS = ('import', 'exec', 'eval', '__', 'open', 'file')
+    NUMBER = re.compile(r'(?<![\w.])(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?(?![\w.])')
+    SPACE = re.compile(r'[ \t]+')
+
+    def __init__(self, max_entries=CALC_CACHE_SIZE, max_int_bits=CALC_MAX_INT_BITS):
+        self.max_entries = max_entries
+        self.max_int_bits = max_int_bits
+        # Exact text -> (program, its numbers); shape such as '#+#' -> (program, None);
+        # ('range', variable, text) -> (closure, constants) for range mode
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.downgraded = 0
+
+    @classmethod
+    def split(cls, expression):
+        """Return (shape, numbers): the expression with its numbers replaced by '#', and those numbers"""
+        numbers = []
+
+        def lift(match):
+            token = match.group()
+            if token.isdigit():
+                if token[0] == '0' and token.strip('0'):  # Python allows 0, 00, ... but not 01
+                    raise SyntaxError("leading zeros in decimal integer literals are not permitted")
+                numbers.append(int(token))
+            else:
+                numbers.append(float(token))
+            return '#'
+
+        return cls.NUMBER.sub(lift, expression), tuple(numbers)
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+            return entry
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._cache[key] = entry
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def prepare(self, expression):
+        """Return ((closure, bound), numbers) for an expression, compiling it on a cache miss"""
+        if '#' in expression:
+            raise SyntaxError("invalid character '#'")
+        entry = self._lookup(expression)
+        if entry is not None:
+            with self._lock:
+                self.hits += 1
+            return entry
+
+        if len(expression) > CALC_MAX_LENGTH:
+            raise ExpressionTooComplex(f"expressions are limited to {CALC_MAX_LENGTH} characters")
+        # Spacing goes into the shape as single spaces, not removed: "2 * * 3" is a syntax
+        # error and mustn't become "2**3". The original text is what gets parsed
+        text = expression.strip()
+        shape, numbers = self.split(self.SPACE.sub(' ', text))
+        shaped = self._lookup(shape)
+        if shaped is not None:
+            with self._lock:
+                self.hits += 1
+            entry = (shaped[0], numbers)
+        else:
+            with self._lock:
+                self.misses += 1
+            entry = self._compile(text, shape, numbers)
+        self._store(expression, entry)
+        return entry
+
+    def evaluate(self, expression, inline_bits=None):
+        """Evaluate an arithmetic expression.
+
+        Raises UnsafeExpression or ExpressionTooComplex for disallowed input,
+        ResultTooLarge when no representation fits, and HeavyExpression when
+        the exact result would be larger than inline_bits.
+        """
+        (closure, bound), numbers = self.prepare(expression)
+        try:
+            peak = bound(numbers)[2]
+        except ExpressionTooExpensive as e:
+            # Too big to compute exactly: floats give the magnitude in constant time
+            with self._lock:
+                self.downgraded += 1
+            try:
+                return closure(tuple(float(n) if type(n) is int else n for n in numbers))
+            except OverflowError:
+                raise ResultTooLarge(e.bits) from None
+        if inline_bits is not None and peak > inline_bits:
+            raise HeavyExpression(peak)
+        return closure(numbers)
+
+    def evaluate_range(self, query):
+        """Evaluate a RangeQuery over all of its points at once, returning (points, values) arrays"""
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("range mode needs NumPy")
+        points = range_points(query)
+        expression, variable = query.expression, query.variable
+        key = ('range', variable, expression)
+        entry = self._lookup(key)
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            if len(expression) > CALC_MAX_LENGTH:
+                raise ExpressionTooComplex(f"expressions are limited to {CALC_MAX_LENGTH} characters")
+            if any(pattern in expression.lower() for pattern in self.DANGEROUS_PATTERNS):
+                raise UnsafeExpression("potentially dangerous operation")
+            constants = []
+            closure, _ = self._build(ast.parse(expression.strip(), mode='eval').body, constants, [0], 1, variable)
+            entry = (closure, tuple(constants))
+            self._store(key, entry)
+        else:
+            with self._lock:
+                self.hits += 1
+
+        closure, constants = entry
+        # Constants become floats too, so integer overflow can't wrap and huge powers raise OverflowError
+        values = tuple(points if constant is _VARIABLE else float(constant) for constant in constants)
+        with np.errstate(all='ignore'):
+            result = np.asarray(closure(values), dtype=np.float64)
+        return points, np.broadcast_to(result, points.shape)
+
+    def _compile(self, text, shape, numbers):
+        if any(pattern in text.lower() for pattern in self.DANGEROUS_PATTERNS):
+            raise UnsafeExpression("potentially dangerous operation")
+        constants = []
+        program = self._build(ast.parse(text, mode='eval').body, constants, [0], 1)
+        constants = tuple(constants)
+
+        # Share the program with every expression of this shape only if the numbers
+        # lifted from the text are exactly the constants Python parsed
+        if constants == numbers and all(type(a) is type(b) for a, b in zip(constants, numbers)):
+            self._store(shape, (program, None))
+        return program, constants
+
+    def _build(self, node, constants, count, depth, variable=None):
+        """Turn a validated node into (closure, bound), both functions of the tuple of constants.
+
+        bound(values) returns (is_int, log2 magnitude, largest integer bits so far)
+        without doing the arithmetic, and raises ExpressionTooExpensive past the limit.
+        In range mode the variable takes a constant slot that is later filled with an array.
+        """
+        count[0] += 1
+        if count[0] > CALC_MAX_NODES or depth > CALC_MAX_DEPTH:
+            raise ExpressionTooComplex("expression is too long or too deeply nested")
+        max_int_bits = self.max_int_bits
+
+        if isinstance(node, ast.Constant):
+            if type(node.value) not in (int, float, complex):
+                raise TypeError(f"Unsupported constant: {node.value!r}")
+            slot = len(constants)
+            constants.append(node.value)
+
+            def bound(values):
+                value = values[slot]
+                bits = magnitude_bits(value)
+                is_int = type(value) is int
+                return is_int, bits, bits if is_int else 0.0
+
+            return (lambda values: values[slot]), bound
+
+        if variable is not None and isinstance(node, ast.Name) and node.id == variable:
+            slot = len(constants)
+            constants.append(_VARIABLE)
+            return (lambda values: values[slot]), None
+
+        if isinstance(node, ast.BinOp):
+            op, estimate = self.OPERATORS.get(type(node.op), (None, None))
+            if estimate is None:
+                raise TypeError(f"Unsupported operation: {type(node.op).__name__}")
+            left, left_bound = self._build(node.left, constants, count, depth + 1, variable)
+            right, right_bound = self._build(node.right, constants, count, depth + 1, variable)
+            true_division = op is operator.truediv
+
+            def bound(values):
+                left_int, left_bits, left_peak = left_bound(values)
+                right_int, right_bits, right_peak = right_bound(values)
+                is_int = left_int and right_int and not true_division
+                bits = estimate(left_bits, right_bits)
+                peak = max(left_peak, right_peak, bits if is_int else 0.0)
+                if peak > max_int_bits:
+                    raise ExpressionTooExpensive(bits)
+                return is_int, bits, peak
+
+            return (lambda values: op(left(values), right(values))), bound
+
+        if isinstance(node, ast.UnaryOp):
+            op, _ = self.OPERATORS.get(type(node.op), (None, None))
+            if op is None or not isinstance(node.op, ast.USub):
+                raise TypeError(f"Unsupported operation: {type(node.op).__name__}")
+            operand, operand_bound = self._build(node.operand, constants, count, depth + 1, variable)
+            return (lambda values: op(operand(values))), operand_bound
+
+        raise TypeError(f"Unsupported operation: {type(node)}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._cache),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'downgraded_to_float': self.downgraded,
+            }
+
+_worker_compiler = None
+
+def _compiler():
+    global _worker_compiler
+    if _worker_compiler is None:
+        _worker_compiler = ExpressionCompiler()
+    return _worker_compiler
+
+def evaluate_isolated(expression, exact=False):
+    """Evaluate in a worker process, with no inline limit; the caller enforces the deadline.
+
+    Integer results come back already formatted, so the expensive decimal
+    conversion also runs under the deadline and huge ints never cross the pipe.
+    """
+    result = _compiler().evaluate(expression)
+    return format_integer(result, exact) if type(result) is int else result
+
+def evaluate_range_isolated(query):
+    """Evaluate and summarize a big range in a worker process, returning only the text"""
+    return summarize_range(query, *_compiler().evaluate_range(query))
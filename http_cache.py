@@ -0,0 +1,110 @@
+"""
+JarvisAI HTTP caching - precompressed static assets and conditional requests
+
+The web UI never changes while the server runs, so it is encoded once at
+startup: identity, gzip and (with the brotli package) br variants, each with
+its own strong ETag. A request gets the best variant its Accept-Encoding
+allows, or a bodiless 304 when If-None-Match already names that variant.
+
+JSON API responses are tagged from cheap version counters instead, and
+gzipped on the way out once they are big enough to be worth it.
+"""
+
+import gzip
+import hashlib
+import os
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False  # The server entry points say so once at start-up
+
+# Content codings the server can produce, most preferred first
+ENCODINGS = ('br', 'gzip') if BROTLI_AVAILABLE else ('gzip',)
+# Dynamic responses smaller than this go out uncompressed
+GZIP_MIN_BYTES = int(os.environ.get('JARVIS_GZIP_MIN_BYTES', 1024))
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=11)
+    return gzip.compress(body, compresslevel=9, mtime=0)
+
+def choose_encoding(accept_encoding, available=ENCODINGS):
+    """The first of available that an Accept-Encoding header allows (q > 0), or None for identity"""
+    qualities = {}
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    for encoding in available:
+        if qualities.get(encoding, qualities.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+def gzip_if_worthwhile(body, accept_encoding, min_bytes=GZIP_MIN_BYTES):
+    """Return (body, 'gzip' or None): dynamic bodies are compressed when big enough and accepted"""
+    if len(body) < min_bytes or choose_encoding(accept_encoding, ('gzip',)) is None:
+        return body, None
+    return gzip.compress(body, compresslevel=6, mtime=0), 'gzip'
+
+def encoded_etag(etag, encoding):
+    """The tag of an encoded variant: '"v1"' becomes '"v1-gzip"'"""
+    return f'{etag[:-1]}-{encoding}"'
+
+def _version(tag):
+    """A tag with its weakness and encoding suffix removed"""
+    tag = tag.strip()
+    if tag.startswith('W/'):
+        tag = tag[2:]
+    for encoding in ('br', 'gzip'):
+        if tag.endswith(f'-{encoding}"'):
+            return tag[:-len(encoding) - 2] + '"'
+    return tag
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header names etag, in any encoding, or is '*'.
+
+    Comparison is weak, as the header requires, and a variant's tag matches
+    the others: they all decode to the same content.
+    """
+    if not if_none_match:
+        return False
+    tags = {_version(tag) for tag in if_none_match.split(',')}
+    return '*' in tags or _version(etag) in tags
+
+class StaticAsset:
+    """A fixed response body, encoded once per content coding, served with strong ETags"""
+
+    def __init__(self, body, content_type, cache_control='private, no-cache'):
+        self.content_type = content_type
+        # no-cache lets browsers keep the page but revalidate it, so repeat visits are 304s;
+        # private because the response may carry a new session cookie
+        self.cache_control = cache_control
+        digest = hashlib.sha256(body).hexdigest()[:20]
+        self.variants = {None: (body, f'"{digest}"')}  # Encoding -> (body, ETag)
+        for encoding in ENCODINGS:
+            encoded = compress(body, encoding)
+            if len(encoded) < len(body):
+                self.variants[encoding] = (encoded, f'"{digest}-{encoding}"')
+
+    def respond(self, accept_encoding, if_none_match):
+        """Return (status, body, headers) for a GET: the best variant, or a 304 if the client has it"""
+        encoding = choose_encoding(accept_encoding, [e for e in ENCODINGS if e in self.variants])
+        body, etag = self.variants[encoding]
+        headers = {'ETag': etag, 'Cache-Control': self.cache_control, 'Vary': 'Accept-Encoding'}
+        if etag_matches(if_none_match, etag):
+            return 304, b'', headers
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        return 200, body, headers
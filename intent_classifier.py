@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+JarvisAI Intent Classifier - map free-form messages onto the assistant's commands
+Build the model with:
+    python intent_classifier.py build
+Try it with:
+    python intent_classifier.py classify "could you tell me something funny"
+
+Messages become hashed character n-gram TF-IDF vectors, scored against one
+centroid per intent with a single matrix product. The trained model is a
+small .npz file (jarvis_data/intent_model.npz by default) that is rebuilt
+from intent_examples.json whenever the examples change.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+FORMAT_VERSION = 1
+NGRAM_SIZES = (2, 3, 4)
+FEATURES = 1 << 14          # Hashed feature space; n-grams are bucketed by crc32
+MIN_CONFIDENCE = 0.25       # Cosine similarity below which a message has no intent
+EXAMPLES_PATH = Path(__file__).with_name('intent_examples.json')
+DEFAULT_MODEL = Path(os.environ.get('JARVIS_DATA_DIR', 'jarvis_data')) / 'intent_model.npz'
+
+def normalize(text):
+    """Lowercase, collapse whitespace and pad so word edges become n-grams too"""
+    return ' ' + ' '.join(text.casefold().split()) + ' '
+
+def ngram_hashes(text):
+    """Feature index of every character n-gram in a message, repeats included"""
+    text = normalize(text)
+    return [zlib.crc32(text[i:i + n].encode('utf-8')) & (FEATURES - 1)
+            for n in NGRAM_SIZES for i in range(len(text) - n + 1)]
+
+def ngram_features(text):
+    """Return (feature indices, counts) for a message's character n-grams"""
+    indices, counts = np.unique(np.array(ngram_hashes(text), dtype=np.int64), return_counts=True)
+    return indices, counts.astype(np.float32)
+
+def examples_digest(examples):
+    return hashlib.sha1(json.dumps(examples, sort_keys=True).encode('utf-8')).hexdigest()
+
+def load_examples(path=EXAMPLES_PATH):
+    """Read {intent: [example, ...]} from the bundled examples file"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+class IntentClassifier:
+    """Nearest-centroid intent classifier over hashed character n-gram TF-IDF vectors"""
+
+    def __init__(self, labels, idf, centroids, digest=''):
+        self.labels = list(labels)
+        self.idf = idf.astype(np.float32)
+        self.centroids = centroids.astype(np.float32)  # (intents, FEATURES), rows L2-normalized
+        self.digest = digest
+
+    @classmethod
+    def train(cls, examples):
+        """Fit from {intent: [example, ...]}"""
+        labels = sorted(examples)
+        rows = [(labels.index(intent), ngram_features(text))
+                for intent in labels for text in examples[intent]]
+
+        document_frequency = np.zeros(FEATURES, dtype=np.float32)
+        for _, (indices, _) in rows:
+            document_frequency[indices] += 1
+        idf = np.log((1 + len(rows)) / (1 + document_frequency)) + 1
+
+        centroids = np.zeros((len(labels), FEATURES), dtype=np.float32)
+        for label, (indices, counts) in rows:
+            weights = (1 + np.log(counts)) * idf[indices]
+            centroids[label, indices] += weights / np.linalg.norm(weights)
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        return cls(labels, idf, centroids, examples_digest(examples))
+
+    def save(self, path=DEFAULT_MODEL):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp.npz')
+        np.savez(tmp, version=FORMAT_VERSION, features=FEATURES, ngram_sizes=np.array(NGRAM_SIZES),
+                 labels=np.array(self.labels), idf=self.idf, centroids=self.centroids,
+                 digest=np.array(self.digest))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL):
+        with np.load(path) as data:
+            if int(data['version']) != FORMAT_VERSION or int(data['features']) != FEATURES \
+                    or tuple(data['ngram_sizes']) != NGRAM_SIZES:
+                raise ValueError(f"{path} was built with different classifier settings")
+            return cls(data['labels'].tolist(), data['idf'], data['centroids'], str(data['digest']))
+
+    @classmethod
+    def load_or_build(cls, path=DEFAULT_MODEL, examples_path=EXAMPLES_PATH):
+        """Load the saved model, retraining first if the examples changed since it was built"""
+        examples = load_examples(examples_path)
+        if Path(path).exists():
+            try:
+                model = cls.load(path)
+                if model.digest == examples_digest(examples):
+                    return model
+            except (OSError, ValueError, KeyError):
+                pass
+        model = cls.train(examples)
+        model.save(path)
+        return model
+
+    def _decide(self, scores):
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        return (self.labels[best] if score >= MIN_CONFIDENCE else None), score
+
+    def classify(self, text):
+        """Return (intent or None, cosine similarity of the best match)"""
+        indices, counts = ngram_features(text)
+        if not len(indices):
+            return None, 0.0
+        weights = (1 + np.log(counts)) * self.idf[indices]
+        scores = self.centroids[:, indices] @ weights / np.linalg.norm(weights)
+        return self._decide(scores)
+
+    def classify_batch(self, texts):
+        """classify() for many messages at once, scoring them all in one vectorized pass"""
+        hashes = [ngram_hashes(text) for text in texts]
+        rows = np.repeat(np.arange(len(texts), dtype=np.int64), [len(h) for h in hashes])
+        if not len(rows):
+            return [(None, 0.0)] * len(texts)
+
+        # One unique() over (message, feature) keys counts every message's n-grams together
+        keys, counts = np.unique(rows * FEATURES + np.concatenate(hashes), return_counts=True)
+        rows, indices = np.divmod(keys, FEATURES)
+        weights = (1 + np.log(counts.astype(np.float32))) * self.idf[indices]
+        present, starts = np.unique(rows, return_index=True)
+
+        norms = np.sqrt(np.add.reduceat(weights * weights, starts))
+        scores = np.add.reduceat(self.centroids[:, indices] * weights, starts, axis=1) / norms
+        results = [(None, 0.0)] * len(texts)
+        for position, row in zip(present.tolist(), scores.T):
+            results[position] = self._decide(row)
+        return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or try the intent classifier")
+    parser.add_argument('--model', default=str(DEFAULT_MODEL), help="Model file (default: %(default)s)")
+    parser.add_argument('--examples', default=str(EXAMPLES_PATH), help="Training examples (default: %(default)s)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('build', help="Train from the examples file and save the model")
+    classify = commands.add_parser('classify', help="Classify one or more messages")
+    classify.add_argument('messages', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        started = time.perf_counter()
+        model = IntentClassifier.train(load_examples(args.examples))
+        model.save(args.model)
+        print(f"🧠 Trained {len(model.labels)} intents into {args.model} in {time.perf_counter() - started:.2f}s")
+        return 0
+
+    started = time.perf_counter()
+    model = IntentClassifier.load_or_build(args.model, args.examples)
+    print(f"⏱️  Model ready in {(time.perf_counter() - started) * 1000:.1f} ms")
+    started = time.perf_counter()
+    results = model.classify_batch(args.messages)
+    elapsed = (time.perf_counter() - started) * 1000
+    for message, (intent, score) in zip(args.messages, results):
+        print(f"{intent or '-':>10}  {score:.2f}  {message}")
+    print(f"⏱️  {elapsed:.3f} ms for {len(args.messages)} message(s)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,38 @@
+"""
+JarvisAI intent keywords - the rule-based half of understanding a message
+
+generate_response in the web server and in the command-line assistant asks
+which of these keyword groups a message mentions, found in one pass of a
+single compiled regex, and replies by rules. In the server, intent_classifier
+handles what the rules miss.
+"""
+
+import re
+
+# Keywords generate_response reacts to, matched as whole words
+INTENT_KEYWORDS = {
+    'question': ('what', 'how', 'why', 'when', 'where', 'who'),
+    'time': ('time',),
+    'date': ('date',),
+    'weather': ('weather',),
+    'about_jarvis': ('you', 'your', 'jarvis'),
+    'thanks': ('thank', 'thanks', 'thankful', 'appreciate', 'appreciated'),
+    'positive': ('good', 'great', 'awesome', 'amazing', 'excellent'),
+    'negative': ('bad', 'terrible', 'awful', 'horrible'),
+}
+
+class IntentMatcher:
+    """Finds every intent in a message with one pass of a compiled word-boundary regex"""
+
+    def __init__(self, keywords=INTENT_KEYWORDS):
+        groups = []
+        for intent, words in keywords.items():
+            # Longest first so 'thanks' wins over 'thank'
+            alternation = '|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+            groups.append(f'(?P<{intent}>{alternation})')
+        self.pattern = re.compile(r'\b(?:' + '|'.join(groups) + r')\b|(?P<digit>\d)|(?P<operator>[-+*/=()])',
+                                  re.IGNORECASE)
+
+    def match(self, text):
+        """Return the set of intents found; 'digit' and 'operator' flag math-looking input"""
+        return {match.lastgroup for match in self.pattern.finditer(text)}
@@ -0,0 +1,89 @@
+"""
+JarvisAI system facts - what the `system` command reports
+
+platform.processor() and platform.architecture() shell out to `uname` and
+`file`, and forking a busy multi-threaded server costs more than the facts
+are worth, so the server probes them once, in its worker pool, and keeps
+the result. Load, memory and uptime change, so they are read from /proc
+instead - a few small file reads - and reused for SYSTEM_INFO_REFRESH seconds.
+"""
+
+import datetime
+import os
+import platform
+import threading
+import time
+
+SYSTEM_INFO_REFRESH = float(os.environ.get('JARVIS_SYSTEM_INFO_REFRESH', 2))
+
+def platform_facts():
+    """Describe the machine and interpreter as {label: value}"""
+    return {
+        "System": platform.system(),
+        "Release": platform.release(),
+        "Machine": platform.machine(),
+        "Processor": platform.processor() or "Unknown",
+        "Python Version": platform.python_version(),
+        "Architecture": platform.architecture()[0],
+    }
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError:
+        return None
+
+def live_facts():
+    """Load average, memory and uptime as {label: value}; fields the host can't report are left out"""
+    facts = {}
+    loadavg = _read('/proc/loadavg')
+    if loadavg:
+        facts["Load Average"] = ', '.join(loadavg.split()[:3])
+    elif hasattr(os, 'getloadavg'):
+        facts["Load Average"] = ', '.join(f"{load:.2f}" for load in os.getloadavg())
+
+    meminfo = _read('/proc/meminfo')
+    if meminfo:
+        fields = dict(line.split(':', 1) for line in meminfo.splitlines() if ':' in line)
+        try:
+            total = int(fields['MemTotal'].split()[0]) * 1024
+            available = int(fields['MemAvailable'].split()[0]) * 1024
+            used = total - available
+            facts["Memory"] = f"{used / 2**30:.1f} GB used of {total / 2**30:.1f} GB ({used * 100 // total}%)"
+        except (KeyError, ValueError, ZeroDivisionError):
+            pass
+
+    uptime = _read('/proc/uptime')
+    if uptime:
+        facts["Uptime"] = str(datetime.timedelta(seconds=int(float(uptime.split()[0]))))
+    return facts
+
+class SystemInfo:
+    """The `system` reply: platform facts probed once, live facts refreshed at most every refresh seconds"""
+
+    def __init__(self, refresh=SYSTEM_INFO_REFRESH):
+        self.refresh = refresh
+        self.static = None  # Rendered platform facts, once they have been probed
+        self._live = ''
+        self._live_expires = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def render(facts):
+        return ''.join(f"{key}: {value}\n" for key, value in facts.items())
+
+    def set_platform(self, facts):
+        self.static = self.render(facts)
+
+    def live(self):
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._live_expires:
+                self._live = self.render(live_facts())
+                self._live_expires = now + self.refresh
+            return self._live
+
+    def report(self, header="System Information:\n"):
+        """The full reply; set_platform() must have run"""
+        return header + self.static + self.live()
@@ -0,0 +1,31 @@
+"""
+Shared test set-up: import the modules from the repository root, and keep
+anything app.py writes at import time out of the working tree.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault('JARVIS_DATA_DIR', tempfile.mkdtemp(prefix='jarvis-tests-'))
+os.environ.setdefault('JARVIS_WIKI_CACHE_PERSIST', 'false')
+
+@pytest.fixture
+def stub():
+    """An in-process wiki_stub_server; its state's latency and error_rate can be changed mid-test"""
+    from wiki_stub_server import StubState, make_handler
+
+    state = StubState()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state.url = f"http://127.0.0.1:{server.server_address[1]}/w/api.php"
+    yield state
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,87 @@
+"""JSON ETags, 304s and gzip on /api/* through the Flask test client"""
+
+import gzip
+
+import pytest
+
+import app
+from app import ETAG_PREFIX, JarvisAPI, SessionHistoryStore
+
+COMMANDS_ETAG = f'"{ETAG_PREFIX}-commands"'
+
+@pytest.fixture
+def jarvis(monkeypatch):
+    jarvis = JarvisAPI(history=SessionHistoryStore())
+    monkeypatch.setattr(app, 'jarvis_api', jarvis)
+    yield jarvis
+    jarvis.wiki_executor.shutdown(wait=False)
+    jarvis.batch_executor.shutdown(wait=False)
+
+@pytest.fixture
+def client(jarvis):
+    return app.create_app().test_client()
+
+def test_json_is_tagged(client):
+    response = client.get('/api/commands')
+    assert response.status_code == 200
+    assert response.headers['ETag'] == COMMANDS_ETAG
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert 'Accept-Encoding' in response.vary
+    assert 'Content-Encoding' not in response.headers
+
+@pytest.mark.parametrize('if_none_match', [
+    COMMANDS_ETAG,
+    f'W/{COMMANDS_ETAG}',
+    f'"{ETAG_PREFIX}-commands-gzip"',  # The compressed variant's tag names the same content
+    f'"stale", {COMMANDS_ETAG}',
+])
+def test_matching_if_none_match_is_304(client, if_none_match):
+    response = client.get('/api/commands', headers={'If-None-Match': if_none_match})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == COMMANDS_ETAG
+    assert 'Accept-Encoding' in response.vary
+
+def test_other_if_none_match_gets_the_body(client):
+    response = client.get('/api/commands', headers={'If-None-Match': f'"{ETAG_PREFIX}-stale"'})
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'success'
+
+def test_gzip_when_accepted(client):
+    plain = client.get('/api/commands')
+    response = client.get('/api/commands', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'] == f'"{ETAG_PREFIX}-commands-gzip"'
+    assert 'Accept-Encoding' in response.vary
+    assert gzip.decompress(response.data) == plain.data
+    assert len(response.data) < len(plain.data)
+
+@pytest.mark.parametrize('accept_encoding', ['identity', 'gzip;q=0', 'br'])
+def test_no_gzip_unless_accepted(client, accept_encoding):
+    response = client.get('/api/commands', headers={'Accept-Encoding': accept_encoding})
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['ETag'] == COMMANDS_ETAG
+
+def test_small_bodies_stay_plain(client):
+    response = client.get('/api/health', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['ETag'] == f'W/"{ETAG_PREFIX}-health"'
+    assert 'Accept-Encoding' in response.vary
+
+def test_history_etag_follows_the_session(client):
+    first = client.get('/api/history')
+    etag = first.headers['ETag']
+    assert {'Accept-Encoding', 'Cookie', app.SESSION_HEADER} <= set(first.vary)
+    assert client.get('/api/history', headers={'If-None-Match': etag}).status_code == 304
+
+    client.post('/api/chat', json={'message': 'hello'})
+    second = client.get('/api/history', headers={'If-None-Match': etag})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != etag
+    assert [entry['user'] for entry in second.get_json()['history']] == ['hello']
+
+def test_history_etag_differs_between_sessions(client):
+    one = client.get('/api/history', headers={app.SESSION_HEADER: 'session-one'})
+    two = client.get('/api/history', headers={app.SESSION_HEADER: 'session-two'})
+    assert one.headers['ETag'] != two.headers['ETag']
@@ -0,0 +1,85 @@
+"""POST /api/chat/batch: slow lookups run side by side, results come back in input order"""
+
+import time
+
+import pytest
+
+import app
+from app import CircuitBreaker, JarvisAPI, SessionHistoryStore
+from wiki_client import WikiCache, WikipediaClientPool
+
+LATENCY = 0.3
+
+@pytest.fixture
+def jarvis(stub, monkeypatch):
+    jarvis = JarvisAPI(history=SessionHistoryStore())
+    jarvis.offline_wiki = None
+    jarvis.wiki_clients = WikipediaClientPool(stub.url)
+    jarvis.wiki_cache = WikiCache()
+    jarvis.wiki_breaker = CircuitBreaker(failure_threshold=100)
+    monkeypatch.setattr(app, 'jarvis_api', jarvis)
+    yield jarvis
+    jarvis.wiki_executor.shutdown(wait=True)
+    jarvis.batch_executor.shutdown(wait=True)
+    jarvis.cpu_pool.shutdown()
+
+@pytest.fixture
+def client(jarvis):
+    return app.create_app().test_client()
+
+def post(client, messages):
+    return client.post('/api/chat/batch', json={'messages': messages})
+
+def test_results_come_back_in_input_order(client):
+    messages = ['wiki alpha', 'calculate 2+2', 'wiki beta', 'hello', 'wiki gamma']
+    response = post(client, messages)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['status'] == 'success' and body['count'] == 5 and body['failed'] == 0
+    assert [item['index'] for item in body['results']] == list(range(5))
+    replies = [item['response'] for item in body['results']]
+    assert replies[0].startswith("Wikipedia says: Alpha is")
+    assert '4' in replies[1]
+    assert replies[2].startswith("Wikipedia says: Beta is")
+    assert replies[4].startswith("Wikipedia says: Gamma is")
+
+def test_slow_lookups_run_concurrently(client, stub):
+    stub.latency = LATENCY
+    messages = [f'wiki topic {n}' for n in range(4)]
+    started = time.monotonic()
+    body = post(client, messages).get_json()
+    elapsed = time.monotonic() - started
+    assert body['status'] == 'success'
+    # Each lookup makes two upstream requests; serially four would take at least 8 * LATENCY
+    assert elapsed < 4 * LATENCY
+    assert stub.requests == 2 * len(messages)
+
+def test_partial_failure(client, stub):
+    stub.error_rate = 1
+    body = post(client, ['time', 42, '   ', 'wiki python']).get_json()
+    assert body['status'] == 'partial'
+    assert body['count'] == 4 and body['failed'] == 3
+    statuses = [item['status'] for item in body['results']]
+    assert statuses == ['success', 'error', 'error', 'error']
+    assert body['results'][1]['error'] == 'Message must be a string'
+    assert body['results'][2]['error'] == 'Message cannot be empty'
+    assert body['results'][3]['error'].startswith("Wikipedia search error:")
+
+def test_only_successes_reach_history(client, stub):
+    stub.error_rate = 1
+    post(client, ['time', 'wiki python', 'hello'])
+    history = client.get('/api/history').get_json()['history']  # The same session, by cookie
+    assert [entry['user'] for entry in history] == ['time', 'hello']
+
+def test_size_limit(client, monkeypatch):
+    monkeypatch.setattr(app, 'BATCH_MAX_MESSAGES', 3)
+    assert post(client, ['time'] * 3).status_code == 200
+    response = post(client, ['time'] * 4)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'A batch can hold at most 3 messages'
+
+@pytest.mark.parametrize('data', [{}, {'messages': []}, {'messages': 'time'}, ['time']])
+def test_malformed_requests(client, data):
+    response = client.post('/api/chat/batch', json=data)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
@@ -0,0 +1,105 @@
+"""ExpressionCompiler: parsing, shape caching and its safety limits"""
+
+import pickle
+import time
+
+import pytest
+
+from calculator import (
+    ExpressionCompiler, ExpressionTooComplex, ExpressionTooExpensive, HeavyExpression, ResultTooLarge,
+    TooManyDigits, UnsafeExpression,
+)
+
+@pytest.fixture
+def calc():
+    return ExpressionCompiler()
+
+@pytest.mark.parametrize('expression, expected', [
+    ('2+2', 4),
+    ('2**-3', 0.125),
+    ('-3**2', -9),
+    ('7/2', 3.5),
+    ('6^3', 5),  # ^ is xor here; calculate() turns it into ** before evaluating
+    ('1.5e3*2', 3000.0),
+    ('00+1', 1),
+    ('0', 0),
+    ('0x1F', 31),
+])
+def test_evaluates_like_python(calc, expression, expected):
+    assert calc.evaluate(expression) == expected
+    assert type(calc.evaluate(expression)) is type(expected)
+
+def test_leading_zero_on_nonzero_literal_is_rejected(calc):
+    with pytest.raises(SyntaxError):
+        calc.evaluate('007')
+
+def test_same_shape_reuses_the_compiled_program(calc):
+    calc.evaluate('2+3')
+    assert calc.evaluate('40+2') == 42
+    assert calc.evaluate('1.5+1') == 2.5  # Float numbers fit the same shape
+    stats = calc.stats()
+    assert stats['misses'] == 1 and stats['hits'] == 2
+
+@pytest.mark.parametrize('expression', ['__import__("os")', 'open("x")', 'exec(1)'])
+def test_unsafe_input_is_rejected(calc, expression):
+    with pytest.raises(UnsafeExpression):
+        calc.evaluate(expression)
+
+@pytest.mark.parametrize('expression', ['a+1', 'len(1)', '"a"*3', '1 < 2', '[1]'])
+def test_unsupported_syntax_is_rejected(calc, expression):
+    with pytest.raises((TypeError, ValueError, SyntaxError)):
+        calc.evaluate(expression)
+
+def test_division_by_zero_propagates(calc):
+    with pytest.raises(ZeroDivisionError):
+        calc.evaluate('1/0')
+
+def test_spacing_stays_consistent_with_python(calc):
+    assert calc.evaluate('2  +\t3') == 5
+    assert calc.evaluate('4 + 1') == 5
+    assert calc.stats()['hits'] == 1  # Runs of spaces don't make a new shape
+
+@pytest.mark.parametrize('expression', ['2 * * 3', '1e -5', '1 2', '2. 5e3'])
+def test_spacing_cannot_make_invalid_input_valid(calc, expression):
+    calc.evaluate('2**3')
+    calc.evaluate('1e-5')
+    with pytest.raises(SyntaxError):
+        calc.evaluate(expression)
+
+def test_hash_is_not_a_shape_placeholder(calc):
+    with pytest.raises(SyntaxError):
+        calc.evaluate('#+1')
+
+def test_runaway_power_is_rejected_before_computing(calc):
+    started = time.perf_counter()
+    with pytest.raises(ResultTooLarge):
+        calc.evaluate('9**9**9')
+    assert time.perf_counter() - started < 0.5
+
+def test_too_expensive_exact_result_falls_back_to_float(calc):
+    # 2**(2**21) is past CALC_MAX_INT_BITS, but its reciprocal is an ordinary float
+    assert calc.evaluate('2**-(2**21)') == 0.0
+    assert calc.stats()['downgraded_to_float'] == 1
+
+def test_float_fallback_that_overflows_is_too_large(calc):
+    with pytest.raises(ResultTooLarge):
+        calc.evaluate('3**2000000')
+
+def test_big_but_bounded_integers_are_exact(calc):
+    assert calc.evaluate('2**100000') == 2 ** 100000
+
+def test_inline_bits_hands_heavy_results_on(calc):
+    assert calc.evaluate('2**100', inline_bits=1000) == 2 ** 100
+    with pytest.raises(HeavyExpression) as raised:
+        calc.evaluate('2**100000', inline_bits=1000)
+    assert raised.value.bits >= 100000
+
+@pytest.mark.parametrize('expression', ['1+' * 300 + '1', '-' * 40 + '1'])
+def test_size_and_nesting_limits(calc, expression):
+    with pytest.raises(ExpressionTooComplex):
+        calc.evaluate(expression)
+
+def test_errors_survive_pickling():
+    for error in (ResultTooLarge(1e9), TooManyDigits(10 ** 6), ExpressionTooExpensive(5e6)):
+        copy = pickle.loads(pickle.dumps(error))
+        assert type(copy) is type(error) and str(copy) == str(error)
@@ -0,0 +1,79 @@
+"""Range mode: parsing '<expression> for x in a..b', evaluating it over NumPy arrays and summarizing"""
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from calculator import (
+    CALC_RANGE_MAX_POINTS, ExpressionCompiler, RangeQuery, RangeTooLarge, UnsafeExpression, parse_range,
+    range_size, summarize_range,
+)
+
+@pytest.fixture
+def calc():
+    return ExpressionCompiler()
+
+def test_parse_range():
+    assert parse_range('x**2 for x in 1..5') == RangeQuery('x**2', 'x', 1.0, 5.0, 1.0)
+    assert parse_range(' 2*t for t in 10..0 step -2.5 ') == RangeQuery('2*t', 't', 10.0, 0.0, -2.5)
+    assert parse_range('x for x in -1e3..1e3') == RangeQuery('x', 'x', -1000.0, 1000.0, 1.0)
+    assert parse_range('5 * 3') is None
+    assert parse_range('x**2 for x in 1..') is None
+
+@pytest.mark.parametrize('text, size', [
+    ('x for x in 1..5', 5),
+    ('x for x in 0..1 step 0.1', 11),  # The end is kept despite float steps
+    ('x for x in 5..1', 5),
+    ('x for x in 3..3', 1),
+])
+def test_range_size(text, size):
+    assert range_size(parse_range(text)) == size
+
+@pytest.mark.parametrize('text', [
+    'x for x in 1..5 step 0',
+    'x for x in 1..5 step -1',
+    f'x for x in 1..{CALC_RANGE_MAX_POINTS}.5 step 0.5',
+])
+def test_range_size_rejects(text):
+    with pytest.raises(RangeTooLarge):
+        range_size(parse_range(text))
+
+def test_evaluate_range(calc):
+    points, values = calc.evaluate_range(parse_range('2*x**2 - 1 for x in -2..2'))
+    assert points.tolist() == [-2, -1, 0, 1, 2]
+    assert values.tolist() == [7, 1, -1, 1, 7]
+
+def test_evaluate_range_reuses_compiled_expressions(calc):
+    calc.evaluate_range(parse_range('x + 1 for x in 0..3'))
+    points, values = calc.evaluate_range(parse_range('x + 1 for x in 10..12'))
+    assert values.tolist() == [11, 12, 13]
+    assert calc.hits == 1
+
+def test_constant_and_non_finite_values(calc):
+    _, values = calc.evaluate_range(parse_range('4 for x in 1..3'))
+    assert values.tolist() == [4, 4, 4]
+    _, values = calc.evaluate_range(parse_range('1/x for x in -1..1'))
+    assert values[0] == -1 and np.isinf(values[1]) and values[2] == 1
+    _, values = calc.evaluate_range(parse_range('10**x for x in 300..400 step 100'))
+    assert np.isinf(values[1])  # Overflow is inf, not an exception
+
+def test_evaluate_range_is_as_strict_as_evaluate(calc):
+    with pytest.raises(UnsafeExpression):
+        calc.evaluate_range(parse_range('__import__("os") for x in 1..2'))
+
+def test_summarize_short_range(calc):
+    query = parse_range('x/2 for x in 1..3')
+    assert summarize_range(query, *calc.evaluate_range(query)) == (
+        'x/2 for x in 1..3 (3 values)\n'
+        '  x = 1 → 0.5\n'
+        '  x = 2 → 1\n'
+        '  x = 3 → 1.5')
+
+def test_summarize_long_range(calc):
+    query = parse_range('1/x for x in -50..49')
+    lines = summarize_range(query, *calc.evaluate_range(query), rows=4).splitlines()
+    assert lines[0] == '1/x for x in -50..49 (100 values)'
+    assert lines[1].startswith('min -1, max 1, ')
+    assert lines[2] == '1 values are not finite (nan or inf)'
+    assert lines[3:] == ['  x = -50 → -0.02', '  x = -49 → -0.0204081633', '  ...',
+                         '  x = 48 → 0.0208333333', '  x = 49 → 0.0204081633']
@@ -0,0 +1,60 @@
+"""CircuitBreaker: opening on repeated failures, the half-open probe and closing again"""
+
+import time
+
+import pytest
+
+from app import CircuitBreaker
+
+@pytest.fixture
+def breaker():
+    return CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+
+def test_opens_after_threshold_consecutive_failures(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # Resets the count
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()['trips'] == 1
+
+def test_rejects_while_open(breaker):
+    trip(breaker)
+    assert not breaker.allow()
+    assert not breaker.allow()
+    assert breaker.stats()['rejected'] == 2
+
+def test_lets_one_probe_through_after_cool_down(breaker):
+    trip(breaker)
+    time.sleep(breaker.reset_timeout)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()  # Only the one probe
+
+def test_successful_probe_closes(breaker):
+    trip(breaker)
+    time.sleep(breaker.reset_timeout)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+    assert breaker.stats()['consecutive_failures'] == 0
+
+def test_failed_probe_reopens_at_once(breaker):
+    trip(breaker)
+    time.sleep(breaker.reset_timeout)
+    assert breaker.allow()
+    breaker.record_failure()  # One failure is enough while half-open
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.stats()['trips'] == 2
+    time.sleep(breaker.reset_timeout)
+    assert breaker.allow()  # And the cool-down starts over
@@ -0,0 +1,108 @@
+"""The command-line assistant's CommandResolver, and which input process_command treats as a command"""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+CLI_PATH = Path(__file__).resolve().parent.parent / 'Flask web server with modern UI' / 'main.py'
+
+@pytest.fixture(scope='module')
+def cli():
+    spec = importlib.util.spec_from_file_location('jarvis_cli', CLI_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+COMMANDS = ['time', 'date', 'weather', 'search', 'wiki', 'news', 'joke', 'quote', 'open', 'save', 'history',
+            'clear', 'help', 'voice', 'calculate', 'system', 'stats']
+
+@pytest.fixture
+def resolver(cli):
+    return cli.CommandResolver(COMMANDS)
+
+@pytest.mark.parametrize('word, name', [
+    ('wiki', 'wiki'),
+    ('calc', 'calculate'),  # Unique prefix
+    ('st', 'stats'),
+    ('hi', 'history'),
+    ('wikk', 'wiki'),  # One substitution
+    ('tme', 'time'),  # One deletion
+    ('hlep', 'help'),  # Adjacent swap counts as one edit
+    ('weahter', 'weather'),
+    ('calcluate', 'calculate'),
+    ('sysem', 'system'),
+])
+def test_resolves(resolver, word, name):
+    assert resolver.resolve(word) == (name, [name])
+
+def test_ambiguous_prefix_lists_candidates(resolver):
+    assert resolver.resolve('s') == (None, ['save', 'search', 'stats', 'system'])
+
+def test_equally_close_typos_are_not_guessed(resolver):
+    assert resolver.resolve('dave') == (None, ['date', 'save'])
+
+@pytest.mark.parametrize('word', ['xy', 'zz', 'wkei', 'xyzzy', 'weatherman'])
+def test_unknown_words(resolver, word):
+    assert resolver.resolve(word) == (None, [])
+
+@pytest.mark.parametrize('a, b, distance', [
+    ('help', 'help', 0),
+    ('hlep', 'help', 1),
+    ('wkei', 'wiki', 2),
+    ('', 'abc', 3),
+    ('kitten', 'sitting', 3),
+])
+def test_edit_distance(cli, a, b, distance):
+    assert cli.edit_distance(a, b) == distance
+    assert cli.edit_distance(b, a) == distance
+
+@pytest.fixture
+def jarvis(cli, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # JarvisAI keeps its files in ./jarvis_data
+    jarvis = cli.JarvisAI()
+    jarvis.add_to_history('hello', 'Hi there!')
+    ran = []
+    jarvis.ran = ran
+    jarvis.commands = {name: (lambda args, name=name: ran.append((name, args)) or name) for name in jarvis.commands}
+    return jarvis
+
+@pytest.mark.parametrize('sentence', [
+    'have a good day',
+    'clean up this mess please',
+    'hell yeah',
+    'state of the art',
+    'new york is lovely',
+    'same here',
+    's is a letter',
+])
+def test_sentences_go_to_chat(jarvis, sentence):
+    jarvis.process_command(sentence)
+    assert jarvis.ran == []
+
+@pytest.mark.parametrize('text, name, args', [
+    ('wiki paris', 'wiki', ['paris']),
+    ('calc 2+2', 'calculate', ['2+2']),  # Abbreviations of commands that take arguments
+    ('clear', 'clear', []),
+    ('hlep', 'help', []),
+    ('new', 'news', []),
+    ('cle', 'clear', []),
+])
+def test_commands_run(jarvis, text, name, args):
+    assert jarvis.process_command(text) == name
+    assert jarvis.ran == [(name, args)]
+
+@pytest.mark.parametrize('word, name', [('clesr', 'clear'), ('sve', 'save'), ('oen', 'open')])
+def test_corrected_side_effects_ask_first(jarvis, word, name):
+    assert jarvis.process_command(word) == f'Did you mean: {name}?'
+    assert jarvis.ran == []
+
+def test_real_commands_still_work(cli, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    jarvis = cli.JarvisAI()
+    jarvis.add_to_history('hello', 'Hi there!')
+    jarvis.process_command('have a good day')
+    jarvis.process_command('clean up this mess please')
+    assert list(jarvis.data_dir.iterdir()) == []
+    assert len(jarvis.conversation_history) == 1
+    assert jarvis.process_command('calc 6*7') == '6*7 = 42'
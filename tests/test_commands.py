@@ -0,0 +1,144 @@
+"""CommandRegistry and Command: registration, argument passing, /api/commands and the timing hooks"""
+
+import asyncio
+
+import pytest
+
+import app
+from app import COMMANDS, COST_IO, COST_QUICK, Command, CommandRegistry, JarvisAPI, SessionHistoryStore
+
+@pytest.fixture
+def registry():
+    registry = CommandRegistry()
+
+    class Assistant:
+        @registry.command('echo', 'Repeat the message', usage='echo [text]', aliases=('say',), args='optional')
+        def echo(self, text):
+            return text
+
+        @registry.command('look', 'Look something up', args='required', missing="Look up what?", cost=COST_IO)
+        def look(self, query):
+            return f"looked up {query}"
+
+        @registry.command('whoami', 'Name the session', session=True, listed=False)
+        def whoami(self, session_id=None):
+            return session_id
+
+        @registry.async_handler('look')
+        async def look_async(self, query):
+            return f"awaited {query}"
+
+    registry.owner = Assistant
+    return registry
+
+def test_names_and_aliases_resolve(registry):
+    for message in ('echo hi there', 'say hi there', 'ECHO hi there', '  say   hi   there '):
+        command, args = registry.resolve(message)
+        assert command is registry.commands['echo']
+        assert args == 'hi there'
+    assert registry.resolve('unknown words') == (None, 'words')
+    assert registry.resolve('') == (None, '')
+    assert registry.resolve(None) == (None, '')
+
+def test_registration_keeps_the_method(registry):
+    assert registry.owner.echo(None, 'x') == 'x'
+    assert registry.commands['echo'].handler is registry.owner.echo
+    assert list(registry.commands) == ['echo', 'look', 'whoami']
+
+def test_duplicate_name_or_alias_is_rejected(registry):
+    with pytest.raises(ValueError, match="'say' registered twice"):
+        registry.command('speak', 'Speak', aliases=('say',))(lambda self: None)
+    with pytest.raises(ValueError, match="'look' registered twice"):
+        registry.command('look', 'Look again')(lambda self: None)
+
+def test_async_handler_is_attached(registry):
+    command = registry.commands['look']
+    assert command.async_handler is registry.owner.look_async
+    assert registry.commands['echo'].async_handler is None
+    assert asyncio.run(command.async_handler(None, 'x')) == 'awaited x'
+
+def test_unlisted_commands_are_hidden(registry):
+    assert [command.name for command in registry.listed()] == ['echo', 'look']
+    assert registry.descriptions() == {'echo': 'Repeat the message', 'look': 'Look something up'}
+
+@pytest.mark.parametrize('options, expected', [
+    ({}, ((), {})),
+    ({'args': 'optional'}, (('some text',), {})),
+    ({'args': 'required'}, (('some text',), {})),
+    ({'session': True}, ((), {'session_id': 'abc'})),
+    ({'args': 'optional', 'session': True}, (('some text',), {'session_id': 'abc'})),
+])
+def test_argument_modes(options, expected):
+    command = Command('name', None, 'description', **options)
+    assert command.arguments('some text', 'abc') == expected
+
+def test_describe_defaults():
+    command = Command('name', None, 'What it does')
+    assert command.describe() == {
+        'name': 'name', 'description': 'What it does', 'usage': 'name', 'aliases': [], 'cost': COST_QUICK,
+    }
+
+@pytest.fixture
+def jarvis(monkeypatch):
+    jarvis = JarvisAPI(history=SessionHistoryStore())
+    monkeypatch.setattr(app, 'jarvis_api', jarvis)
+    yield jarvis
+    jarvis.wiki_executor.shutdown(wait=False)
+    jarvis.batch_executor.shutdown(wait=False)
+
+def test_required_argument_missing(jarvis):
+    assert jarvis.process_message('search') == "Please provide a search query"
+    assert 'q=jarvis+ai' in jarvis.process_message('search Jarvis AI')
+
+def test_optional_argument_may_be_empty(jarvis):
+    assert 'your location' in jarvis.process_message('weather')
+    assert 'london' in jarvis.process_message('weather London')
+
+def test_session_commands_get_the_session(jarvis):
+    jarvis.add_to_history('hello', 'Hi', 'one')
+    jarvis.add_to_history('hello', 'Hi', 'two')
+    assert jarvis.process_message('reset', 'one') == "Conversation history cleared!"
+    assert jarvis.get_history_page('one')['history'] == []
+    assert len(jarvis.get_history_page('two')['history']) == 1
+
+def test_api_commands_lists_the_details(jarvis):
+    body = app.create_app().test_client().get('/api/commands').get_json()
+    details = {detail['name']: detail for detail in body['details']}
+    assert list(details) == [command.name for command in COMMANDS.listed()]
+    assert body['commands'] == COMMANDS.descriptions()
+    assert 'hello' not in details and 'bye' not in details
+    assert details['wiki']['cost'] == COST_IO
+    assert details['wiki']['usage'] == 'wiki [query]'
+    assert details['clear']['aliases'] == ['reset']
+    assert details['time'] == COMMANDS.commands['time'].describe()
+
+def test_timing_hooks_see_every_command(jarvis):
+    calls = []
+    jarvis.timing_hooks.append(lambda name, seconds: calls.append((name, seconds)))
+    jarvis.process_message('time')
+    jarvis.process_message('hi')
+    jarvis.process_message('search')  # Missing argument: the handler never runs
+    jarvis.process_message('how are you today')  # Not a command
+    assert [name for name, _ in calls] == ['time', 'hello']
+    assert all(seconds >= 0 for _, seconds in calls)
+
+    stats = jarvis.get_stats()['commands']
+    assert stats['time']['calls'] == 1 and stats['hello']['calls'] == 1
+    assert 'search' not in stats
+
+def test_timing_hooks_see_failures(jarvis, monkeypatch):
+    calls = []
+    jarvis.timing_hooks.append(lambda name, seconds: calls.append(name))
+
+    def broken(self):
+        raise RuntimeError("broken")
+    monkeypatch.setattr(COMMANDS.commands['joke'], 'handler', broken)
+    with pytest.raises(RuntimeError):
+        jarvis.process_message('joke')
+    assert calls == ['joke']
+
+def test_timing_hooks_see_async_commands(jarvis):
+    calls = []
+    jarvis.timing_hooks.append(lambda name, seconds: calls.append(name))
+    assert asyncio.run(jarvis.process_message_async('clear')) == "Conversation history cleared!"
+    assert calls == ['clear']
@@ -0,0 +1,144 @@
+"""History ring eviction and the page/since cursors, for both history stores"""
+
+import pytest
+
+from app import HistoryRing, SessionHistoryStore, SqliteHistoryStore
+
+def entry(i):
+    return {'timestamp': f't{i}', 'user': f'u{i}', 'response': f'r{i}'}
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return SessionHistoryStore(per_session=5)
+    return SqliteHistoryStore(tmp_path / 'history.sqlite3', per_session=5)
+
+def ids(page):
+    return [item['id'] for item in page['history']]
+
+def test_ring_overwrites_oldest_and_keeps_ids():
+    ring = HistoryRing(3)
+    for i in range(5):
+        ring.append(entry(i))
+    assert (ring.start, ring.end, len(ring)) == (2, 5, 3)
+    assert [item['user'] for item in ring.entries()] == ['u2', 'u3', 'u4']
+    assert [item['id'] for item in ring.entries(3, 4)] == [3]
+
+def test_ring_size_accounting_returns_to_zero():
+    ring = HistoryRing(2)
+    for i in range(4):
+        ring.append(entry(i))
+    assert ring.size_bytes > 0
+    assert ring.clear() > 0
+    assert ring.size_bytes == 0
+    assert (ring.start, ring.end) == (4, 4)  # Cursors stay valid after a clear
+
+def test_store_evicts_least_recently_used_session():
+    store = SessionHistoryStore(per_session=5, max_sessions=2)
+    store.append('a', entry(0))
+    store.append('b', entry(0))
+    store.page('a')  # a is now more recent than b
+    store.append('c', entry(0))
+    assert ids(store.page('b')) == []
+    assert ids(store.page('a')) == [0]
+    assert store.evicted_sessions == 1
+
+def test_store_memory_ceiling_trims_the_active_session():
+    store = SessionHistoryStore(per_session=100, max_bytes=3 * HistoryRing.ENTRY_OVERHEAD)
+    for i in range(10):
+        store.append('a', entry(i))
+    page = store.page('a', limit=100)
+    assert 1 <= len(page['history']) < 10
+    assert ids(page)[-1] == 9
+    assert store.total_bytes <= store.max_bytes
+
+def test_page_walks_backwards(store):
+    for i in range(7):
+        store.append('s', entry(i))
+    first = store.page('s', limit=2)
+    assert ids(first) == [5, 6]
+    assert first['latest_cursor'] == 7
+    second = store.page('s', before=first['next_cursor'], limit=2)
+    assert ids(second) == [3, 4]
+    last = store.page('s', before=second['next_cursor'], limit=2)
+    assert ids(last) == [2]  # 0 and 1 fell out of the 5-entry ring
+    assert last['next_cursor'] is None
+
+def test_page_of_unknown_session_is_empty(store):
+    page = store.page('nobody')
+    assert page['history'] == [] and page['next_cursor'] is None and page['latest_cursor'] == 0
+
+def test_since_returns_deltas(store):
+    for i in range(4):
+        store.append('s', entry(i))
+    delta = store.since('s', 1, limit=2)
+    assert ids(delta) == [1, 2]
+    assert delta['has_more'] and delta['latest_cursor'] == 3
+    rest = store.since('s', delta['latest_cursor'])
+    assert ids(rest) == [3] and not rest['has_more'] and rest['latest_cursor'] == 4
+    assert ids(store.since('s', 4)) == []
+
+def test_since_reports_truncation(store):
+    for i in range(8):
+        store.append('s', entry(i))
+    delta = store.since('s', 0)
+    assert delta['truncated'] and not delta['reset']
+    assert ids(delta) == [3, 4, 5, 6, 7]
+
+def test_since_future_cursor_resets(store):
+    for i in range(3):
+        store.append('s', entry(i))
+    delta = store.since('s', 50)
+    assert delta['reset'] and not delta['truncated']
+    assert ids(delta) == [0, 1, 2]
+    assert delta['latest_cursor'] == 3
+
+def test_encoded_pages_match_decoded(store):
+    import json
+    from json_codec import dumps_with_encoded
+    for i in range(3):
+        store.append('s', entry(i))
+    decoded = store.page('s')
+    encoded = store.page('s', encoded=True)
+    assert json.loads(dumps_with_encoded(encoded, 'history')) == decoded
+
+def test_version_changes_with_appends_and_clear(store):
+    before = store.version('s')
+    store.append('s', entry(0))
+    appended = store.version('s')
+    assert appended != before
+    store.clear('s')
+    assert store.version('s') != appended
+    assert ids(store.page('s')) == []
+
+def test_stats_count_evicted_sessions(store):
+    store.max_sessions = 2
+    store.SWEEP_EVERY = 1  # SQLite sweeps every append, like the memory store
+    for session_id in 'abc':
+        store.append(session_id, entry(0))
+    stats = store.stats()
+    assert stats['sessions'] == 2
+    assert stats['evicted_sessions'] == 1
+    assert set(stats) == set(SessionHistoryStore().stats())
+
+def test_sqlite_evicted_sessions_are_shared(tmp_path):
+    path = tmp_path / 'history.sqlite3'
+    store = SqliteHistoryStore(path, max_sessions=1)
+    store.SWEEP_EVERY = 1
+    store.append('a', entry(0))
+    store.append('b', entry(0))
+    assert SqliteHistoryStore(path).stats()['evicted_sessions'] == 1  # As another worker process sees it
+
+def test_sqlite_clear_rolls_back_on_error(tmp_path):
+    store = SqliteHistoryStore(tmp_path / 'history.sqlite3')
+    for i in range(3):
+        store.append('s', entry(i))
+    db = store._connection()
+    db.execute("CREATE TRIGGER fail BEFORE UPDATE OF start ON sessions BEGIN SELECT RAISE(ABORT, 'disk full'); END")
+    with pytest.raises(Exception, match='disk full'):
+        store.clear('s')
+    assert ids(store.page('s')) == [0, 1, 2]  # The DELETE was rolled back with the failed UPDATE
+
+    db.execute("DROP TRIGGER fail")
+    store.clear('s')  # The connection isn't left inside the failed transaction
+    assert ids(store.page('s')) == []
@@ -0,0 +1,83 @@
+"""Content negotiation, ETag matching and the precompressed StaticAsset"""
+
+import gzip
+
+import pytest
+
+from http_cache import StaticAsset, choose_encoding, encoded_etag, etag_matches, gzip_if_worthwhile
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip, deflate, br', 'br'),
+    ('gzip;q=0.5, br;q=0.8', 'br'),  # Any q > 0 will do; the server's order decides
+    ('gzip', 'gzip'),
+    ('GZIP;Q=1', 'gzip'),
+    ('br;q=0, gzip', 'gzip'),
+    ('*', 'br'),
+    ('*, br;q=0', 'gzip'),
+    ('gzip;q=0', None),
+    ('gzip;q=nonsense', None),
+    ('identity', None),
+    ('', None),
+    (None, None),
+])
+def test_choose_encoding(header, expected):
+    assert choose_encoding(header, ('br', 'gzip')) == expected
+
+@pytest.mark.parametrize('header, matches', [
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"abc-gzip"', True),  # Every variant decodes to the same content
+    ('W/"abc-br"', True),
+    ('"other", "abc"', True),
+    ('*', True),
+    ('"abcd"', False),
+    ('"other"', False),
+    ('', False),
+    (None, False),
+])
+def test_etag_matches(header, matches):
+    assert etag_matches(header, '"abc"') is matches
+    assert etag_matches(header, encoded_etag('"abc"', 'gzip')) is matches
+
+def test_gzip_if_worthwhile():
+    big, small = b'x' * 2000, b'x' * 100
+    body, encoding = gzip_if_worthwhile(big, 'gzip, br', min_bytes=1024)
+    assert encoding == 'gzip' and gzip.decompress(body) == big
+    assert gzip_if_worthwhile(small, 'gzip', min_bytes=1024) == (small, None)
+    assert gzip_if_worthwhile(big, 'br', min_bytes=1024) == (big, None)
+    assert gzip_if_worthwhile(big, None, min_bytes=1024) == (big, None)
+
+@pytest.fixture
+def asset():
+    return StaticAsset(b'<html>' + b'hello jarvis ' * 500 + b'</html>', 'text/html')
+
+def test_static_asset_serves_gzip_variant(asset):
+    status, body, headers = asset.respond('gzip', None)
+    assert status == 200
+    assert headers['Content-Encoding'] == 'gzip'
+    assert headers['ETag'].endswith('-gzip"')
+    assert headers['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(body) == asset.variants[None][0]
+
+def test_static_asset_identity(asset):
+    status, body, headers = asset.respond('identity', None)
+    assert status == 200
+    assert body == asset.variants[None][0]
+    assert 'Content-Encoding' not in headers
+
+def test_static_asset_304_on_etag_match(asset):
+    _, _, headers = asset.respond('gzip', None)
+    status, body, again = asset.respond('gzip', headers['ETag'])
+    assert (status, body) == (304, b'')
+    assert again['ETag'] == headers['ETag']
+    assert 'Content-Encoding' not in again
+    # A cached identity copy is still current when the client now accepts gzip
+    identity_tag = asset.respond(None, None)[2]['ETag']
+    assert asset.respond('gzip', f'W/{identity_tag}')[0] == 304
+
+def test_static_asset_skips_variants_that_dont_shrink():
+    asset = StaticAsset(b'hi', 'text/plain')
+    assert list(asset.variants) == [None]
+    status, body, headers = asset.respond('gzip, br', None)
+    assert (status, body) == (200, b'hi')
+    assert 'Content-Encoding' not in headers
@@ -0,0 +1,115 @@
+"""IntentClassifier: accuracy on intent_examples.json, held-out phrases, the confidence threshold and the batch path"""
+
+import numpy as np
+import pytest
+
+import intent_classifier
+from app import JarvisAPI, SessionHistoryStore
+from intent_classifier import MIN_CONFIDENCE, IntentClassifier, load_examples
+
+@pytest.fixture(scope='module')
+def examples():
+    return load_examples()
+
+@pytest.fixture(scope='module')
+def model(examples):
+    return IntentClassifier.train(examples)
+
+def test_recalls_its_training_examples(model, examples):
+    pairs = [(intent, text) for intent, texts in examples.items() for text in texts]
+    correct = sum(model.classify(text)[0] == intent for intent, text in pairs)
+    assert correct / len(pairs) >= 0.95
+
+# Paraphrases that appear nowhere in intent_examples.json
+@pytest.mark.parametrize('message, intent', [
+    ("could you tell me something funny", 'joke'),
+    ("what's the temperature outside in paris", 'weather'),
+    ("what day is it today", 'date'),
+    ("how late is it", 'time'),
+    ("give me some motivation", 'quote'),
+    ("wipe our chat", 'clear'),
+    ("look up the eiffel tower on wikipedia", 'wiki'),
+    ("what can you do", 'help'),
+    ("see you later", 'bye'),
+    ("good morning jarvis", 'hello'),
+    ("what processor does this machine have", 'system'),
+])
+def test_held_out_phrases(model, message, intent):
+    assert model.classify(message)[0] == intent
+
+def test_leave_one_out_guesses_are_mostly_right(examples):
+    # The threshold makes the classifier abstain rather than guess, so judge the guesses it does make
+    right = wrong = 0
+    for intent, texts in examples.items():
+        for i, text in enumerate(texts):
+            held_out = {name: (others[:i] + others[i + 1:] if name == intent else others)
+                        for name, others in examples.items()}
+            guess, _ = IntentClassifier.train(held_out).classify(text)
+            if guess == intent:
+                right += 1
+            elif guess is not None:
+                wrong += 1
+    assert right / (right + wrong) >= 0.7
+
+@pytest.mark.parametrize('message', ["qzxv wmpt", "asdfgh", "google the best pizza near me"])
+def test_unsure_messages_have_no_intent(model, message):
+    intent, score = model.classify(message)
+    assert intent is None
+    assert 0 <= score < MIN_CONFIDENCE
+
+@pytest.mark.parametrize('message', ["", "   "])
+def test_blank_messages(model, message):
+    assert model.classify(message)[0] is None
+
+def test_threshold_decides(model, monkeypatch):
+    intent, score = model.classify("what day is it today")
+    assert intent == 'date' and score >= MIN_CONFIDENCE
+    monkeypatch.setattr(intent_classifier, 'MIN_CONFIDENCE', score + 0.01)
+    assert model.classify("what day is it today") == (None, score)
+
+def test_batch_matches_single(model, examples):
+    messages = [text for texts in examples.values() for text in texts[:2]] + ["", "qzxv", "how late is it"]
+    for (intent, score), message in zip(model.classify_batch(messages), messages):
+        single_intent, single_score = model.classify(message)
+        assert intent == single_intent
+        assert score == pytest.approx(single_score, abs=1e-5)
+    assert model.classify_batch([]) == []
+    assert model.classify_batch(["", " "]) == [(None, 0.0), (None, 0.0)]
+
+def test_saved_model_round_trips(model, tmp_path):
+    model.save(tmp_path / 'model.npz')
+    loaded = IntentClassifier.load(tmp_path / 'model.npz')
+    assert loaded.labels == model.labels and loaded.digest == model.digest
+    assert np.array_equal(loaded.centroids, model.centroids)
+
+def test_rebuilds_when_the_examples_change(examples, tmp_path):
+    import json
+    path = tmp_path / 'examples.json'
+    path.write_text(json.dumps(examples))
+    first = IntentClassifier.load_or_build(tmp_path / 'model.npz', path)
+    assert IntentClassifier.load_or_build(tmp_path / 'model.npz', path).digest == first.digest
+
+    path.write_text(json.dumps({**examples, 'joke': examples['joke'] + ["tickle my funny bone"]}))
+    assert IntentClassifier.load_or_build(tmp_path / 'model.npz', path).digest != first.digest
+
+def test_batch_path_classifies_in_one_pass(monkeypatch):
+    jarvis = JarvisAPI(history=SessionHistoryStore())
+    try:
+        messages = ["tell me the processor of this machine", "time", "tell me something funny please", "qzxv wmpt"]
+        batches = []
+        classify_batch = jarvis.intent_classifier.classify_batch
+        monkeypatch.setattr(jarvis.intent_classifier, 'classify_batch',
+                            lambda texts: batches.append(texts) or classify_batch(texts))
+        monkeypatch.setattr(jarvis.intent_classifier, 'classify', pytest.fail)
+        result = jarvis.process_batch(messages)
+    finally:
+        jarvis.wiki_executor.shutdown(wait=False)
+        jarvis.batch_executor.shutdown(wait=False)
+
+    # Commands never reach the classifier; every other message is scored in the same pass
+    assert batches == [[messages[0], messages[2], messages[3]]]
+    replies = [item['response'] for item in result['results']]
+    assert replies[0] == "It sounds like you want 'system'. Try: system"
+    assert replies[1].startswith("The current time is")
+    assert replies[2] in jarvis.jokes
+    assert replies[3] in jarvis.responses['unknown']
@@ -0,0 +1,63 @@
+"""json_codec: dumps and the spliced dumps_with_encoded match json.dumps byte for byte, under either backend"""
+
+import datetime
+import json
+
+import pytest
+
+import json_codec
+from json_codec import ORJSON_AVAILABLE, dumps, dumps_with_encoded, loads
+
+ENTRIES = [
+    {'timestamp': '2024-05-01T12:00:00', 'user': 'hello', 'response': 'Hi there!', 'id': 0},
+    {'timestamp': '2024-05-01T12:00:01', 'user': 'wiki Zürich', 'response': 'Zürich 🇨🇭 is "big"\n\tand\\old', 'id': 1},
+    {'timestamp': '2024-05-01T12:00:02', 'user': 'calculate 1/3', 'response': 'Result: 0.3333333333333333',
+     'id': 2, 'extra': [None, True, False, -7, 2.5, {'nested': []}]},
+]
+
+@pytest.fixture(params=['stdlib', pytest.param('orjson', marks=pytest.mark.skipif(
+    not ORJSON_AVAILABLE, reason="orjson is not installed"))])
+def backend(request, monkeypatch):
+    monkeypatch.setattr(json_codec, 'JSON_BACKEND', request.param)
+    return request.param
+
+def reference(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def page(entries, key_position=0):
+    items = [('next_cursor', 3), ('latest_cursor', None), ('count', len(entries)), ('status', 'success')]
+    items.insert(key_position, ('history', entries))
+    return dict(items)
+
+@pytest.mark.parametrize('obj', [
+    {}, [], 'ünïcödé ✓', ' \x1f"\\', 0, -1, 2 ** 63 - 1, 0.1, 1.5, True, None,
+    {'a': [1, {'b': None}], 'c': 'd'}, ENTRIES,
+])
+def test_dumps_matches_json_dumps(backend, obj):
+    assert dumps(obj) == reference(obj)
+    assert loads(dumps(obj)) == obj
+
+def test_dumps_falls_back_for_wide_ints(backend):
+    assert dumps({'big': 2 ** 80}) == reference({'big': 2 ** 80})
+
+def test_dumps_encodes_dates_like_flask(backend):
+    when = datetime.datetime(2024, 5, 1, 12, 0, tzinfo=datetime.timezone.utc)
+    assert loads(dumps({'when': when})) == {'when': 'Wed, 01 May 2024 12:00:00 GMT'}
+
+@pytest.mark.parametrize('key_position', [0, 2, 4])
+def test_spliced_page_matches_json_dumps(backend, key_position):
+    encoded = [dumps(entry) for entry in ENTRIES]
+    body = dumps_with_encoded(page(encoded, key_position), 'history')
+    assert body == reference(page(ENTRIES, key_position))
+    assert body == dumps(page(ENTRIES, key_position))
+
+def test_spliced_empty_list(backend):
+    assert dumps_with_encoded(page([]), 'history') == reference(page([]))
+    assert dumps_with_encoded({'history': []}, 'history') == b'{"history":[]}'
+
+def test_backends_agree():
+    if not ORJSON_AVAILABLE:
+        pytest.skip("orjson is not installed")
+    assert json_codec.stdlib_dumps(page(ENTRIES)) == reference(page(ENTRIES))
+    encoded = [dumps(entry) for entry in ENTRIES]
+    assert dumps_with_encoded(page(encoded), 'history') == json_codec.stdlib_dumps(page(ENTRIES))
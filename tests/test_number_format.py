@@ -0,0 +1,48 @@
+"""scientific() and format_integer(): how big integer results are shown"""
+
+import decimal
+import random
+import time
+
+import pytest
+
+from calculator import CALC_MAX_DIGITS, TooManyDigits, format_integer, scientific
+
+@pytest.mark.parametrize('value', [0, 7, -42, 10 ** 99, -(10 ** 99 - 1)])
+def test_short_values_are_shown_in_full(value):
+    assert format_integer(value) == str(value)
+
+def test_long_values_are_shown_with_their_digit_count():
+    assert format_integer(10 ** 150) == '1.00000000000000e+150 (151 digits)'
+    assert format_integer(-(2 ** 1000)) == '-1.07150860718627e+301 (302 digits)'
+    assert len(str(10 ** CALC_MAX_DIGITS)) == CALC_MAX_DIGITS + 1
+    assert format_integer(10 ** CALC_MAX_DIGITS).endswith(f'({CALC_MAX_DIGITS + 1} digits)')
+
+def test_scientific_matches_decimal():
+    rng = random.Random(0)
+    for _ in range(200):
+        value = rng.getrandbits(rng.randint(400, 4000)) | 1
+        with decimal.localcontext() as context:
+            context.prec = 15
+            expected = format(+decimal.Decimal(value), '.14e')
+        assert scientific(value) == expected.replace('E', 'e')
+
+def test_scientific_rounds_up_into_the_next_power_of_ten():
+    assert scientific(10 ** 200 - 1) == '1.00000000000000e+200'
+    assert scientific(99_999_999_999_999_999, digits=3) == '1.00e+17'
+
+def test_scientific_is_cheap_for_huge_values():
+    started = time.perf_counter()
+    text = scientific(2 ** 3_000_000, digits=5)
+    assert time.perf_counter() - started < 0.1
+    with decimal.localcontext() as context:
+        context.prec = 5
+        assert text == format(decimal.Decimal(2) ** 3_000_000, '.4e').replace('E', 'e')  # 9.7049e+903089
+
+def test_exact_mode_gives_every_digit():
+    assert format_integer(3 ** 500, exact=True) == str(3 ** 500)
+    assert len(format_integer(2 ** 200_000, exact=True)) == 60206
+
+def test_exact_mode_has_its_own_limit():
+    with pytest.raises(TooManyDigits):
+        format_integer(10 ** 200_000, exact=True)
@@ -0,0 +1,144 @@
+"""SingleFlight: concurrent callers for one key share a single run and its outcome"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app import SingleFlight
+
+CALLERS = 8
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+def run_concurrently(flight, fn):
+    """Call flight.do('key', fn) from CALLERS threads, releasing fn once all of them are waiting"""
+    release = threading.Event()
+    outcomes = [None] * CALLERS
+
+    def gated():
+        release.wait()
+        return fn()
+
+    def caller(i):
+        try:
+            outcomes[i] = ('result', flight.do('key', gated))
+        except Exception as e:
+            outcomes[i] = ('error', e)
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(CALLERS)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: flight.collapsed == CALLERS - 1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+def test_concurrent_callers_share_one_run():
+    flight = SingleFlight()
+    runs = []
+    result = object()
+
+    def fetch():
+        runs.append(1)
+        return result
+
+    outcomes = run_concurrently(flight, fetch)
+    assert len(runs) == 1
+    assert all(outcome == ('result', result) for outcome in outcomes)
+    assert flight.stats() == {'executed': 1, 'collapsed': CALLERS - 1, 'in_flight': 0}
+
+def test_concurrent_callers_share_the_exception():
+    flight = SingleFlight()
+    runs = []
+    error = RuntimeError("upstream down")
+
+    def fetch():
+        runs.append(1)
+        raise error
+
+    outcomes = run_concurrently(flight, fetch)
+    assert len(runs) == 1
+    assert all(kind == 'error' and e is error for kind, e in outcomes)
+
+def test_key_is_released_after_the_call():
+    flight = SingleFlight()
+    assert flight.do('key', lambda: 1) == 1
+    assert flight.do('key', lambda: 2) == 2
+    with pytest.raises(ValueError):
+        flight.do('key', int, 'x')
+    assert flight.do('key', lambda: 3) == 3
+    assert flight.executed == 4 and flight.collapsed == 0
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    assert [flight.do(key, str.upper, key) for key in ('a', 'b')] == ['A', 'B']
+    assert flight.executed == 2
+
+def run_async(flight, fetch, callers=CALLERS):
+    async def main():
+        release = asyncio.Event()
+
+        async def gated():
+            await release.wait()
+            return await fetch()
+
+        tasks = [asyncio.ensure_future(flight.do_async('key', gated)) for _ in range(callers)]
+        while flight.collapsed < callers - 1:
+            await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+    return asyncio.run(main())
+
+def test_async_callers_share_one_run():
+    flight = SingleFlight()
+    runs = []
+
+    async def fetch():
+        runs.append(1)
+        return 'answer'
+
+    assert run_async(flight, fetch) == ['answer'] * CALLERS
+    assert len(runs) == 1
+    assert flight.stats() == {'executed': 1, 'collapsed': CALLERS - 1, 'in_flight': 0}
+
+def test_async_callers_share_the_exception():
+    flight = SingleFlight()
+    error = RuntimeError("upstream down")
+
+    async def fetch():
+        raise error
+
+    outcomes = run_async(flight, fetch)
+    assert all(outcome is error for outcome in outcomes)
+    assert flight.executed == 1
+
+def test_async_caller_going_away_does_not_cancel_the_rest():
+    flight = SingleFlight()
+    runs = []
+
+    async def main():
+        release = asyncio.Event()
+
+        async def fetch():
+            runs.append(1)
+            await release.wait()
+            return 'answer'
+
+        first = asyncio.ensure_future(flight.do_async('key', fetch))
+        second = asyncio.ensure_future(flight.do_async('key', fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        assert await second == 'answer'
+        assert first.cancelled()
+
+    asyncio.run(main())
+    assert len(runs) == 1
@@ -0,0 +1,103 @@
+"""Offline Wikipedia: building the index from TSV and XML dumps, and the memory-mapped lookup"""
+
+import bz2
+import gzip
+
+import pytest
+
+from wiki_offline import MAGIC, OfflineWikipedia, build_index, normalize_title
+
+ARTICLES = {
+    'Python (programming language)': "Python is a high-level programming language.",
+    'Python (genus)': "Python is a genus of constricting snakes.",
+    'Python': "Python may refer to:",
+    'Ada Lovelace': "Augusta Ada King, Countess of Lovelace, was an English mathematician.",
+    'Zürich': "Zürich is the largest city in Switzerland.",
+    'Mercury': "Mercury may refer to:",
+}
+
+def write_tsv(path, articles=ARTICLES):
+    data = ''.join(f"{title}\t{abstract}\n" for title, abstract in articles.items()).encode('utf-8')
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'wb') as f:
+        f.write(data)
+
+def write_xml(path, articles=ARTICLES):
+    docs = ''.join(
+        f"<doc><title>Wikipedia: {title}</title><url>https://example.org</url>"
+        f"<abstract>{abstract}</abstract></doc>"
+        for title, abstract in articles.items())
+    data = f"<feed>{docs}</feed>".encode('utf-8')
+    opener = bz2.open if str(path).endswith('.bz2') else open
+    with opener(path, 'wb') as f:
+        f.write(data)
+
+@pytest.fixture(params=['dump.tsv', 'dump.tsv.gz', 'dump.xml', 'dump.xml.bz2'])
+def wiki(request, tmp_path):
+    source = tmp_path / request.param
+    (write_tsv if '.tsv' in request.param else write_xml)(source)
+    assert build_index(source, tmp_path / 'index') == len(ARTICLES)
+    wiki = OfflineWikipedia(tmp_path / 'index')
+    yield wiki
+    wiki.close()
+
+def test_builds_both_files(wiki, tmp_path):
+    assert OfflineWikipedia.available(tmp_path / 'index')
+    assert not list((tmp_path / 'index').glob('*.tmp'))
+    assert wiki.count == len(ARTICLES)
+
+def test_exact_title(wiki):
+    assert wiki.lookup('Ada Lovelace') == ('summary', ARTICLES['Ada Lovelace'])
+    assert wiki.lookup('Python (genus)') == ('summary', ARTICLES['Python (genus)'])
+
+def test_case_whitespace_and_underscores_fold(wiki):
+    assert wiki.lookup('ada lovelace') == ('summary', ARTICLES['Ada Lovelace'])
+    assert wiki.lookup('  ADA_LOVELACE ') == ('summary', ARTICLES['Ada Lovelace'])
+    assert wiki.lookup('ZÜRICH') == ('summary', ARTICLES['Zürich'])
+
+def test_unique_prefix_resolves(wiki):
+    assert wiki.lookup('ada') == ('summary', ARTICLES['Ada Lovelace'])
+
+def test_disambiguation_page_offers_the_qualified_titles(wiki):
+    kind, titles = wiki.lookup('python')
+    assert kind == 'disambiguation'
+    assert sorted(titles) == ['Python (genus)', 'Python (programming language)']
+
+def test_disambiguation_page_without_qualified_titles(wiki):
+    assert wiki.lookup('Mercury') == ('summary', ARTICLES['Mercury'])
+
+def test_missing_title(wiki):
+    assert wiki.lookup('Grace Hopper') == ('missing', None)
+    assert wiki.lookup('zz') == ('missing', None)
+    assert wiki.lookup('   ') == ('missing', None)
+
+def test_normalize_title():
+    assert normalize_title(' Ada_Lovelace  ') == normalize_title('ada lovelace') == 'ada lovelace'
+
+def test_missing_index_is_not_available(tmp_path):
+    assert not OfflineWikipedia.available(tmp_path)
+
+def build_tsv_index(tmp_path):
+    write_tsv(tmp_path / 'dump.tsv')
+    build_index(tmp_path / 'dump.tsv', tmp_path)
+    return tmp_path / 'index.bin'
+
+def test_wrong_magic_is_rejected(tmp_path):
+    index = build_tsv_index(tmp_path)
+    data = index.read_bytes()
+    index.write_bytes(b'XXXX' + data[len(MAGIC):])
+    with pytest.raises(ValueError, match='not a JarvisAI offline Wikipedia index'):
+        OfflineWikipedia(tmp_path)
+
+def test_truncated_index_is_rejected(tmp_path):
+    index = build_tsv_index(tmp_path)
+    index.write_bytes(index.read_bytes()[:40])
+    with pytest.raises(ValueError, match='truncated'):
+        OfflineWikipedia(tmp_path)
+
+@pytest.mark.parametrize('size', [0, 6])
+def test_short_index_is_rejected(tmp_path, size):
+    index = build_tsv_index(tmp_path)
+    index.write_bytes(index.read_bytes()[:size])
+    with pytest.raises(ValueError):
+        OfflineWikipedia(tmp_path)
@@ -0,0 +1,104 @@
+"""JarvisAPI.wikipedia_search against wiki_stub_server: the deadline, the breaker, stale answers and recovery"""
+
+import asyncio
+import time
+
+import pytest
+
+import app
+from app import CircuitBreaker, JarvisAPI, SessionHistoryStore, UpstreamFailure
+from wiki_client import WikiCache, WikipediaClientPool
+
+DEADLINE = 0.3
+
+@pytest.fixture
+def jarvis(stub, monkeypatch):
+    monkeypatch.setattr(app, 'WIKI_TIMEOUT', DEADLINE)
+    jarvis = JarvisAPI(history=SessionHistoryStore())
+    jarvis.offline_wiki = None
+    jarvis.wiki_clients = WikipediaClientPool(stub.url)
+    jarvis.wiki_cache = WikiCache()
+    jarvis.wiki_breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+    yield jarvis
+    jarvis.wiki_executor.shutdown(wait=True)
+    jarvis.batch_executor.shutdown(wait=False)
+
+def test_answers_and_caches(jarvis, stub):
+    reply = jarvis.wikipedia_search('python')
+    assert reply.startswith("Wikipedia says: Python is an article")
+    requests = stub.requests
+    assert jarvis.wikipedia_search('Python') == reply
+    assert stub.requests == requests
+
+def test_slow_upstream_misses_the_deadline(jarvis, stub):
+    stub.latency = 1.0
+    start = time.monotonic()
+    reply = jarvis.wikipedia_search('slow')
+    assert time.monotonic() - start < DEADLINE + 0.2
+    assert isinstance(reply, UpstreamFailure)
+    # Either the caller's deadline or the worker's own capped read timeout fires first
+    assert reply.startswith("Wikipedia search error:")
+    assert jarvis.wiki_breaker.failures == 1
+
+def test_worker_gives_up_at_the_deadline(jarvis, stub):
+    # The executor thread must not keep waiting on the socket after the caller has gone
+    stub.latency = 1.0
+    start = time.monotonic()
+    with pytest.raises(Exception):
+        jarvis.fetch_wikipedia('slow', 'en', deadline=time.monotonic() + DEADLINE)
+    assert time.monotonic() - start < DEADLINE + 0.2
+
+def test_async_search_misses_the_deadline(jarvis, stub):
+    stub.latency = 1.0
+    start = time.monotonic()
+    reply = asyncio.run(jarvis.wikipedia_search_async('slow'))
+    assert time.monotonic() - start < DEADLINE + 0.2
+    assert isinstance(reply, UpstreamFailure)
+
+def test_breaker_trips_and_fails_fast(jarvis, stub):
+    stub.error_rate = 1
+    for query in ('first', 'second'):
+        assert isinstance(jarvis.wikipedia_search(query), UpstreamFailure)
+    assert jarvis.wiki_breaker.state == CircuitBreaker.OPEN
+
+    requests = stub.requests
+    reply = jarvis.wikipedia_search('third')
+    assert reply == "Wikipedia is temporarily unavailable. Please try again in a little while."
+    assert stub.requests == requests  # Rejected without going upstream
+
+def test_stale_answer_when_upstream_fails(jarvis, stub):
+    jarvis.wiki_cache = WikiCache(ttl=0)  # Every answer is expired as soon as it is cached
+    fresh = jarvis.wikipedia_search('python')
+    assert fresh.startswith("Wikipedia says:")
+
+    stub.error_rate = 1
+    assert jarvis.wikipedia_search('python') == fresh
+    assert jarvis.wikipedia_search('python') == fresh
+    assert jarvis.wiki_breaker.state == CircuitBreaker.OPEN
+
+    requests = stub.requests
+    assert jarvis.wikipedia_search('python') == fresh  # Served stale while the breaker is open
+    assert stub.requests == requests
+
+def test_half_open_probe_closes_on_success(jarvis, stub):
+    stub.error_rate = 1
+    jarvis.wikipedia_search('first')
+    jarvis.wikipedia_search('second')
+    assert jarvis.wiki_breaker.state == CircuitBreaker.OPEN
+
+    stub.error_rate = 0
+    time.sleep(jarvis.wiki_breaker.reset_timeout)
+    assert jarvis.wikipedia_search('python').startswith("Wikipedia says:")
+    assert jarvis.wiki_breaker.state == CircuitBreaker.CLOSED
+
+def test_half_open_probe_reopens_on_failure(jarvis, stub):
+    stub.error_rate = 1
+    jarvis.wikipedia_search('first')
+    jarvis.wikipedia_search('second')
+    time.sleep(jarvis.wiki_breaker.reset_timeout)
+
+    requests = stub.requests
+    assert isinstance(jarvis.wikipedia_search('probe'), UpstreamFailure)
+    assert stub.requests == requests + 1  # Exactly one probe went upstream
+    assert jarvis.wiki_breaker.state == CircuitBreaker.OPEN
+    assert jarvis.wiki_breaker.stats()['trips'] == 2
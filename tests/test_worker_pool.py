@@ -0,0 +1,104 @@
+"""WorkerPool deadlines, restarts and error propagation, with real worker processes"""
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from calculator import evaluate_isolated
+from worker_pool import DeadlineExceeded, WorkerLost, WorkerPool
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(2)
+    pool.warm()
+    yield pool
+    pool.shutdown()
+
+def test_runs_jobs_and_formats_big_results(pool):
+    assert pool.run(5, pow, 2, 10) == 1024
+    assert pool.run(5, evaluate_isolated, '2**100000', False).endswith('(30103 digits)')
+    assert pool.stats()['completed'] == 2
+
+def test_exceptions_come_back_from_the_worker(pool):
+    with pytest.raises(ZeroDivisionError):
+        pool.run(5, evaluate_isolated, '1/0')
+    assert pool.run(5, pow, 3, 2) == 9  # The worker is still usable
+
+def test_deadline_kills_and_replaces_only_that_worker(pool):
+    with pytest.raises(DeadlineExceeded):
+        pool.run(0.2, time.sleep, 10)
+    stats = pool.stats()
+    assert stats['timeouts'] == 1 and stats['restarts'] == 1
+    assert pool.run(5, pow, 2, 3) == 8
+
+def test_queued_jobs_are_not_charged_for_waiting(pool):
+    errors = []
+
+    def slow():
+        try:
+            pool.run(0.5, time.sleep, 0.3)
+        except Exception as e:
+            errors.append(e)
+
+    busy = [threading.Thread(target=slow) for _ in range(2)]
+    for thread in busy:
+        thread.start()
+    time.sleep(0.05)
+    # Both workers are busy for longer than this job's own deadline; it must still succeed
+    assert pool.run(0.2, pow, 2, 5) == 32
+    for thread in busy:
+        thread.join()
+    assert errors == []
+    assert pool.stats()['timeouts'] == 0
+
+def test_a_timeout_leaves_other_running_jobs_alone(pool):
+    results = []
+    other = threading.Thread(target=lambda: results.append(pool.run(5, time.sleep, 0.5)))
+    other.start()
+    time.sleep(0.05)
+    with pytest.raises(DeadlineExceeded):
+        pool.run(0.2, time.sleep, 10)
+    other.join()
+    assert results == [None]
+
+def test_a_worker_that_dies_is_reported_and_replaced(pool):
+    with pytest.raises(WorkerLost):
+        pool.run(5, os._exit, 1)
+    assert pool.run(5, pow, 2, 2) == 4
+
+def test_unpicklable_jobs_leave_the_worker_usable(pool):
+    with pytest.raises(Exception):
+        pool.run(5, lambda: 1)
+    assert pool.run(5, pow, 5, 2) == 25
+
+def test_run_async_and_cancellation(pool):
+    async def scenario():
+        queued = asyncio.ensure_future(pool.run_async(5, time.sleep, 0.3))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        return await pool.run_async(5, pow, 2, 6)
+
+    assert asyncio.run(scenario()) == 64
+
+def test_shutdown_releases_waiting_callers():
+    pool = WorkerPool(1)
+    outcome = []
+
+    def job():
+        try:
+            outcome.append(pool.run(5, pow, 2, 2))
+        except WorkerLost as e:
+            outcome.append(e)
+
+    thread = threading.Thread(target=job)
+    thread.start()
+    time.sleep(0.01)  # Still booting its worker
+    pool.shutdown()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert len(outcome) == 1
@@ -0,0 +1,230 @@
+"""
+JarvisAI Wikipedia client - MediaWiki API lookups and the cache in front of them
+
+Shared by the web server and the command-line assistant. One keep-alive
+client per language answers lookups as (kind, payload) pairs; WikiCache
+keeps those outcomes in an LRU with TTLs, optionally persisted to SQLite,
+and can hand back an expired answer when upstream is down.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import requests
+    WIKIPEDIA_AVAILABLE = True
+except ImportError:
+    WIKIPEDIA_AVAILABLE = False  # The entry points say so at start-up
+
+# Wikipedia cache settings
+WIKI_CACHE_SIZE = int(os.environ.get('JARVIS_WIKI_CACHE_SIZE', 1024))
+WIKI_CACHE_TTL = int(os.environ.get('JARVIS_WIKI_CACHE_TTL', 24 * 3600))
+WIKI_NEGATIVE_TTL = int(os.environ.get('JARVIS_WIKI_NEGATIVE_TTL', 600))
+WIKI_CACHE_PERSIST = os.environ.get('JARVIS_WIKI_CACHE_PERSIST', 'true').lower() == 'true'
+WIKI_STALE_TTL = int(os.environ.get('JARVIS_WIKI_STALE_TTL', 7 * 24 * 3600))
+
+# Wikipedia client settings
+WIKI_API_URL = os.environ.get('JARVIS_WIKI_API_URL')  # May contain {lang}; e.g. a local stub server
+WIKI_TIMEOUT = float(os.environ.get('JARVIS_WIKI_TIMEOUT', 5))
+WIKI_WORKERS = int(os.environ.get('JARVIS_WIKI_WORKERS', 8))
+WIKI_LANG_PREFIX = re.compile(r'^([a-z]{2,3}(?:-[a-z]+)?):\s*(.+)$')
+
+class WikiCache:
+    """Read-through LRU cache for Wikipedia lookups with optional SQLite persistence"""
+
+    def __init__(self, max_entries=WIKI_CACHE_SIZE, ttl=WIKI_CACHE_TTL,
+                 negative_ttl=WIKI_NEGATIVE_TTL, stale_ttl=WIKI_STALE_TTL, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl  # How long expired answers remain usable as a fallback
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.stale_hits = 0
+        self._entries = OrderedDict()  # key -> (kind, payload, expires_at)
+        self._lock = threading.Lock()
+        self.path = str(path) if path else None
+        self._db = None
+        self._db_pid = None
+        db = self._connection()
+        if db is not None:
+            db.execute("DELETE FROM wiki_cache WHERE expires_at < ?", (time.time() - self.stale_ttl,))
+            db.commit()
+
+    def _connection(self):
+        """Open the SQLite layer lazily, once per process, so forked workers never share a handle"""
+        if self.path and self._db_pid != os.getpid():
+            self._db_pid = os.getpid()
+            try:
+                self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS wiki_cache "
+                    "(key TEXT PRIMARY KEY, kind TEXT, payload TEXT, expires_at REAL)"
+                )
+            except sqlite3.Error as e:
+                print(f"⚠️  Wikipedia cache persistence disabled: {e}")
+                self.path = self._db = None
+        return self._db
+
+    @staticmethod
+    def make_key(query, lang="en"):
+        return f"{lang}:{' '.join(query.lower().split())}"
+
+    def get(self, key):
+        """Return a cached (kind, payload) pair, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[2] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return item[0], item[1]
+
+            db = self._connection()
+            if db is not None:
+                row = db.execute(
+                    "SELECT kind, payload, expires_at FROM wiki_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[2] > now:
+                    item = (row[0], json.loads(row[1]), row[2])
+                    self._remember(key, item)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return item[0], item[1]
+
+            self.misses += 1
+            return None
+
+    def get_stale(self, key):
+        """Return a cached pair even if it has expired, for use when upstream is down"""
+        cutoff = time.time() - self.stale_ttl
+        with self._lock:
+            item = self._entries.get(key)
+            db = self._connection()
+            if item is None and db is not None:
+                row = db.execute(
+                    "SELECT kind, payload, expires_at FROM wiki_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    item = (row[0], json.loads(row[1]), row[2])
+            if item is not None and item[2] > cutoff:
+                self.stale_hits += 1
+                return item[0], item[1]
+            return None
+
+    def put(self, key, kind, payload):
+        """Cache a lookup outcome; misses ('missing') expire sooner than answers"""
+        ttl = self.negative_ttl if kind == 'missing' else self.ttl
+        item = (kind, payload, time.time() + ttl)
+        with self._lock:
+            self._remember(key, item)
+            db = self._connection()
+            if db is not None:
+                try:
+                    db.execute(
+                        "INSERT OR REPLACE INTO wiki_cache VALUES (?, ?, ?, ?)",
+                        (key, kind, json.dumps(payload), item[2]),
+                    )
+                    db.commit()
+                except sqlite3.Error as e:
+                    print(f"⚠️  Wikipedia cache write failed: {e}")
+
+    def _remember(self, key, item):
+        self._entries[key] = item
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        """Return hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'disk_hits': self.disk_hits,
+                'stale_hits': self.stale_hits,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'persistent': self.path is not None,
+            }
+
+class WikipediaError(Exception):
+    """Raised when the MediaWiki API answers with an error"""
+
+class WikipediaClient:
+    """MediaWiki API client for one language, reusing a keep-alive HTTP session"""
+    USER_AGENT = 'JarvisAI/1.0 (https://github.com/muneebaifrah/JarvisAI)'
+
+    def __init__(self, lang='en', api_url=None, pool_size=WIKI_WORKERS, timeout=WIKI_TIMEOUT):
+        self.lang = lang
+        self.api_url = (api_url or 'https://{lang}.wikipedia.org/w/api.php').format(lang=lang)
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = self.USER_AGENT
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _query(self, deadline=None, **params):
+        params.update(action='query', format='json', formatversion=2)
+        timeout = self.timeout
+        if deadline is not None:
+            # Never let one request outlive the caller's deadline
+            timeout = min(timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                raise TimeoutError("deadline passed before the request was sent")
+        response = self.session.get(self.api_url, params=params, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+        if 'error' in data:
+            raise WikipediaError(data['error'].get('info', 'unknown API error'))
+        return data['query']
+
+    def summary(self, query, sentences=2, deadline=None):
+        """Return a (kind, payload) pair for the best-matching article.
+
+        deadline is a time.monotonic() value; each request's timeout is cut
+        to the time left, so a lookup gives up once its caller has.
+        """
+        results = self._query(deadline, list='search', srsearch=query, srlimit=1, srprop='')['search']
+        if not results:
+            return 'missing', None
+
+        page = self._query(deadline, prop='extracts|pageprops', titles=results[0]['title'], redirects=1,
+                           explaintext=1, exintro=1, exsentences=sentences,
+                           ppprop='disambiguation')['pages'][0]
+        if page.get('missing'):
+            return 'missing', None
+        if 'disambiguation' in page.get('pageprops', {}):
+            links = self._query(deadline, prop='links', titles=page['title'], plnamespace=0,
+                                pllimit=50)['pages'][0].get('links', [])
+            return 'disambiguation', [link['title'] for link in links][:10]
+        return 'summary', page.get('extract', '')
+
+class WikipediaClientPool:
+    """One WikipediaClient per language, created on first use and shared across threads"""
+
+    def __init__(self, api_url=None):
+        self.api_url = api_url
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get(self, lang='en'):
+        client = self._clients.get(lang)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(lang)
+                if client is None:
+                    client = self._clients[lang] = WikipediaClient(lang, self.api_url)
+        return client
+
+    def languages(self):
+        return sorted(self._clients)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+JarvisAI Offline Wikipedia - answer `wiki` lookups from a local abstracts dump
+Build an index with:
+    python wiki_offline.py build enwiki-latest-abstract.xml.gz
+Query it with:
+    python wiki_offline.py lookup "artificial intelligence"
+
+The index is two files inside the output directory (jarvis_data/wiki_offline
+by default), both memory-mapped at lookup time so nothing is loaded up front:
+
+    summaries.bin  UTF-8 abstracts, back to back
+    index.bin      header, fixed-width records sorted by normalized title,
+                   then the title strings the records point into
+"""
+
+import argparse
+import bz2
+import gzip
+import mmap
+import os
+import struct
+import sys
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+MAGIC = b'JWIX'
+VERSION = 1
+HEADER = struct.Struct('<4sII')       # magic, version, record count
+RECORD = struct.Struct('<QHHQI')      # string offset, key length, title length, summary offset, summary length
+MAX_CANDIDATES = 10
+DEFAULT_DIR = Path(os.environ.get('JARVIS_DATA_DIR', 'jarvis_data')) / 'wiki_offline'
+
+def normalize_title(title):
+    """Case-insensitive, whitespace-insensitive lookup key"""
+    return ' '.join(title.casefold().replace('_', ' ').split())
+
+def is_disambiguation(summary):
+    """Abstracts of disambiguation pages end with 'may refer to:'"""
+    return summary.rstrip().endswith('refer to:')
+
+def open_dump(path):
+    """Open a plain, gzip or bz2 compressed dump"""
+    path = str(path)
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if path.endswith('.bz2'):
+        return bz2.open(path, 'rb')
+    return open(path, 'rb')
+
+def read_abstracts_xml(path):
+    """Yield (title, abstract) pairs from a Wikimedia abstracts dump"""
+    with open_dump(path) as f:
+        for _, elem in ET.iterparse(f, events=('end',)):
+            if elem.tag != 'doc':
+                continue
+            title = elem.findtext('title') or ''
+            abstract = elem.findtext('abstract') or ''
+            if title.startswith('Wikipedia: '):
+                title = title[len('Wikipedia: '):]
+            if title and abstract:
+                yield title, abstract.strip()
+            elem.clear()
+
+def read_abstracts_tsv(path):
+    """Yield (title, abstract) pairs from a 'title<TAB>abstract' file"""
+    with open_dump(path) as f:
+        for line in f:
+            title, sep, abstract = line.decode('utf-8').rstrip('\n').partition('\t')
+            if sep and title and abstract:
+                yield title, abstract.strip()
+
+def build_index(source, out_dir=DEFAULT_DIR):
+    """Stream a dump into summaries.bin and write the sorted title index"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    reader = read_abstracts_tsv if '.tsv' in str(source) else read_abstracts_xml
+
+    records = []
+    offset = 0
+    with open(out_dir / 'summaries.bin.tmp', 'wb') as blob:
+        for title, abstract in reader(source):
+            data = abstract.encode('utf-8')
+            blob.write(data)
+            records.append((normalize_title(title).encode('utf-8'), title.encode('utf-8'), offset, len(data)))
+            offset += len(data)
+    records.sort(key=lambda record: record[0])
+
+    # Records are fixed width so lookups can binary search them in place
+    strings_start = HEADER.size + RECORD.size * len(records)
+    with open(out_dir / 'index.bin.tmp', 'wb') as index:
+        index.write(HEADER.pack(MAGIC, VERSION, len(records)))
+        string_offset = strings_start
+        for key, title, summary_offset, summary_length in records:
+            index.write(RECORD.pack(string_offset, len(key), len(title), summary_offset, summary_length))
+            string_offset += len(key) + len(title)
+        for key, title, _, _ in records:
+            index.write(key)
+            index.write(title)
+
+    os.replace(out_dir / 'summaries.bin.tmp', out_dir / 'summaries.bin')
+    os.replace(out_dir / 'index.bin.tmp', out_dir / 'index.bin')
+    return len(records)
+
+class OfflineWikipedia:
+    """Memory-mapped title index over a local Wikipedia abstracts dump"""
+
+    def __init__(self, index_dir=DEFAULT_DIR):
+        index_dir = Path(index_dir)
+        self._index_file = open(index_dir / 'index.bin', 'rb')
+        self._blob_file = open(index_dir / 'summaries.bin', 'rb')
+        self._index = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._blob = mmap.mmap(self._blob_file.fileno(), 0, access=mmap.ACCESS_READ) \
+            if os.fstat(self._blob_file.fileno()).st_size else b''
+
+        path = index_dir / 'index.bin'
+        if len(self._index) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not a JarvisAI offline Wikipedia index")
+        magic, version, self.count = HEADER.unpack_from(self._index, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a JarvisAI offline Wikipedia index")
+        # A short file would otherwise only fail, with struct.error, on the lookup that reaches past its end
+        if len(self._index) < HEADER.size + RECORD.size * self.count:
+            self.close()
+            raise ValueError(f"{path} is truncated")
+
+    @classmethod
+    def available(cls, index_dir=DEFAULT_DIR):
+        index_dir = Path(index_dir)
+        return (index_dir / 'index.bin').exists() and (index_dir / 'summaries.bin').exists()
+
+    def _record(self, i):
+        return RECORD.unpack_from(self._index, HEADER.size + i * RECORD.size)
+
+    def _key(self, i):
+        string_offset, key_length, _, _, _ = self._record(i)
+        return self._index[string_offset:string_offset + key_length]
+
+    def _title(self, i):
+        string_offset, key_length, title_length, _, _ = self._record(i)
+        start = string_offset + key_length
+        return self._index[start:start + title_length].decode('utf-8')
+
+    def _summary(self, i):
+        _, _, _, summary_offset, summary_length = self._record(i)
+        return self._blob[summary_offset:summary_offset + summary_length].decode('utf-8')
+
+    def _lower_bound(self, key):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _prefix_range(self, prefix):
+        """Return the [first, last) record range whose keys start with prefix"""
+        first = self._lower_bound(prefix)
+        last = first
+        while last < self.count and last - first <= MAX_CANDIDATES and self._key(last).startswith(prefix):
+            last += 1
+        return first, last
+
+    def _candidates(self, first, last):
+        titles = [self._title(i) for i in range(first, min(last, first + MAX_CANDIDATES))]
+        return sorted(titles, key=len)
+
+    def lookup(self, query):
+        """Resolve a query to a (kind, payload) pair like the online search does"""
+        key = normalize_title(query).encode('utf-8')
+        if not key:
+            return 'missing', None
+
+        first, last = self._prefix_range(key)
+        exact = [i for i in range(first, last) if self._key(i) == key]
+
+        if len(exact) == 1:
+            summary = self._summary(exact[0])
+            if not is_disambiguation(summary):
+                return 'summary', summary
+            # "Python may refer to:" - offer the "Python (...)" articles instead
+            candidates = self._candidates(*self._prefix_range(key + b' ('))
+            if candidates:
+                return 'disambiguation', candidates
+            return 'summary', summary
+        if len(exact) > 1:
+            return 'disambiguation', [self._title(i) for i in exact[:MAX_CANDIDATES]]
+        if last - first == 1:
+            return 'summary', self._summary(first)
+        if last > first:
+            return 'disambiguation', self._candidates(first, last)
+        return 'missing', None
+
+    def close(self):
+        for handle in (self._index, self._blob, self._index_file, self._blob_file):
+            if hasattr(handle, 'close'):
+                handle.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the offline Wikipedia index")
+    parser.add_argument('--dir', default=str(DEFAULT_DIR), help="Index directory (default: %(default)s)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="Index an abstracts dump (.xml, .tsv, optionally .gz/.bz2)")
+    build.add_argument('dump')
+    lookup = commands.add_parser('lookup', help="Look a title up in the index")
+    lookup.add_argument('query', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        started = time.perf_counter()
+        count = build_index(args.dump, args.dir)
+        print(f"📚 Indexed {count} articles into {args.dir} in {time.perf_counter() - started:.1f}s")
+        return 0
+
+    if not OfflineWikipedia.available(args.dir):
+        print(f"❌ No offline index in {args.dir}. Build one first.")
+        return 1
+    wiki = OfflineWikipedia(args.dir)
+    started = time.perf_counter()
+    kind, payload = wiki.lookup(' '.join(args.query))
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"{kind}: {', '.join(payload) if isinstance(payload, list) else payload}")
+    print(f"⏱️  {elapsed:.3f} ms")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
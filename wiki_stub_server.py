@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+JarvisAI Wikipedia stub - a local stand-in for the MediaWiki API
+Run with:
+    python wiki_stub_server.py --latency 2 --error-rate 0.5
+then start the server against it:
+    JARVIS_WIKI_API_URL=http://localhost:8765/w/api.php python app.py
+
+Latency and errors can be changed while it runs, which is handy for watching
+the circuit breaker trip and recover:
+    curl 'http://localhost:8765/__control?latency=0&error_rate=1'
+
+Titles starting with "missing" don't exist; titles ending in "(disambiguation)"
+or starting with "ambiguous" are disambiguation pages.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+class StubState:
+    def __init__(self, latency=0.0, error_rate=0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self.lock = threading.Lock()
+
+def page_for(title, props):
+    """Build a MediaWiki (formatversion=2) page entry for a title"""
+    if title.lower().startswith('missing'):
+        return {'ns': 0, 'title': title, 'missing': True}
+    page = {'pageid': abs(hash(title)) % 10 ** 6, 'ns': 0, 'title': title}
+    ambiguous = title.lower().startswith('ambiguous') or title.endswith('(disambiguation)')
+    if ambiguous and 'pageprops' in props:
+        page['pageprops'] = {'disambiguation': ''}
+    if 'extracts' in props:
+        page['extract'] = f"{title} is an article served by the JarvisAI stub. It exists for testing."
+    if 'links' in props:
+        page['links'] = [{'ns': 0, 'title': f"{title} ({n})"} for n in ('film', 'band', 'novel')]
+    return page
+
+def api_response(params):
+    """Answer the subset of action=query the assistant's WikipediaClient uses"""
+    if params.get('list') == 'search':
+        term = params.get('srsearch', '')
+        results = [] if term.lower().startswith('missing') else [{'ns': 0, 'title': term.title()}]
+        return {'query': {'searchinfo': {}, 'search': results}}
+
+    props = params.get('prop', '').split('|')
+    pages = [page_for(title, props) for title in filter(None, params.get('titles', '').split('|'))]
+    return {'batchcomplete': True, 'query': {'pages': pages}}
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {key: values[-1] for key, values in parse_qs(url.query, keep_blank_values=True).items()}
+
+            if url.path == '/__control':
+                with state.lock:
+                    if 'latency' in params:
+                        state.latency = float(params['latency'])
+                    if 'error_rate' in params:
+                        state.error_rate = float(params['error_rate'])
+                    body = {'latency': state.latency, 'error_rate': state.error_rate,
+                            'requests': state.requests}
+                return self._send_json(200, body)
+
+            with state.lock:
+                state.requests += 1
+                latency, error_rate = state.latency, state.error_rate
+            if latency:
+                time.sleep(latency)
+            if random.random() < error_rate:
+                return self._send_json(503, {'error': {'code': 'stub', 'info': 'Simulated upstream failure'}})
+            self._send_json(200, api_response(params))
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake MediaWiki API for testing")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests that fail with 503")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(StubState(args.latency, args.error_rate)))
+    print(f"🧪 Wikipedia stub listening on http://127.0.0.1:{args.port}/w/api.php")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
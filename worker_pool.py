@@ -0,0 +1,220 @@
+"""
+JarvisAI worker processes - run CPU-heavy work outside the server's threads
+
+A thread can't be stopped once it is computing, so work that might run long
+goes to a worker process instead. Each worker runs one job at a time and a
+job's deadline starts when a worker takes it, not while it waits in the
+queue. A worker that misses a deadline is killed and replaced on its own:
+jobs queued behind it, or running on the other workers, carry on.
+
+Workers are started as `python worker_pool.py`, not through multiprocessing,
+so they import only the modules their jobs need instead of re-running the
+server's main module. The ASGI server awaits jobs with run_async() so the
+event loop keeps serving while they run.
+"""
+
+import asyncio
+import importlib
+import os
+import queue
+import signal
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Connection
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a job doesn't finish within its deadline"""
+
+class WorkerLost(RuntimeError):
+    """Raised when a worker dies, or can't start, for a reason other than a deadline"""
+
+class _Worker:
+    """One worker process and the pipes to it"""
+
+    def __init__(self, preload):
+        job_read, job_write = os.pipe()
+        result_read, result_write = os.pipe()
+        try:
+            self.process = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), str(job_read), str(result_write), *preload],
+                pass_fds=(job_read, result_write), stdin=subprocess.DEVNULL)
+        finally:
+            os.close(job_read)
+            os.close(result_write)
+        self.jobs = Connection(job_write, readable=False)
+        self.results = Connection(result_read, writable=False)
+        try:
+            self.results.recv()  # Sent once the preloads are imported
+        except EOFError:
+            self.kill()
+            raise WorkerLost("worker exited during start-up") from None
+
+    def kill(self):
+        self.process.kill()
+        self.process.wait()
+        self.jobs.close()
+        self.results.close()
+
+class WorkerPool:
+    """Worker processes whose jobs have hard wall-clock deadlines"""
+
+    def __init__(self, max_workers=2, preload=('calculator', 'system_info')):
+        self.max_workers = max_workers
+        self.preload = tuple(preload)  # Imported by each worker before it takes jobs
+        self._idle = queue.Queue()  # Started workers not running a job
+        self._workers = set()
+        # One dispatcher thread per worker: jobs wait in its queue, off the clock
+        self._dispatch = None
+        self._generation = 0  # Bumped by shutdown(), so workers still booting then are discarded
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.timeouts = 0
+        self.restarts = 0
+
+    def _start(self):
+        with self._lock:
+            if self._dispatch is None:
+                self._dispatch = ThreadPoolExecutor(self.max_workers, thread_name_prefix='worker-pool')
+                for _ in range(self.max_workers):
+                    self._spawn()
+            return self._dispatch
+
+    def _spawn(self):
+        """Start a worker in the background; it joins the idle queue once it has booted"""
+        generation, idle = self._generation, self._idle
+        def boot():
+            try:
+                worker = _Worker(self.preload)
+            except Exception as e:
+                idle.put(WorkerLost(f"worker failed to start: {e}"))
+                return
+            with self._lock:
+                current = generation == self._generation
+                if current:
+                    self._workers.add(worker)
+            if not current:
+                worker.kill()
+                return
+            idle.put(worker)
+        threading.Thread(target=boot, name='worker-pool-boot', daemon=True).start()
+
+    def _retire(self, worker):
+        """Kill a worker that timed out or died, and start its replacement"""
+        with self._lock:
+            self._workers.discard(worker)
+            replace = self._dispatch is not None  # Not after shutdown()
+            if replace:
+                self.restarts += 1
+        worker.kill()
+        if replace:
+            self._spawn()
+
+    def warm(self):
+        """Start the workers in the background so the first job doesn't wait for them"""
+        self._start()
+
+    def _run(self, timeout, fn, args):
+        idle = self._idle  # Workers go back where they came from, even if shutdown() swaps the queue
+        worker = idle.get()
+        if isinstance(worker, WorkerLost):
+            if self._dispatch is not None:
+                self._spawn()  # Try again for the next job
+            raise worker
+        try:
+            worker.jobs.send((fn, args))
+        except (EOFError, OSError):
+            self._retire(worker)
+            raise WorkerLost("worker exited between jobs") from None
+        except BaseException:
+            idle.put(worker)  # The job didn't pickle; the worker never saw it
+            raise
+        try:
+            finished = worker.results.poll(timeout)
+            if finished:
+                ok, value = worker.results.recv()
+        except (EOFError, OSError):
+            self._retire(worker)
+            raise WorkerLost("worker exited mid-job") from None
+        if not finished:
+            with self._lock:
+                self.timeouts += 1
+            self._retire(worker)
+            raise DeadlineExceeded(f"no result within {timeout:g}s")
+        idle.put(worker)
+        if not ok:
+            raise value
+        with self._lock:
+            self.completed += 1
+        return value
+
+    def run(self, timeout, fn, *args):
+        """Run fn(*args) in a worker, raising DeadlineExceeded after it has run for timeout seconds"""
+        return self._start().submit(self._run, timeout, fn, args).result()
+
+    async def run_async(self, timeout, fn, *args):
+        """Coroutine version of run() for the event loop.
+
+        If the awaiting request is cancelled, a job that hasn't started is
+        dropped; one that has is still held to its deadline.
+        """
+        return await asyncio.wrap_future(self._start().submit(self._run, timeout, fn, args))
+
+    def shutdown(self):
+        with self._lock:
+            dispatch, self._dispatch = self._dispatch, None
+            workers, self._workers = self._workers, set()
+            idle, self._idle = self._idle, queue.Queue()
+            self._generation += 1
+        while True:  # Idle workers are no one else's, so they can be closed down here
+            try:
+                worker = idle.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(worker, _Worker):
+                workers.discard(worker)
+                worker.kill()
+        if dispatch is not None:
+            dispatch.shutdown(wait=False, cancel_futures=True)
+            for _ in range(self.max_workers):  # Wake dispatchers still waiting for a worker
+                idle.put(WorkerLost("worker pool shut down"))
+        for worker in workers:
+            # Mid-job: the dispatcher reading its pipes sees it exit and closes them itself
+            worker.process.kill()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'running': len(self._workers),
+                'completed': self.completed,
+                'timeouts': self.timeouts,
+                'restarts': self.restarts,
+            }
+
+def _serve(jobs, results, preload):
+    """A worker's main loop: run (fn, args) jobs one at a time until the server closes the pipe"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is the server's to handle
+    for name in preload:
+        importlib.import_module(name)
+    try:
+        results.send(None)
+    except BrokenPipeError:
+        return  # The server went away while this worker was starting
+    while True:
+        try:
+            fn, args = jobs.recv()
+        except EOFError:
+            return
+        try:
+            reply = (True, fn(*args))
+        except Exception as e:
+            reply = (False, e)
+        try:
+            results.send(reply)
+        except Exception as e:  # The result or the exception doesn't pickle
+            results.send((False, RuntimeError(f"unpicklable result: {e}")))
+
+if __name__ == '__main__':
+    _serve(Connection(int(sys.argv[1]), writable=False), Connection(int(sys.argv[2]), readable=False), sys.argv[3:])